@@ -1,13 +1,23 @@
+import os
+import multiprocessing
 from flask import Flask
 from flask_cors import CORS
 from app.core.config import Config
 
-def create_app():
+def create_app(start_background=False):
+    """
+    创建 Flask 应用
+    Application factory
+
+    Args:
+        start_background: 是否同时启动后台服务（见 start_background_services）。
+            只有服务入口 app/server.py 传 True，测试和脚本中创建应用不会启动任何线程或进程
+    """
     app = Flask(__name__, static_folder=Config.STATIC_FOLDER, static_url_path='/static')
     app.config.from_object(Config)
     
-    # Enable CORS
-    CORS(app)
+    # Enable CORS（列表接口的分页游标放在响应头中，需要对前端可见）
+    CORS(app, expose_headers=['X-Next-Cursor', 'Link'])
     
     # Register Blueprints
     from app.api.auth import auth_bp
@@ -21,8 +31,51 @@ def create_app():
     # Register public/legacy routes if any, or move them to blueprints
     # For now, we will move everything to blueprints.
     
+    from app.services.transcription_service import get_asr_readiness
+    
+    if start_background:
+        start_background_services()
+    
     @app.route('/health')
     def health():
-        return {'status': 'ok'}
+        # 语音识别尚未预热完成时返回 503，负载均衡只会把流量转发给已就绪的实例
+        asr = get_asr_readiness()
+        if not asr['ready']:
+            return {'status': 'warming_up' if asr['state'] == 'warming' else 'unavailable', 'asr': asr}, 503
+        return {'status': 'ok', 'asr': asr}
 
     return app
+
+def start_background_services():
+    """
+    启动 Web 进程的后台服务：ASR 预热、实时评分队列、转写巡检、文件清理
+    Start the background services of a serving web process
+
+    gunicorn 的每个 worker 导入 app/server.py 时各自启动一份；
+    转写工作进程和调试重载监控进程中不启动。
+    """
+    if not _is_serving_process():
+        return
+    from app.services.transcription_service import start_asr_warmup, start_transcription_recovery
+    from app.services.evaluation_queue import get_evaluation_queue
+    from app.services.blob_store import start_blob_cleanup
+    
+    if Config.ASR_WARMUP:
+        start_asr_warmup()
+    # 启动评分工作线程池，接续处理上次运行遗留的评分任务
+    get_evaluation_queue().start()
+    # 重新提交上次运行中丢失的转写任务
+    start_transcription_recovery()
+    # 删除提交失败后留下的未引用文件
+    start_blob_cleanup()
+
+def _is_serving_process():
+    """
+    转写工作进程 (spawn) 会重新导入 app/server.py 并调用 create_app，
+    Flask 调试模式下的重载监控进程也会调用一次，这两种情况都不需要预热或启动后台线程
+    """
+    if multiprocessing.parent_process() is not None:
+        return False
+    if Config.DEBUG and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return False
+    return True
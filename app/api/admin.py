@@ -10,37 +10,99 @@ Admin API Module
 - 报告查看
 """
 
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, jsonify, request
 from app.core.database import get_db_connection
 from app.utils.auth_middleware import token_required
 from app.utils.helpers import generate_token
-from app.core.config import Config
+from app.services.job_claims import QUESTION_JOBS, REPORT_JOBS
+from app.services.job_notify import notify_jobs
+from app.services.resume_text import schedule_resume_extraction
+from app.services.blob_store import blob_key, get_blob_store, lock_blob
+from app.utils.file_response import send_stored_file
+from app.utils.pagination import (
+    Filter, ListSpec, PaginationError, paginate, page_headers, parse_int, parse_int_list, parse_timestamp
+)
 import time
 import os
-import sqlite3
 import io
 import logging
 
 logger = logging.getLogger(__name__)
 admin_bp = Blueprint('admin', __name__)
 
-# === 职位管理 (Position Management) ===
+# 列表接口的可选列、排序和过滤（见 app/utils/pagination.py）
+POSITION_LIST = ListSpec(
+    table='positions',
+    columns=('id', 'name', 'requirements', 'responsibilities', 'quantity', 'status', 'created_at', 'recruiter'),
+    default_fields=('id', 'name', 'requirements', 'responsibilities', 'quantity', 'status', 'created_at', 'recruiter'),
+    sortable=('id', 'created_at', 'name'),
+    filters=[
+        Filter('status', 'status = ?', str),
+        Filter('recruiter', 'recruiter = ?', str),
+        Filter('created_from', 'created_at >= ?', parse_timestamp),
+        Filter('created_to', 'created_at < ?', parse_timestamp),
+    ],
+)
 
-@admin_bp.route('/positions', methods=['GET'])
-@token_required
-def get_positions():
-    """获取所有职位列表"""
+CANDIDATE_LIST = ListSpec(
+    table='candidates',
+    columns=('id', 'position_id', 'name', 'email', 'resume_sha256'),
+    default_fields=('id', 'position_id', 'name', 'email'),
+    sortable=('id', 'name'),
+    filters=[
+        Filter('position_id', 'position_id = ?', parse_int),
+        Filter('email', 'email = ?', str),
+    ],
+)
+
+INTERVIEW_LIST = ListSpec(
+    table='interviews',
+    columns=('id', 'candidate_id', 'interviewer', 'start_time', 'status', 'is_passed', 'token',
+             'question_count', 'voice_reading'),
+    default_fields=('id', 'candidate_id', 'interviewer', 'start_time', 'status', 'is_passed', 'token'),
+    sortable=('id', 'start_time', 'status'),
+    filters=[
+        Filter('status', 'status IN (?)', parse_int_list),
+        Filter('candidate_id', 'candidate_id = ?', parse_int),
+        Filter('position_id', 'candidate_id IN (SELECT id FROM candidates WHERE position_id = ?)', parse_int),
+        Filter('is_passed', 'is_passed = ?', parse_int),
+        Filter('start_from', 'start_time >= ?', parse_timestamp),
+        Filter('start_to', 'start_time < ?', parse_timestamp),
+    ],
+)
+
+def _list_response(spec, log_name):
+    """分页查询列表，参数错误返回 400"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        cursor.execute('SELECT * FROM positions')
-        positions = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return jsonify(positions)
+        try:
+            rows, next_cursor = paginate(cursor, spec, request.args)
+        finally:
+            conn.close()
+        return jsonify(rows), 200, page_headers(request, next_cursor)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        logger.error(f"Error fetching positions: {e}")
+        logger.error(f"Error fetching {log_name}: {e}")
         return jsonify({'error': str(e)}), 500
 
+# === 职位管理 (Position Management) ===
+
+@admin_bp.route('/positions', methods=['GET'])
+@token_required
+def get_positions():
+    """
+    获取职位列表（分页）
+    
+    Query Params:
+        status, recruiter: 过滤
+        created_from, created_to: 创建时间范围（Unix 时间戳或 ISO 日期）
+        sort: id / created_at / name，前缀 '-' 表示倒序
+        limit, cursor, fields: 见 app/utils/pagination.py
+    """
+    return _list_response(POSITION_LIST, 'positions')
+
 @admin_bp.route('/positions', methods=['POST'])
 @token_required
 def create_position():
@@ -101,17 +163,15 @@ def delete_position(id):
 @admin_bp.route('/candidates', methods=['GET'])
 @token_required
 def get_candidates():
-    """获取候选人列表"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, position_id, name, email FROM candidates')
-        candidates = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return jsonify(candidates)
-    except Exception as e:
-        logger.error(f"Error fetching candidates: {e}")
-        return jsonify({'error': str(e)}), 500
+    """
+    获取候选人列表（分页）
+    
+    Query Params:
+        position_id, email: 过滤
+        sort: id / name，前缀 '-' 表示倒序
+        limit, cursor, fields: 见 app/utils/pagination.py
+    """
+    return _list_response(CANDIDATE_LIST, 'candidates')
 
 @admin_bp.route('/candidates', methods=['POST'])
 @token_required
@@ -122,20 +182,23 @@ def create_candidate():
         
         resume_content = request.files['resume_content'].read() if 'resume_content' in request.files else None
         
-        # 数据库适配处理：SQLite 需要 Binary 包装，Postgres 不需要
-        if Config.DB_TYPE == 'postgres':
-             resume_val = resume_content
-        else:
-             resume_val = sqlite3.Binary(resume_content) if resume_content is not None else None
-
+        # 简历写入文件存储，数据库只保存内容的 SHA-256；先写入引用行再写文件，
+        # 事务提交前该文件不会被清理线程删除
+        content_sha256 = blob_key(resume_content) if resume_content else None
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute('''
-            INSERT INTO candidates (position_id, name, email, resume_content)
+            INSERT INTO candidates (position_id, name, email, resume_sha256)
             VALUES (?, ?, ?, ?)
-        ''', (data['position_id'], data['name'], data['email'], resume_val))
+        ''', (data['position_id'], data['name'], data['email'], content_sha256))
+        if resume_content:
+            lock_blob(cursor, content_sha256)
+            get_blob_store().put(resume_content)
         conn.commit()
         conn.close()
+        
+        # 后台解析简历文本并缓存，生成面试问题时不再解析 PDF
+        schedule_resume_extraction(resume_content, content_sha256)
         return jsonify({'status': 'success'})
     except Exception as e:
         logger.error(f"Error creating candidate: {e}")
@@ -148,17 +211,20 @@ def download_resume(id):
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
+        cursor.execute('SELECT resume_sha256 FROM candidates WHERE id=?', (id,))
+        resume = cursor.fetchone()
+        
+        download_name = f'resume_{id}.pdf'
+        if resume and resume['resume_sha256'] and get_blob_store().exists(resume['resume_sha256']):
+            conn.close()
+            return _send_blob(resume['resume_sha256'], download_name, as_attachment=True)
+        
+        # 旧数据的简历仍在 resume_content 列中
         cursor.execute('SELECT resume_content FROM candidates WHERE id=?', (id,))
         resume = cursor.fetchone()
         conn.close()
-        
         if resume and resume['resume_content']:
-            content = resume['resume_content']
-            # 如果是 memoryview (Postgres)，转换为 bytes
-            if isinstance(content, memoryview):
-                content = bytes(content)
-                
-            return send_file(io.BytesIO(content), download_name=f'resume_{id}.pdf', as_attachment=True)
+            return _send_bytes(resume['resume_content'], download_name, as_attachment=True)
         return jsonify({'error': '简历不存在'}), 404
     except Exception as e:
         logger.error(f"Error downloading resume: {e}")
@@ -184,17 +250,17 @@ def delete_candidate(id):
 @admin_bp.route('/interviews', methods=['GET'])
 @token_required
 def get_interviews():
-    """获取所有面试记录"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, candidate_id, interviewer, start_time, status, is_passed, token FROM interviews')
-        interviews = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return jsonify(interviews)
-    except Exception as e:
-        logger.error(f"Error fetching interviews: {e}")
-        return jsonify({'error': str(e)}), 500
+    """
+    获取面试记录列表（分页）
+    
+    Query Params:
+        status: 状态过滤，可逗号分隔多个，如 3,4
+        candidate_id, position_id, is_passed: 过滤
+        start_from, start_to: 面试时间范围（Unix 时间戳或 ISO 日期）
+        sort: id / start_time / status，前缀 '-' 表示倒序
+        limit, cursor, fields: 见 app/utils/pagination.py
+    """
+    return _list_response(INTERVIEW_LIST, 'interviews')
 
 @admin_bp.route('/interviews', methods=['POST'])
 @token_required
@@ -211,6 +277,7 @@ def create_interview():
         ''', (data['candidate_id'], data['interviewer'], data['start_time'], data['status'], data['is_passed'], data['token'] ))
         conn.commit()
         conn.close()
+        _notify_workers(data['status'])
         return jsonify({'status': 'success'})
     except Exception as e:
         logger.error(f"Error creating interview: {e}")
@@ -233,11 +300,18 @@ def update_interview(id):
         ''', (data['candidate_id'], data['interviewer'], data['start_time'], data['status'], data['is_passed'], new_token, id))
         conn.commit()
         conn.close()
+        _notify_workers(data['status'])
         return jsonify({'status': 'success'})
     except Exception as e:
         logger.error(f"Error updating interview: {e}")
         return jsonify({'error': str(e)}), 500
 
+def _notify_workers(status):
+    """面试进入待生成题目 (0) 或待生成报告 (3) 状态时立即唤醒对应的后台工作进程"""
+    for kind in (QUESTION_JOBS, REPORT_JOBS):
+        if str(status) == str(kind.pending_status):
+            notify_jobs(kind)
+
 @admin_bp.route('/interviews/<int:id>', methods=['DELETE'])
 @token_required
 def delete_interview(id):
@@ -276,37 +350,20 @@ def _download_interview_report_logic(interview_id):
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # 尝试获取报告路径和内容
+        # 只读取报告路径和 SHA-256，报告内容只在文件存储中也没有时（旧数据）再从数据库读取
         # 兼容旧表结构（如果没有 report_path 字段）
         try:
-            cursor.execute('''SELECT id, candidate_id, report_content, report_path FROM interviews WHERE id = ? ''', (interview_id, ))
+            cursor.execute('''SELECT id, candidate_id, report_path, report_sha256 FROM interviews WHERE id = ? ''', (interview_id, ))
         except Exception:
             conn.rollback() # Postgres 需要回滚事务
-            cursor.execute('''SELECT id, candidate_id, report_content FROM interviews WHERE id = ? ''', (interview_id, ))
+            cursor.execute('''SELECT id, candidate_id FROM interviews WHERE id = ? ''', (interview_id, ))
             
         interview = cursor.fetchone()
         
-        conn.close()
-        
         if not interview:
+            conn.close()
             return jsonify({"error": "面试不存在"}), 404
         
-        file_stream = None
-        file_path = None
-        
-        # 1. 优先尝试从文件系统读取 (如果 report_path 存在且文件存在)
-        if 'report_path' in interview.keys() and interview['report_path'] and os.path.exists(interview['report_path']):
-            file_path = interview['report_path']
-        
-        # 2. 如果文件不存在，尝试从 BLOB 读取
-        elif interview['report_content']:
-            content = interview['report_content']
-            if isinstance(content, memoryview):
-                content = bytes(content)
-            file_stream = io.BytesIO(content)
-        else:
-            return jsonify({"error": "面试报告尚未生成"}), 404
-            
         # 生成文件名
         file_name = f"interview_report_{interview['id']}.pdf"
         
@@ -315,20 +372,43 @@ def _download_interview_report_logic(interview_id):
         if request.args.get('preview') == 'true':
             as_attachment = False
         
-        if file_path:
-            return send_file(
-                file_path,
-                mimetype='application/pdf',
-                as_attachment=as_attachment,
-                download_name=file_name
-            )
-        else:
-            return send_file(
-                file_stream,
-                mimetype='application/pdf',
-                as_attachment=as_attachment,
-                download_name=file_name
-            )
+        report_path = interview['report_path'] if 'report_path' in interview.keys() else None
+        report_sha256 = interview['report_sha256'] if 'report_sha256' in interview.keys() else None
+        
+        # 1. 优先从文件系统流式发送 (如果 report_path 存在且文件存在)
+        if report_path and os.path.exists(report_path):
+            conn.close()
+            return send_stored_file(file_name, etag=report_sha256, path=report_path, as_attachment=as_attachment)
+        
+        # 2. 报告保存在文件存储中 (REPORT_STORAGE=blob)
+        if report_sha256 and get_blob_store().exists(report_sha256):
+            conn.close()
+            return _send_blob(report_sha256, file_name, as_attachment)
+        
+        # 3. 尝试从旧数据的 BLOB 列读取
+        cursor.execute('''SELECT report_content, start_time FROM interviews WHERE id = ? ''', (interview_id, ))
+        legacy = cursor.fetchone()
+        conn.close()
+        if not legacy['report_content']:
+            return jsonify({"error": "面试报告尚未生成"}), 404
+        # 旧数据的报告不会再被改写（新报告只写入文件），用面试时间作为 Last-Modified
+        return _send_bytes(legacy['report_content'], file_name, as_attachment, last_modified=legacy['start_time'])
     except Exception as e:
         logger.error(f"Error downloading report: {e}")
         return jsonify({'error': str(e)}), 500
+
+def _send_blob(key, download_name, as_attachment):
+    """从文件存储流式发送：本地存储直接发送文件，对象存储按块读取"""
+    store = get_blob_store()
+    path = store.local_path(key)
+    if path is not None:
+        return send_stored_file(download_name, etag=key, path=path, as_attachment=as_attachment)
+    return send_stored_file(download_name, etag=key, stream=store.open(key), size=store.size(key),
+                            last_modified=store.modified_at(key), as_attachment=as_attachment)
+
+def _send_bytes(content, download_name, as_attachment, last_modified=None):
+    """发送旧数据中保存在 BLOB 列里的内容（与文件存储中的内容一样支持 Range 和条件请求）"""
+    if isinstance(content, memoryview):
+        content = bytes(content)
+    return send_stored_file(download_name, etag=blob_key(content), stream=io.BytesIO(content), size=len(content),
+                            last_modified=last_modified, as_attachment=as_attachment)
@@ -94,12 +94,6 @@ def init_admin():
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        # 确保表存在（虽然 server 启动时会初始化，这里作为双重保险）
-        if current_app.config['DB_TYPE'] == 'postgres':
-             cursor.execute("CREATE TABLE IF NOT EXISTS admins (id SERIAL PRIMARY KEY, username TEXT UNIQUE, password_hash TEXT, created_at INTEGER)")
-        else:
-             cursor.execute("CREATE TABLE IF NOT EXISTS admins (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE, password_hash TEXT, created_at INTEGER)")
-             
         cursor.execute("INSERT INTO admins (username, password_hash, created_at) VALUES (?, ?, ?)", 
                        (username, hashed, int(time.time())))
         conn.commit()
@@ -6,7 +6,7 @@ Interview API Module
 - 获取面试信息
 - 获取面试问题
 - 提交回答（音频/文本）
-- 语音转文字处理
+- 语音转文字处理（异步转写任务及状态查询、分段流式转写）
 - 触发实时AI评估
 """
 
@@ -14,49 +14,22 @@ from flask import Blueprint, jsonify, request
 from app.core.database import get_db_connection
 from app.core.config import Config
 import time
-import os
-import tempfile
-import whisper
 import logging
-import torch
 from datetime import datetime
-import threading
-from app.services.report_service import evaluate_single_question
+from app.services.transcription_service import (
+    get_transcription_pool, transcribe_audio, get_transcription_status,
+    start_evaluation, complete_interview_if_finished,
+    has_speech, TranscriptionQueueFull, TRANSCRIPTION_FAILED_TEXT, NO_SPEECH_TEXT
+)
+from app.services.blob_store import blob_key, discard_unreferenced, get_blob_store, lock_blob
+from app.services.streaming_transcription import (
+    finish_in_background, get_session, pop_session, save_chunk, StreamSequenceError
+)
+from app.utils.audio import decode_audio, encode_wav
 
 logger = logging.getLogger(__name__)
 interview_bp = Blueprint('interview', __name__)
 
-# 全局变量缓存 Whisper 模型
-# Global variable to cache Whisper model
-whisper_model = None
-model_lock = threading.Lock()
-
-def get_whisper_model():
-    """
-    单例模式获取 Whisper 模型实例
-    Get Whisper model instance (Singleton)
-    
-    自动检测是否有可用的 GPU，如果有则加载到 CUDA，否则使用 CPU。
-    """
-    global whisper_model
-    if whisper_model is None:
-        with model_lock:
-            if whisper_model is None:
-                try:
-                    if torch.cuda.is_available():
-                        whisper_model = whisper.load_model(Config.WHISPER_MODEL_SIZE).to("cuda")
-                        logger.info(f"GPU Available. Loaded Whisper model '{Config.WHISPER_MODEL_SIZE}' on CUDA.")
-                    else:
-                        # 强制使用 CPU 并加载较小的模型以保证稳定性
-                        # Force CPU and ensure threads
-                        whisper_model = whisper.load_model("base", device="cpu")
-                        logger.info("GPU Unavailable. Loaded 'base' model on CPU.")
-                except Exception as e:
-                    logger.error(f"Failed to load Whisper model: {e}")
-                    # 回退到最小模型
-                    whisper_model = whisper.load_model("tiny")
-    return whisper_model
-
 @interview_bp.route('/<token>/info', methods=['GET'])
 def get_interview_info(token):
     """
@@ -174,7 +147,9 @@ def submit_answer(token):
     提交面试回答
     Submit Interview Answer
     
-    接收音频文件，使用 Whisper 进行语音转文字，并触发后台 AI 评分。
+    接收音频文件并写入数据库。异步模式下（Config.TRANSCRIBE_ASYNC）立即返回，
+    由转写进程池完成 Whisper 语音转文字并触发后台 AI 评分，前端可轮询
+    /<token>/transcription/<question_id> 查询进度；同步模式下在请求内完成转写。
     
     Form Data:
         question_id: 问题 ID
@@ -192,7 +167,7 @@ def submit_answer(token):
             conn.close()
             return jsonify({"error": "面试不存在"}), 404
         
-        question_id = request.form.get('question_id')
+        question_id = request.form.get('question_id', type=int)
         audio_answer = request.files.get('audio_answer')
         
         if not question_id or not audio_answer:
@@ -202,97 +177,266 @@ def submit_answer(token):
         # 读取音频数据
         audio_data = audio_answer.read()
         
-        # 处理数据库二进制存储兼容性
-        if Config.DB_TYPE == 'postgres':
-             audio_binary = audio_data # PG adapter handles bytes
-        else:
-             import sqlite3
-             audio_binary = sqlite3.Binary(audio_data)
-             
         # === 语音转文字 (Speech to Text) ===
-        # 将音频保存为临时文件以供 Whisper 处理
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            temp_file.write(audio_data)
-            temp_file_path = temp_file.name
+        audio_text = None
+        waveform = audio_data
+        if Config.VAD_ENABLED:
+            # 在请求内解码并做语音活动检测：全静音的回答不进入转写队列，
+            # 解码后的波形直接交给转写，避免重复解码
+            try:
+                waveform = decode_audio(audio_data)
+                if not has_speech(waveform):
+                    audio_text = NO_SPEECH_TEXT
+            except Exception as e:
+                logger.warning(f"VAD pre-check failed for question {question_id}: {e}")
+
+        if audio_text is None and not Config.TRANSCRIBE_ASYNC:
+            try:
+                audio_text = transcribe_audio(waveform)
+            except Exception as e:
+                logger.error(f"Whisper transcription failed: {e}")
+                audio_text = TRANSCRIPTION_FAILED_TEXT
 
-        audio_text = ""
+        pool = None
+        if audio_text is None:
+            # 先预留转写队列名额，队列已满时不写入文件存储和数据库，让前端稍后重试
+            pool = get_transcription_pool()
+            try:
+                pool.reserve()
+            except TranscriptionQueueFull as e:
+                conn.close()
+                logger.warning(f"Rejecting answer for question {question_id}: {e}")
+                return jsonify({"error": "语音识别繁忙，请稍后重试 (Transcription queue full)"}), 503, {'Retry-After': '5'}
+        
+        saved = False
         try:
-            model = get_whisper_model()
-            # 调用 Whisper 模型进行转录
-            result = model.transcribe(temp_file_path, language="zh")
-            audio_text = result["text"]
-        except Exception as e:
-            logger.error(f"Whisper transcription failed: {e}")
-            audio_text = "无法识别语音 (Speech recognition failed)"
+            # 更新数据库中的回答（异步模式下 answer_text 暂为空，由转写任务回写）
+            found, next_question = _save_answer(cursor, interview['id'], question_id, audio_data, audio_text)
+            if not found:
+                conn.close()
+                return jsonify({"error": "问题不存在 (Question not found)"}), 404
+            
+            # 先提交再交给转写进程池，转写结果回写时回答一定已经落库；提前关闭连接，避免长时间占用
+            _commit_answer(conn, audio_data)
+            conn.close()
+            saved = True
         finally:
-            # 清理临时文件
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
+            if pool is not None and not saved:
+                pool.release_reservation()
+        
+        if pool is not None:
+            # 进程在这之后退出时，回答仍带有转写租约，由转写巡检重新提交
+            pool.submit(question_id, waveform, reserved=True)
+        
+        if audio_text is None:
+            transcription = {"job_id": question_id, "status": "queued"}
+        else:
+            transcription = {"job_id": question_id, "status": "completed"}
+            # === 异步 AI 评估 (Async AI Evaluation) ===
+            start_evaluation(question_id)
+        
+        # 如果没有下一个问题，检查整体进度
+        # 异步模式下最后一个回答的转写完成后，由转写回调再检查一次
+        if not next_question:
+            complete_interview_if_finished(interview['id'])
+        
+        return jsonify(_answer_result(next_question, transcription))
+    except Exception as e:
+        logger.error(f"Error submitting answer: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def _save_answer(cursor, interview_id, question_id, audio_data, audio_text):
+    """
+    保存回答音频和文本，并查询下一个问题（不提交事务）
+    Persist an answer and look up the next question
 
-        answered_time = int(time.time())
+    录音写入文件存储，interview_questions 只保存其 SHA-256 (answer_audio_sha256)；
+    问题不存在时不写入文件存储。流式上传的分段和窗口 (stream_chunks / stream_windows) 在回答保存后删除。
+    调用方用 _commit_answer 提交事务。
+
+    Returns:
+        (bool, row): 问题是否存在，以及下一个问题（没有时为 None）
+    """
+    audio_sha256 = blob_key(audio_data)
+    
+    answered_time = int(time.time())
+    # 等待异步转写的回答记录转写租约，租约过期仍未转写完成时由转写巡检重新提交
+    lease_expires_at = answered_time + Config.TRANSCRIBE_LEASE_SECONDS if audio_text is None else None
+    cursor.execute('''
+        UPDATE interview_questions
+        SET answer_audio = NULL, answer_audio_sha256 = ?, answer_text = ?, answered_at = ?,
+            transcribe_lease_expires_at = ?, transcribe_attempts = ?
+        WHERE id = ? AND interview_id = ?
+    ''', (audio_sha256, audio_text, answered_time, lease_expires_at, 1 if audio_text is None else 0,
+          question_id, interview_id))
+    
+    if cursor.rowcount == 0:
+        return False, None
+    lock_blob(cursor, audio_sha256)
+    get_blob_store().put(audio_data)
+    cursor.execute('DELETE FROM stream_chunks WHERE question_id = ?', (question_id,))
+    cursor.execute('DELETE FROM stream_windows WHERE question_id = ?', (question_id,))
+    
+    # 检查是否还有下一个问题
+    cursor.execute('''
+        SELECT id, question as text
+        FROM interview_questions
+        WHERE interview_id = ? AND id > ?
+        ORDER BY id ASC
+        LIMIT 1
+    ''', (interview_id, question_id))
+    return True, cursor.fetchone()
+
+def _commit_answer(conn, audio_data):
+    """提交 _save_answer 的事务；提交失败时登记刚写入的录音，宽限期过后没有记录引用即被删除"""
+    try:
+        conn.commit()
+    except Exception:
+        try:
+            discard_unreferenced(blob_key(audio_data))
+        except Exception as e:
+            logger.warning(f"Failed to discard answer audio after a failed commit: {e}")
+        raise
+
+def _answer_result(next_question, transcription):
+    """构造提交回答接口的返回内容"""
+    return {
+        "status": "success",
+        "message": "答案已提交",
+        "next_question": dict(next_question) if next_question else {"id": 0, "text": "面试已完成"},
+        "transcription": transcription
+    }
+
+@interview_bp.route('/<token>/answer_stream/<int:question_id>/chunk', methods=['POST'])
+def upload_answer_chunk(token, question_id):
+    """
+    流式上传回答音频分段
+    Upload One Audio Chunk of a Streaming Answer
+    
+    每个分段需要能独立解码，前端上传 16kHz 单声道 16bit PCM WAV（也接受完整的音频文件；
+    MediaRecorder 的 webm 分片除第一片外不能单独解码）。服务端每攒够一个窗口
+    就开始转写，回答结束后调用 finish 接口即可很快拿到完整文本。
+    分段先写入数据库，同一个回答的请求可以由任意 Web 进程处理。
+    
+    Form Data:
+        seq: 分段序号，从 0 开始连续递增；重复上传的分段会被忽略
+        audio_chunk: 音频分段
+    """
+    try:
+        seq = request.form.get('seq', type=int)
+        audio_chunk = request.files.get('audio_chunk')
+        if seq is None or not audio_chunk:
+            return jsonify({"error": "缺少必要参数 (Missing parameters)"}), 400
         
-        # 更新数据库中的回答
+        conn = get_db_connection()
+        cursor = conn.cursor()
         cursor.execute('''
-            UPDATE interview_questions
-            SET answer_audio = ?, answer_text = ?, answered_at = ?
-            WHERE id = ? AND interview_id = ?
-        ''', (audio_binary, audio_text, answered_time, question_id, interview['id']))
+            SELECT iq.interview_id FROM interview_questions iq
+            JOIN interviews i ON iq.interview_id = i.id
+            WHERE i.token = ? AND iq.id = ?
+        ''', (token, question_id))
+        question = cursor.fetchone()
+        conn.close()
         
-        # 检查是否还有下一个问题
-        cursor.execute('''
-            SELECT id, question as text
-            FROM interview_questions
-            WHERE interview_id = ? AND id > ?
-            ORDER BY id ASC
-            LIMIT 1
-        ''', (interview['id'], question_id))
-        next_question = cursor.fetchone()
-        
-        # 提前提交并关闭连接，避免长时间占用
-        conn.commit()
-        conn.close() 
+        if not question:
+            return jsonify({"error": "问题不存在 (Question not found)"}), 404
         
-        # === 异步 AI 评估 (Async AI Evaluation) ===
-        # 启动后台线程对该问题的回答进行实时评分
         try:
-            threading.Thread(target=evaluate_single_question, args=(question_id,)).start()
-        except Exception as e:
-            logger.error(f"Failed to start evaluation thread: {e}")
+            next_seq = save_chunk(question_id, seq, audio_chunk.read())
+        except StreamSequenceError as e:
+            return jsonify({"error": "分段序号不连续 (Chunk out of order)", "expected_seq": e.expected}), 409
         
-        # 如果没有下一个问题，检查整体进度
-        if not next_question:
-            # 重新打开连接检查状态
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT COUNT(*) as total, SUM(CASE WHEN answered_at IS NOT NULL THEN 1 ELSE 0 END) as answered
-                FROM interview_questions
-                WHERE interview_id = ?
-            ''', (interview['id'],))
-            all_answered = cursor.fetchone()
-            
-            # 如果所有问题都已回答，将面试状态更新为"已完成" (3)
-            if all_answered['total'] == all_answered['answered']:
-                cursor.execute('UPDATE interviews SET status = 3 WHERE id = ?', (interview['id'],))
-                conn.commit()
+        # 在本进程中继续转写（其他进程收到的分段一并补齐）
+        get_session(question['interview_id'], question_id).catch_up()
+        return jsonify({"status": "success", "next_seq": next_seq})
+    except Exception as e:
+        logger.error(f"Error uploading answer chunk: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@interview_bp.route('/<token>/answer_stream/<int:question_id>/finish', methods=['POST'])
+def finish_answer_stream(token, question_id):
+    """
+    结束流式回答
+    Finish a Streaming Answer
+    
+    转写最后一个窗口并拼接全文，保存录音和文本后返回下一个问题，
+    返回格式与 submit_answer 相同。等待转写超时时回答按异步转写保存，返回 202，
+    transcription.status_url 为转写状态查询地址，剩余窗口完成后在后台回写文本。
+    """
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT id FROM interviews WHERE token = ?', (token,))
+        interview = cursor.fetchone()
+        if not interview:
             conn.close()
-            
-            result = {
-                "status": "success",
-                "message": "答案已提交",
-                "next_question": {"id": 0, "text": "面试已完成"}
-            }
-        else:
-            result = {
-                "status": "success",
-                "message": "答案已提交",
-                "next_question": dict(next_question)
-            }
+            return jsonify({"error": "面试不存在"}), 404
+        
+        session = get_session(interview['id'], question_id)
+        if session.catch_up() == 0:
+            pop_session(interview['id'], question_id)
+            conn.close()
+            return jsonify({"error": "没有进行中的流式回答 (No active stream)"}), 404
+        
+        try:
+            audio, audio_text = session.finish(timeout=Config.STREAM_FINISH_WAIT_SECONDS)
+        except TimeoutError as e:
+            # 分段都已收到：先保存录音（转写租约到期仍未回写文本时由转写巡检重新转写），不让客户端重传
+            logger.warning(f"Streaming answer for question {question_id} not ready: {e}")
+            audio, audio_text = session.recording_audio(), None
+        pop_session(interview['id'], question_id)
         
-        return jsonify(result)
+        recording = encode_wav(audio)
+        found, next_question = _save_answer(cursor, interview['id'], question_id, recording, audio_text)
+        if not found:
+            conn.close()
+            return jsonify({"error": "问题不存在 (Question not found)"}), 404
+        _commit_answer(conn, recording)
+        conn.close()
+        
+        if audio_text is None:
+            finish_in_background(session)
+            transcription = {"job_id": question_id, "status": "pending",
+                             "status_url": f"/api/interview/{token}/transcription/{question_id}"}
+            return jsonify(_answer_result(next_question, transcription)), 202
+        
+        start_evaluation(question_id)
+        if not next_question:
+            complete_interview_if_finished(interview['id'])
+        
+        return jsonify(_answer_result(next_question, {"job_id": question_id, "status": "completed"}))
     except Exception as e:
-        logger.error(f"Error submitting answer: {e}")
+        logger.error(f"Error finishing answer stream: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@interview_bp.route('/<token>/transcription/<int:question_id>', methods=['GET'])
+def get_answer_transcription(token, question_id):
+    """
+    查询回答的转写状态
+    Get Answer Transcription Status
+    
+    供前端在 submit_answer 之后轮询。
+    
+    Returns:
+        JSON: {"job_id", "status", "text"}，status 为
+              not_submitted / queued / running / pending / completed
+    """
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT id FROM interviews WHERE token = ?', (token,))
+        interview = cursor.fetchone()
+        conn.close()
+        
+        if not interview:
+            return jsonify({"error": "面试不存在"}), 404
+        
+        status = get_transcription_status(interview['id'], question_id)
+        if not status:
+            return jsonify({"error": "问题不存在 (Question not found)"}), 404
+        return jsonify(status)
+    except Exception as e:
+        logger.error(f"Error getting transcription status: {e}")
         return jsonify({'error': str(e)}), 500
 
 @interview_bp.route('/<token>/toggle_voice_reading', methods=['POST'])
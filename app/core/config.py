@@ -7,6 +7,7 @@ Configuration Module
 """
 
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # 加载 .env 文件中的环境变量
@@ -45,6 +46,24 @@ class Config:
     PG_USER = os.getenv("PG_USER")
     PG_PASSWORD = os.getenv("PG_PASSWORD")
     
+    # === 数据库连接池配置 (Connection Pool Configuration) ===
+    # 是否启用连接池 (关闭后每次 get_db_connection 都会新建连接)
+    DB_POOL_ENABLED = os.getenv("DB_POOL_ENABLED", "True").lower() == "true"
+    # 常驻连接数 (空闲时保留在池中的最大连接数)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    # 高峰期允许超出常驻连接数的临时连接数，归还时直接关闭
+    DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))
+    # 连接池耗尽时等待可用连接的秒数
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    # 空闲连接超过该秒数后丢弃重建，避免被数据库或防火墙静默断开
+    DB_POOL_IDLE_TIMEOUT = int(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))
+    # 取出连接时先执行 SELECT 1 做健康检查
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+    # PostgreSQL 适配层缓存的 SQL 翻译结果条数 (LRU)
+    SQL_TRANSLATION_CACHE_SIZE = int(os.getenv("SQL_TRANSLATION_CACHE_SIZE", "512"))
+    # 同一条 SQL 执行达到该次数后升级为服务端预编译语句 (PREPARE)，0 表示关闭
+    PG_PREPARE_THRESHOLD = int(os.getenv("PG_PREPARE_THRESHOLD", "0"))
+    
     # === AI模型配置 (AI Model Configuration) ===
     # OpenAI API Key (用于调用大模型)
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -52,8 +71,35 @@ class Config:
     OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
     # 使用的主要 LLM 模型名称
     LLM_MODEL = os.getenv("LLM_MODEL", "qwen-flash") 
-    # 备选模型列表 (Fallback models if primary fails)
-    # 包括: 'qwq-plus', 'qwen-vl-max', 'qwen-vl-max-latest', 'qvq-max', 'qvq-plus'
+    # 备选模型列表 (Fallback models if primary fails)，逗号分隔，按顺序尝试
+    # 可选: 'qwq-plus', 'qwen-vl-max', 'qwen-vl-max-latest', 'qvq-max', 'qvq-plus'
+    LLM_FALLBACK_MODELS = [m.strip() for m in os.getenv("LLM_FALLBACK_MODELS", "qwq-plus,qvq-plus,qvq-max").split(",") if m.strip()]
+    # 单次 LLM 请求超时（秒），避免服务商无响应时长期占用工作线程
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    # 超时、连接错误、429、5xx 时对同一模型的重试次数，以及指数退避的基础/最大等待秒数（带随机抖动）
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "1"))
+    LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "20"))
+    # 熔断：某个模型连续失败该次数后，在 LLM_CIRCUIT_RESET_SECONDS 秒内直接跳过该模型
+    LLM_CIRCUIT_FAILURES = int(os.getenv("LLM_CIRCUIT_FAILURES", "5"))
+    LLM_CIRCUIT_RESET_SECONDS = int(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "60"))
+    # 进程内共享的 HTTP 连接池大小
+    LLM_HTTP_POOL_SIZE = int(os.getenv("LLM_HTTP_POOL_SIZE", "16"))
+    # 批量生成面试问题时同时进行的 LLM 请求数上限
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    # 每个服务商每分钟最多发送的 LLM 请求数，0 表示不限流；BURST 为允许的瞬时突发请求数
+    LLM_RATE_LIMIT_RPM = int(os.getenv("LLM_RATE_LIMIT_RPM", "60"))
+    LLM_RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", "5"))
+    # 大模型响应缓存（llm_cache 表）：相同的模型 + 消息 + 返回格式直接复用之前的回复
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "True").lower() == "true"
+    # 缓存有效期（秒），默认 7 天
+    LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    # 缓存总大小上限（字节），超过后淘汰最久未使用的条目
+    LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    # 每个进程每写入多少条缓存检查一次过期和总大小
+    LLM_CACHE_EVICT_EVERY = int(os.getenv("LLM_CACHE_EVICT_EVERY", "100"))
+    # 仅用于本地开发：大模型不可用时用固定的示例问题代替（生产环境保持关闭，失败的任务会被释放并重试）
+    LLM_MOCK_QUESTIONS = os.getenv("LLM_MOCK_QUESTIONS", "False").lower() == "true"
     
     # === Flask Web框架配置 (Flask Configuration) ===
     # 密钥，用于 Session 和 Token 加密
@@ -69,4 +115,120 @@ class Config:
     # === 语音识别配置 (Whisper Configuration) ===
     # Whisper 模型大小: tiny, base, small, medium, large-v3
     # 生产环境建议使用 small 或 medium，开发环境使用 tiny 以节省资源
-    WHISPER_MODEL_SIZE = "tiny" 
+    WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "tiny")
+    # 语音识别后端: whisper (GPU fp16 / CPU float32), whisper-int8 (CPU 动态 int8 量化)
+    ASR_BACKEND = os.getenv("ASR_BACKEND", "whisper")
+    # CPU 推理时 torch 使用的线程数，0 表示使用 torch 默认值；多个转写进程时建议设为 核数 / TRANSCRIBE_WORKERS
+    ASR_CPU_THREADS = int(os.getenv("ASR_CPU_THREADS", "0"))
+    # 服务启动时在后台加载并预热语音识别模型，预热完成前 /health 返回 503
+    ASR_WARMUP = os.getenv("ASR_WARMUP", "True").lower() == "true"
+    # 是否在独立的工作进程中异步转写 (False 时在请求线程内同步转写)
+    TRANSCRIBE_ASYNC = os.getenv("TRANSCRIBE_ASYNC", "True").lower() == "true"
+    # 转写工作进程数，每个进程各自加载一份 Whisper 模型
+    TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "2"))
+    # 排队 + 正在转写的任务上限，超过后 submit_answer 返回 503
+    TRANSCRIBE_QUEUE_SIZE = int(os.getenv("TRANSCRIBE_QUEUE_SIZE", "32"))
+    # 转写任务租约秒数：提交后超过该时间仍没有转写结果（进程重启、工作进程崩溃）的回答会被重新提交
+    TRANSCRIBE_LEASE_SECONDS = int(os.getenv("TRANSCRIBE_LEASE_SECONDS", "600"))
+    # 每个回答最多转写次数，超过后记为识别失败，面试继续进入报告流程
+    TRANSCRIBE_MAX_ATTEMPTS = int(os.getenv("TRANSCRIBE_MAX_ATTEMPTS", "3"))
+    # 遗留转写任务的巡检间隔（秒），服务启动时先巡检一次
+    TRANSCRIBE_SWEEP_SECONDS = int(os.getenv("TRANSCRIBE_SWEEP_SECONDS", "60"))
+    # 微批处理：工作进程收到任务后再等待该毫秒数收集同时到达的回答，合并为一次编码器前向计算 (0 表示关闭)
+    ASR_BATCH_WINDOW_MS = int(os.getenv("ASR_BATCH_WINDOW_MS", "100"))
+    # 单个批次最多包含的 30 秒音频窗口数
+    ASR_MAX_BATCH_SIZE = int(os.getenv("ASR_MAX_BATCH_SIZE", "8"))
+    # 转写前使用语音活动检测 (VAD) 去掉首尾静音、按长停顿切分，全静音的回答不调用模型
+    VAD_ENABLED = os.getenv("VAD_ENABLED", "True").lower() == "true"
+    # 语音活动检测能量阈值 (dBFS)，低于该值的帧视为静音
+    VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "-40"))
+    # 超过该秒数的停顿视为长停顿，停顿部分不送入模型
+    VAD_MIN_SILENCE_SECONDS = float(os.getenv("VAD_MIN_SILENCE_SECONDS", "1.0"))
+    # 每个语音片段前后保留的静音秒数，避免切掉字头字尾
+    VAD_PADDING_SECONDS = float(os.getenv("VAD_PADDING_SECONDS", "0.2"))
+    # 流式转写：每个窗口的最大时长，以及优先在静音处切分的最早位置（秒）
+    STREAM_WINDOW_SECONDS = int(os.getenv("STREAM_WINDOW_SECONDS", "30"))
+    STREAM_MIN_WINDOW_SECONDS = int(os.getenv("STREAM_MIN_WINDOW_SECONDS", "20"))
+    # 找不到静音只能硬切时，相邻窗口重叠的秒数
+    STREAM_OVERLAP_SECONDS = float(os.getenv("STREAM_OVERLAP_SECONDS", "1.0"))
+    # 流式会话空闲超过该秒数后被丢弃
+    STREAM_SESSION_TTL = int(os.getenv("STREAM_SESSION_TTL", "900"))
+    # 结束流式回答时最多等待剩余窗口转写的秒数，超时则先保存回答并返回 202，文本在后台回写
+    STREAM_FINISH_WAIT_SECONDS = float(os.getenv("STREAM_FINISH_WAIT_SECONDS", "60"))
+    
+    # === 后台任务配置 (Background Job Configuration) ===
+    # 问题生成 / 报告生成任务的租约秒数：领取任务的进程在租约内未完成（如进程崩溃），其他进程可重新领取
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "900"))
+    # 单个任务最多尝试次数，超过后不再自动领取，需人工处理
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    # 任务失败后的重试间隔（秒），第 n 次失败后等待 n 倍间隔
+    JOB_RETRY_DELAY_SECONDS = int(os.getenv("JOB_RETRY_DELAY_SECONDS", "60"))
+    # 工作进程在没有收到通知时的兜底轮询间隔（秒）
+    JOB_POLL_INTERVAL_SECONDS = int(os.getenv("JOB_POLL_INTERVAL_SECONDS", "300"))
+    # SQLite 模式下用于唤醒工作进程的 Unix 套接字目录（PostgreSQL 使用 LISTEN/NOTIFY）
+    JOB_NOTIFY_DIR = os.getenv("JOB_NOTIFY_DIR", os.path.join(tempfile.gettempdir(), "interview-system-jobs"))
+    
+    # === 实时评分队列配置 (Answer Evaluation Queue Configuration) ===
+    # Web 进程内处理回答评分的工作线程数（同时也是并发调用模型的上限）
+    EVAL_WORKERS = int(os.getenv("EVAL_WORKERS", "4"))
+    # 单个评分任务最多尝试次数，超过后进入死信状态 (dead)
+    EVAL_MAX_ATTEMPTS = int(os.getenv("EVAL_MAX_ATTEMPTS", "5"))
+    # 评分失败后的重试间隔（秒），第 n 次失败后等待 2^(n-1) 倍间隔，不超过最大间隔
+    EVAL_RETRY_BASE_SECONDS = int(os.getenv("EVAL_RETRY_BASE_SECONDS", "10"))
+    EVAL_RETRY_MAX_SECONDS = int(os.getenv("EVAL_RETRY_MAX_SECONDS", "600"))
+    # 评分任务租约秒数：进程崩溃后，租约过期的任务会被重新领取
+    EVAL_LEASE_SECONDS = int(os.getenv("EVAL_LEASE_SECONDS", "300"))
+    # 没有新任务通知时的轮询间隔（秒），用于拾取到期的重试任务
+    EVAL_POLL_SECONDS = int(os.getenv("EVAL_POLL_SECONDS", "5"))
+    # 巡检间隔（秒）：把已转写但没有评分的回答重新入队
+    EVAL_SWEEP_INTERVAL_SECONDS = int(os.getenv("EVAL_SWEEP_INTERVAL_SECONDS", "300"))
+    # 评分模式: "single" 每个回答一次模型请求；"batch" 同一面试的多个回答合并为一次请求
+    EVAL_MODE = os.getenv("EVAL_MODE", "single")
+    # 批量模式下每次请求最多包含的回答数
+    EVAL_BATCH_SIZE = int(os.getenv("EVAL_BATCH_SIZE", "10"))
+    # 批量模式下回答入队后等待的秒数，以便与同一面试的后续回答合并（面试完成时立即评分）
+    EVAL_BATCH_DELAY_SECONDS = int(os.getenv("EVAL_BATCH_DELAY_SECONDS", "120"))
+    
+    # === 简历解析配置 (Resume Extraction Configuration) ===
+    # 上传简历后在后台解析 PDF 文本的线程数，解析结果按内容 SHA-256 缓存在 resume_texts 表
+    RESUME_EXTRACT_WORKERS = int(os.getenv("RESUME_EXTRACT_WORKERS", "2"))
+    # 简历页数达到该值时按页并行提取文本（进程池），小文件在当前线程中提取
+    RESUME_PARALLEL_MIN_PAGES = int(os.getenv("RESUME_PARALLEL_MIN_PAGES", "8"))
+    # 并行提取的进程数，0 表示 min(4, CPU 核数)
+    RESUME_EXTRACT_PROCESSES = int(os.getenv("RESUME_EXTRACT_PROCESSES", "0"))
+    # 最多提取的页数，以及写入出题 Prompt 的简历文本 token 预算（按估计值截断），0 表示不限制
+    RESUME_MAX_PAGES = int(os.getenv("RESUME_MAX_PAGES", "30"))
+    RESUME_MAX_TOKENS = int(os.getenv("RESUME_MAX_TOKENS", "6000"))
+    
+    # === 报告存储配置 (Report Storage Configuration) ===
+    # PDF 报告的存储目录 (reports/YYYY-MM-DD/...)
+    REPORT_DIR = os.getenv("REPORT_DIR", os.path.join(PROJECT_ROOT, 'reports'))
+    # 报告存储方式，interviews 表只记录路径、大小和 SHA-256，不保存 PDF 本身:
+    # 'disk' 写入 REPORT_DIR；'blob' 写入文件存储 (BLOB_STORE)，适合没有共享磁盘的多机部署
+    REPORT_STORAGE = os.getenv("REPORT_STORAGE", "disk")
+    
+    # === 文件存储配置 (Blob Storage Configuration) ===
+    # 回答录音、简历和报告的存储后端: 'local' (本地目录), 's3' (S3 兼容对象存储，需要 boto3),
+    # 's3-local' (S3 接口 + 本地目录模拟，开发测试用)
+    BLOB_STORE = os.getenv("BLOB_STORE", "local")
+    # local / s3-local 后端的存储目录
+    BLOB_DIR = os.getenv("BLOB_DIR", os.path.join(PROJECT_ROOT, 'data', 'blobs'))
+    # S3 存储桶、对象名前缀，以及 MinIO 等兼容服务的地址（AWS 凭证使用 boto3 的标准环境变量）
+    BLOB_S3_BUCKET = os.getenv("BLOB_S3_BUCKET")
+    BLOB_S3_PREFIX = os.getenv("BLOB_S3_PREFIX", "blobs/")
+    BLOB_S3_ENDPOINT_URL = os.getenv("BLOB_S3_ENDPOINT_URL")
+    # 提交失败后留下的未引用文件在登记 BLOB_DISCARD_GRACE_SECONDS 秒后才删除（秒），同时是清理线程的巡检间隔
+    BLOB_DISCARD_GRACE_SECONDS = int(os.getenv("BLOB_DISCARD_GRACE_SECONDS", "600"))
+    
+    # === 文件下载配置 (File Download Configuration) ===
+    # 报告和简历下载交给前端 Web 服务器发送: '' (由 Flask 流式发送), 'nginx' (X-Accel-Redirect),
+    # 'sendfile' (X-Sendfile，Apache / lighttpd)
+    DOWNLOAD_ACCEL = os.getenv("DOWNLOAD_ACCEL", "")
+    # X-Accel-Redirect 使用的内部路径，需与 nginx 配置中 internal location 的 alias 对应 REPORT_DIR / BLOB_DIR
+    DOWNLOAD_ACCEL_REPORTS_URI = os.getenv("DOWNLOAD_ACCEL_REPORTS_URI", "/_protected/reports/")
+    DOWNLOAD_ACCEL_BLOBS_URI = os.getenv("DOWNLOAD_ACCEL_BLOBS_URI", "/_protected/blobs/")
+    
+    # === 后台列表配置 (Admin List Configuration) ===
+    # 职位/候选人/面试列表接口每页的默认行数和最大行数（键集分页，见 app/utils/pagination.py）
+    ADMIN_PAGE_SIZE = int(os.getenv("ADMIN_PAGE_SIZE", "100"))
+    ADMIN_MAX_PAGE_SIZE = int(os.getenv("ADMIN_MAX_PAGE_SIZE", "1000"))
@@ -5,45 +5,267 @@ Database Management Module
 此模块负责处理数据库连接、SQL执行适配以及数据库初始化。
 它实现了一个适配层，使得 PostgreSQL 可以使用类似 SQLite 的 API（特别是占位符处理），
 从而实现代码的数据库无关性。
+
+get_db_connection() 返回的连接来自进程内的线程安全连接池，
+调用方仍然按原来的方式 conn.close()，连接会被归还到池中复用而不是真正关闭。
 """
 
 import sqlite3
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 import os
+import time
+import re
+import threading
+from collections import deque, namedtuple, Counter
+from functools import lru_cache
 from app.core.config import Config
+from app.core import migrations
 import logging
 
 logger = logging.getLogger('server')
 
+class PoolTimeoutError(Exception):
+    """连接池耗尽且在等待时间内没有可用连接"""
+    pass
+
+class ConnectionPool:
+    """
+    线程安全的数据库连接池
+    Thread-safe Database Connection Pool
+    
+    - size: 常驻连接数，归还时最多保留这么多空闲连接
+    - max_overflow: 高峰期允许额外创建的连接数
+    - idle_timeout: 空闲超过该秒数的连接在取出时被丢弃重建
+    - pre_ping: 取出连接时执行 SELECT 1 检查连接是否可用
+    """
+    def __init__(self, creator, size=5, max_overflow=10, timeout=30, idle_timeout=300, pre_ping=True):
+        self._creator = creator
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.pre_ping = pre_ping
+        self._idle = deque()
+        self._checked_out = 0
+        self._cond = threading.Condition()
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        # gunicorn 等 fork 模型下，子进程不能复用父进程的 socket，直接丢弃（不关闭）
+        if self._pid != os.getpid():
+            self._idle.clear()
+            self._checked_out = 0
+            self._pid = os.getpid()
+
+    def _is_usable(self, conn):
+        if _is_closed(conn):
+            return False
+        if not self.pre_ping:
+            return True
+        try:
+            _ping(conn)
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding broken pooled connection: {e}")
+            return False
+
+    def acquire(self):
+        """
+        从池中取出一个连接，必要时新建
+        Check out a connection, creating one if the pool is not exhausted
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            conn = None
+            with self._cond:
+                self._check_fork()
+                while True:
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        self._checked_out += 1
+                        break
+                    if self._checked_out < self.size + self.max_overflow:
+                        self._checked_out += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"Connection pool exhausted (size={self.size}, overflow={self.max_overflow})")
+                    self._cond.wait(remaining)
+
+            if conn is not None:
+                if time.monotonic() - last_used > self.idle_timeout or not self._is_usable(conn):
+                    _close_quietly(conn)
+                    conn = None
+                else:
+                    return PooledConnection(self, conn)
+
+            try:
+                return PooledConnection(self, self._creator())
+            except Exception:
+                with self._cond:
+                    self._checked_out -= 1
+                    self._cond.notify()
+                raise
+
+    def release(self, conn, discard=False):
+        """
+        归还连接：回滚未提交的事务后放回池中，超出常驻数量的直接关闭
+        Return a connection to the pool
+        """
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            self._checked_out -= 1
+            keep = not discard and len(self._idle) < self.size
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if not keep:
+            _close_quietly(conn)
+
+    def dispose(self):
+        """关闭所有空闲连接 (Close all idle connections)"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _ in idle:
+            _close_quietly(conn)
+
+    def status(self):
+        with self._cond:
+            return {"idle": len(self._idle), "checked_out": self._checked_out,
+                    "size": self.size, "max_overflow": self.max_overflow}
+
+class PooledConnection:
+    """
+    连接池代理对象
+    Pooled Connection Proxy
+    
+    行为与底层连接（PGConnectionAdapter 或 sqlite3.Connection）一致，
+    只是 close() 会把连接归还到池中。
+    """
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            raise RuntimeError("Connection has already been returned to the pool")
+        return getattr(conn, name)
+
+    def close(self):
+        conn = self.__dict__.get('_conn')
+        if conn is not None:
+            self._conn = None
+            self._pool.release(conn)
+
+    def __del__(self):
+        # 调用方忘记 close() 时（例如异常分支），避免连接泄漏
+        try:
+            self.close()
+        except Exception:
+            pass
+
+def _is_closed(conn):
+    if isinstance(conn, PGConnectionAdapter):
+        return conn.conn.closed != 0
+    return False
+
+def _ping(conn):
+    cursor = conn.cursor()
+    cursor.execute('SELECT 1')
+    cursor.fetchone()
+    conn.rollback()
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+def _create_connection():
+    """
+    新建一个原始数据库连接（不经过连接池）
+    Open a new, unpooled database connection
+    """
+    if Config.DB_TYPE == 'postgres':
+        conn = psycopg2.connect(
+            host=Config.PG_HOST,
+            port=Config.PG_PORT,
+            user=Config.PG_USER,
+            password=Config.PG_PASSWORD,
+            dbname=Config.PG_DB,
+            cursor_factory=RealDictCursor
+        )
+        return PGConnectionAdapter(conn)
+    else:
+        # 连接会在线程之间复用（同一时刻只被一个线程持有），因此关闭同线程检查
+        conn = sqlite3.connect(Config.DB_PATH, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        try:
+            # 启用 Write-Ahead Logging 模式以提高并发性能
+            conn.execute('PRAGMA journal_mode=WAL;')
+        except:
+            pass
+        return conn
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """
+    单例模式获取连接池
+    Get the process-wide connection pool (Singleton)
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _create_connection,
+                    size=Config.DB_POOL_SIZE,
+                    max_overflow=Config.DB_POOL_MAX_OVERFLOW,
+                    timeout=Config.DB_POOL_TIMEOUT,
+                    idle_timeout=Config.DB_POOL_IDLE_TIMEOUT,
+                    pre_ping=Config.DB_POOL_PRE_PING
+                )
+    return _pool
+
+def close_pool():
+    """关闭并重置连接池 (Dispose the pool, e.g. after changing Config in tests)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.dispose()
+            _pool = None
+
 class DBConnection:
     """
     数据库连接上下文管理器 (Context Manager)
     用于 with 语句中自动管理连接的获取和释放
+    
+    与 get_db_connection() 一样从连接池取连接，退出时归还。
     """
     def __init__(self):
         self.db_type = Config.DB_TYPE
         self.conn = None
         
     def __enter__(self):
-        if self.db_type == 'postgres':
-            try:
-                self.conn = psycopg2.connect(
-                    host=Config.PG_HOST,
-                    port=Config.PG_PORT,
-                    user=Config.PG_USER,
-                    password=Config.PG_PASSWORD,
-                    dbname=Config.PG_DB
-                )
-                return self.conn
-            except Exception as e:
-                logger.error(f"PostgreSQL Connection Error: {e}")
-                raise e
-        else:
-            # SQLite (Fallback)
-            self.conn = sqlite3.connect(Config.DB_PATH)
-            self.conn.row_factory = sqlite3.Row
+        try:
+            self.conn = get_db_connection()
             return self.conn
+        except Exception as e:
+            logger.error(f"Database Connection Error: {e}")
+            raise e
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.conn:
@@ -56,29 +278,82 @@ def get_db_connection():
     
     返回一个数据库连接对象。如果是 PostgreSQL，返回一个适配器对象；
     如果是 SQLite，返回原生的 Connection 对象。
+    启用连接池时返回的是池代理对象，close() 会把连接归还到池中。
     
     Returns:
         Connection object or Adapter object
     """
-    if Config.DB_TYPE == 'postgres':
-        conn = psycopg2.connect(
-            host=Config.PG_HOST,
-            port=Config.PG_PORT,
-            user=Config.PG_USER,
-            password=Config.PG_PASSWORD,
-            dbname=Config.PG_DB,
-            cursor_factory=RealDictCursor
-        )
-        return PGConnectionAdapter(conn)
-    else:
-        conn = sqlite3.connect(Config.DB_PATH)
-        conn.row_factory = sqlite3.Row
-        try:
-            # 启用 Write-Ahead Logging 模式以提高并发性能
-            conn.execute('PRAGMA journal_mode=WAL;')
-        except:
-            pass
-        return conn
+    if not Config.DB_POOL_ENABLED:
+        return _create_connection()
+    return get_pool().acquire()
+
+def get_dedicated_connection():
+    """
+    获取一个不经过连接池的专用连接
+    Open a dedicated connection that is never returned to the pool
+
+    用于长期占用连接的场景（如 PostgreSQL LISTEN），调用方负责关闭。
+    PostgreSQL 返回 PGConnectionAdapter，原生连接为其 .conn 属性。
+    """
+    return _create_connection()
+
+# 单条 INSERT 语句允许的最大参数个数（旧版本 SQLite 的 SQLITE_MAX_VARIABLE_NUMBER 为 999）
+SQLITE_MAX_VARIABLES = 999
+# PostgreSQL 批量插入时每条 INSERT 包含的行数
+PG_INSERT_PAGE_SIZE = 1000
+
+def insert_many(conn, table, columns, rows, returning='id'):
+    """
+    批量插入多行，并按行的顺序返回新行的主键
+    Insert many rows in as few round trips as possible and return their ids
+
+    - PostgreSQL: psycopg2 execute_values 生成多行 VALUES ... RETURNING，每 PG_INSERT_PAGE_SIZE 行一次往返
+    - SQLite: 多行 VALUES ... RETURNING（SQLite >= 3.35），否则退回逐行执行并读取 lastrowid
+
+    插入在调用方的事务中执行，由调用方 commit。table / columns 直接拼入 SQL，只能传入代码中的常量。
+
+    Args:
+        conn: get_db_connection() 返回的连接（或 PGConnectionAdapter）
+        table: 表名
+        columns: 列名列表
+        rows: 每行一个与 columns 对应的元组
+        returning: 要返回的自增主键列，为 None 时不返回
+
+    Returns:
+        list: 新行的主键（returning 为 None 时为空列表）
+    """
+    rows = [tuple(row) for row in rows]
+    if not rows:
+        return []
+    if hasattr(conn, 'insert_many'):
+        return conn.insert_many(table, columns, rows, returning)
+    return _sqlite_insert_many(conn, table, columns, rows, returning)
+
+def _sqlite_insert_many(conn, table, columns, rows, returning):
+    column_list = ', '.join(columns)
+    cursor = conn.cursor()
+    if returning is None:
+        cursor.executemany(f"INSERT INTO {table} ({column_list}) VALUES ({', '.join('?' * len(columns))})", rows)
+        return []
+
+    if sqlite3.sqlite_version_info < (3, 35, 0):
+        ids = []
+        for row in rows:
+            cursor.execute(f"INSERT INTO {table} ({column_list}) VALUES ({', '.join('?' * len(columns))})", row)
+            ids.append(cursor.lastrowid)
+        return ids
+
+    ids = []
+    chunk = max(1, SQLITE_MAX_VARIABLES // len(columns))
+    placeholder = f"({', '.join('?' * len(columns))})"
+    for start in range(0, len(rows), chunk):
+        batch = rows[start:start + chunk]
+        cursor.execute(
+            f"INSERT INTO {table} ({column_list}) VALUES {', '.join([placeholder] * len(batch))} RETURNING {returning}",
+            [value for row in batch for value in row])
+        # SQLite 不保证 RETURNING 的行顺序；自增主键在同一条语句内按插入顺序递增，排序即为行顺序
+        ids.extend(sorted(row[0] for row in cursor.fetchall()))
+    return ids
 
 class PGConnectionAdapter:
     """
@@ -89,36 +364,132 @@ class PGConnectionAdapter:
     """
     def __init__(self, pg_conn):
         self.conn = pg_conn
+        # 已在本连接上 PREPARE 过的语句: 原始 SQL -> 语句名
+        self.prepared = {}
+        # PREPARE 失败（例如参数类型无法推断）的语句，不再尝试
+        self.unpreparable = set()
         
     def cursor(self):
-        return PGCursorAdapter(self.conn.cursor())
+        return PGCursorAdapter(self.conn.cursor(), self)
         
     def execute(self, sql, params=None):
         cursor = self.cursor()
         cursor.execute(sql, params)
         return cursor
 
+    def insert_many(self, table, columns, rows, returning='id'):
+        """
+        批量插入（见模块函数 insert_many），使用 psycopg2 execute_values
+        Bulk insert via execute_values; returns the new ids in row order
+        """
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s"
+        cursor = self.conn.cursor()
+        try:
+            if returning is None:
+                execute_values(cursor, sql, rows, page_size=PG_INSERT_PAGE_SIZE)
+                return []
+            # fetch=True 时 execute_values 按 rows 的顺序返回各页 RETURNING 的结果
+            result = execute_values(cursor, f"{sql} RETURNING {returning}", rows,
+                                    page_size=PG_INSERT_PAGE_SIZE, fetch=True)
+            return [row[returning] if isinstance(row, dict) else row[0] for row in result]
+        finally:
+            cursor.close()
+
     def commit(self):
         self.conn.commit()
         
+    def rollback(self):
+        self.conn.rollback()
+        
     def close(self):
         self.conn.close()
 
+# SQL 中需要特殊处理的片段：字符串字面量、带引号的标识符、注释、$tag$ 字符串以及占位符/百分号
+_SQL_TOKEN = re.compile(r"""
+      '(?:[^']|'')*'?
+    | "(?:[^"]|"")*"?
+    | --[^\n]*
+    | /\*.*?(?:\*/|\Z)
+    | \$\$.*?(?:\$\$|\Z)
+    | \$(?P<tag>[A-Za-z_][A-Za-z0-9_]*)\$.*?(?:\$(?P=tag)\$|\Z)
+    | %s | %% | % | \?
+""", re.S | re.X)
+
+TranslatedSQL = namedtuple('TranslatedSQL', ['pyformat', 'numeric', 'param_count'])
+
+@lru_cache(maxsize=Config.SQL_TRANSLATION_CACHE_SIZE)
+def translate_placeholders(sql):
+    """
+    将 SQLite 风格的 SQL 翻译为 PostgreSQL 可执行的形式（结果按原始 SQL 文本缓存）
+    Translate SQLite-style SQL for PostgreSQL (memoized by the original SQL text)
+    
+    对 SQL 做一次词法扫描，跳过字符串字面量、带引号的标识符、注释和 $tag$ 字符串：
+    - 语句中的 ? 转换为 %s；已经写成 %s 的占位符保持不变
+    - psycopg2 会把所有 % 当作格式符，因此字面量中的 % 以及取模运算符转义为 %%
+    - 同时生成 $1, $2 ... 形式，供 PREPARE 服务端预编译语句使用
+    - 只用于位置参数 (? / %s)；使用 dict 参数 (%(name)s) 的语句由 PGCursorAdapter 原样执行
+    
+    Returns:
+        TranslatedSQL(pyformat, numeric, param_count)
+    """
+    pyformat = []
+    numeric = []
+    count = 0
+    pos = 0
+    for match in _SQL_TOKEN.finditer(sql):
+        start = match.start()
+        if start > pos:
+            pyformat.append(sql[pos:start])
+            numeric.append(sql[pos:start])
+        token = match.group(0)
+        pos = match.end()
+        
+        if token == '?' or token == '%s':
+            count += 1
+            pyformat.append('%s')
+            numeric.append(f'${count}')
+        elif token == '%%' or token == '%':
+            pyformat.append('%%')
+            numeric.append('%')
+        else:
+            pyformat.append(token.replace('%', '%%'))
+            numeric.append(token)
+    pyformat.append(sql[pos:])
+    numeric.append(sql[pos:])
+    
+    return TranslatedSQL(''.join(pyformat), ''.join(numeric), count)
+
+# 同一条 SQL 被执行的次数，达到 PG_PREPARE_THRESHOLD 后升级为服务端预编译语句
+_statement_usage = Counter()
+# 每个连接最多保留的预编译语句数量
+MAX_PREPARED_PER_CONNECTION = 256
+
 class PGCursorAdapter:
     """
     PostgreSQL 游标适配器
     PostgreSQL Cursor Adapter
     
     核心功能是将 SQLite 风格的 SQL（使用 ? 占位符）转换为 
-    PostgreSQL 风格（使用 %s 占位符）。
+    PostgreSQL 风格（使用 %s 占位符），翻译结果由 translate_placeholders 缓存。
     """
-    def __init__(self, pg_cursor):
+    def __init__(self, pg_cursor, connection=None):
         self.cursor = pg_cursor
+        self.connection = connection
         
     def execute(self, sql, params=None):
-        # 将 SQLite 的 ? 占位符转换为 PG 的 %s
-        # Convert SQLite '?' placeholder to PostgreSQL '%s'
-        pg_sql = sql.replace('?', '%s')
+        # 没有参数时 psycopg2 不做 % 替换，原样执行；
+        # dict 参数说明调用方使用 psycopg2 原生的 %(name)s 占位符，SQL 中的 % 已按 psycopg2 规则书写
+        if params is None or isinstance(params, dict):
+            pg_sql = sql
+        else:
+            # Convert SQLite '?' placeholder to PostgreSQL '%s'
+            translated = translate_placeholders(sql)
+            pg_sql = translated.pyformat
+            if self._should_prepare(sql, params):
+                name = self._prepare(sql, translated)
+                if name:
+                    args = ', '.join(['%s'] * translated.param_count)
+                    pg_sql = f"EXECUTE {name} ({args})" if args else f"EXECUTE {name}"
         
         try:
             return self.cursor.execute(pg_sql, params)
@@ -127,6 +498,41 @@ class PGCursorAdapter:
             logging.error(f"SQL Execution Error: {e}, SQL: {pg_sql}, Params: {params}")
             raise e
             
+    def _should_prepare(self, sql, params):
+        threshold = Config.PG_PREPARE_THRESHOLD
+        conn = self.connection
+        if threshold <= 0 or conn is None or isinstance(params, dict):
+            return False
+        if sql in conn.prepared:
+            return True
+        if sql in conn.unpreparable or len(conn.prepared) >= MAX_PREPARED_PER_CONNECTION:
+            return False
+        if sql not in _statement_usage and len(_statement_usage) >= Config.SQL_TRANSLATION_CACHE_SIZE:
+            return False
+        _statement_usage[sql] += 1
+        # 只在没有进行中的事务时 PREPARE，失败后回滚不会影响调用方已执行的语句
+        return (_statement_usage[sql] >= threshold and
+                conn.conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+
+    def _prepare(self, sql, translated):
+        """
+        在当前连接上创建服务端预编译语句，返回语句名；失败时返回 None 并回退到普通执行
+        Create a server-side prepared statement on this connection
+        """
+        conn = self.connection
+        name = conn.prepared.get(sql)
+        if name is None:
+            name = f"stmt_{len(conn.prepared) + 1}"
+            try:
+                self.cursor.execute(f"PREPARE {name} AS {translated.numeric}")
+            except Exception as e:
+                logger.warning(f"PREPARE failed, falling back to unprepared execution: {e}")
+                conn.rollback()
+                conn.unpreparable.add(sql)
+                return None
+            conn.prepared[sql] = name
+        return name
+
     def fetchall(self):
         return self.cursor.fetchall()
         
@@ -152,21 +558,16 @@ def init_db():
     初始化数据库表结构
     Initialize Database Schema
     
-    连接数据库并执行初始化脚本（如果需要）。
-    对于 SQLite，通常需要在此处创建表；
-    对于 PostgreSQL，建议使用迁移工具（如 Alembic）或外部脚本。
+    执行 app/core/migrations.py 中未执行的版本化迁移（建表、加列、建索引），
+    SQLite 和 PostgreSQL 相同。每个进程入口在访问数据库前调用一次。
+
+    Returns:
+        int: 当前的 schema 版本
     """
     conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 检查表是否存在
-    if Config.DB_TYPE == 'postgres':
-        # PG 初始化逻辑通常在外部完成 (create_pg_tables)，这里只做检查
-        # 实际生产环境建议检查 schema 版本表
-        pass
-    else:
-        # SQLite 初始化逻辑 (保持不变，或在此处添加建表语句)
-        # TODO: 将建表语句移至此处或独立的 schema.sql 文件
-        pass
-    
-    conn.close()
+    try:
+        version = migrations.migrate(conn)
+    finally:
+        conn.close()
+    logger.info(f"Database schema at version {version}")
+    return version
@@ -0,0 +1,315 @@
+"""
+Schema Migrations
+数据库结构迁移
+
+所有表、列和索引都在这里按版本号顺序定义，SQLite 和 PostgreSQL 共用同一套迁移
+（建表语句中的 {pk} / {blob} 按数据库类型替换）。这是唯一的建表路径：由各进程入口
+（Web 服务 app/server.py、问题/报告生成脚本、scripts/upgrade_db.py 等）调用 init_db() 执行，
+业务代码中不再做运行时建表或结构检查。
+
+- schema_migrations 表记录已执行的版本，每个迁移在独立事务中执行并写入版本号
+- 迁移可以在旧数据库上重复执行：建表和建索引使用 IF NOT EXISTS，加列前先检查列是否存在，
+  因此由旧的 init_sqlite.py / migrate_to_postgres.py 创建的数据库会从版本 1 开始补齐
+- 多个进程同时启动时，PostgreSQL 使用 advisory lock、SQLite 使用 BEGIN IMMEDIATE 串行执行，
+  拿到锁后重新检查版本，同一迁移只会执行一次
+
+新增结构时在 MIGRATIONS 末尾追加新版本，不要修改已经发布的迁移。
+"""
+
+import time
+import logging
+from collections import namedtuple
+
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+# version: 版本号（递增）; name: 说明; steps: SQL 语句或 step(cursor, db_type) 函数
+Migration = namedtuple('Migration', ['version', 'name', 'steps'])
+
+# 各数据库类型的列类型
+DIALECTS = {
+    'sqlite': {'pk': 'INTEGER PRIMARY KEY AUTOINCREMENT', 'blob': 'BLOB'},
+    'postgres': {'pk': 'SERIAL PRIMARY KEY', 'blob': 'BYTEA'},
+}
+
+# PostgreSQL advisory lock 的键，保证同一时刻只有一个进程在执行迁移
+PG_LOCK_KEY = 7305001
+
+SCHEMA_TABLE = '''
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at INTEGER NOT NULL
+    )
+'''
+
+def table_columns(cursor, table, db_type):
+    """表中已有的列名"""
+    if db_type == 'postgres':
+        cursor.execute("SELECT column_name AS name FROM information_schema.columns "
+                       "WHERE table_schema = current_schema() AND table_name = ?", (table,))
+    else:
+        cursor.execute("SELECT name FROM pragma_table_info(?)", (table,))
+    return {row['name'] for row in cursor.fetchall()}
+
+def add_column(table, column, definition):
+    """加列（列已存在时跳过）"""
+    def step(cursor, db_type):
+        if column not in table_columns(cursor, table, db_type):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return step
+
+def dedupe_interview_tokens(cursor, db_type):
+    """
+    建唯一索引前处理重复的面试 token：保留 id 最小的面试，其余面试换成新 token 并记录日志
+    （旧数据中重复的 token 会让 CREATE UNIQUE INDEX 失败，且候选人的链接本来就会打开错误的面试）
+    """
+    from app.utils.helpers import generate_token
+
+    cursor.execute('''
+        SELECT id, token FROM interviews
+        WHERE token IN (SELECT token FROM interviews WHERE token IS NOT NULL GROUP BY token HAVING COUNT(*) > 1)
+        ORDER BY token, id
+    ''')
+    previous = None
+    for row in cursor.fetchall():
+        if row['token'] == previous:
+            new_token = generate_token()
+            cursor.execute("UPDATE interviews SET token = ? WHERE id = ?", (new_token, row['id']))
+            logger.warning(f"Interview {row['id']} shared token {row['token']!r} with an earlier interview; "
+                           f"assigned a new token, its interview link must be sent again")
+        previous = row['token']
+
+MIGRATIONS = [
+    Migration(1, 'base tables', [
+        '''
+        CREATE TABLE IF NOT EXISTS positions (
+            id {pk},
+            name TEXT NOT NULL,
+            requirements TEXT NOT NULL,
+            responsibilities TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            created_at INTEGER NOT NULL,
+            recruiter TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS candidates (
+            id {pk},
+            position_id INTEGER NOT NULL REFERENCES positions(id),
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            resume_content {blob}
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS interviews (
+            id {pk},
+            candidate_id INTEGER NOT NULL REFERENCES candidates(id),
+            interviewer TEXT NOT NULL,
+            start_time INTEGER NOT NULL,
+            status INTEGER NOT NULL DEFAULT 0,
+            is_passed INTEGER NOT NULL DEFAULT 0,
+            token TEXT,
+            report_content {blob},
+            question_count INTEGER DEFAULT 0,
+            voice_reading INTEGER DEFAULT 0
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS interview_questions (
+            id {pk},
+            interview_id INTEGER NOT NULL REFERENCES interviews(id),
+            question TEXT NOT NULL,
+            score_standard TEXT,
+            answer_audio {blob},
+            answer_text TEXT,
+            answered_at INTEGER,
+            score INTEGER,
+            comments TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS admins (
+            id {pk},
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            created_at INTEGER NOT NULL
+        )
+        ''',
+    ]),
+    Migration(2, 'job claims and answer evaluation', [
+        add_column('interviews', 'claimed_by', 'TEXT'),
+        add_column('interviews', 'lease_expires_at', 'INTEGER'),
+        add_column('interviews', 'attempts', 'INTEGER NOT NULL DEFAULT 0'),
+        add_column('interview_questions', 'ai_score', 'INTEGER'),
+        add_column('interview_questions', 'ai_evaluation', 'TEXT'),
+        '''
+        CREATE TABLE IF NOT EXISTS evaluation_jobs (
+            question_id INTEGER PRIMARY KEY,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_run_at INTEGER NOT NULL,
+            claimed_by TEXT,
+            lease_expires_at INTEGER,
+            last_error TEXT,
+            updated_at INTEGER NOT NULL
+        )
+        ''',
+    ]),
+    Migration(3, 'llm and resume text caches', [
+        '''
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            cache_key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            response TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at INTEGER NOT NULL,
+            last_used_at INTEGER NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS resume_texts (
+            content_sha256 TEXT PRIMARY KEY,
+            text TEXT NOT NULL,
+            created_at INTEGER NOT NULL
+        )
+        ''',
+        add_column('candidates', 'resume_sha256', 'TEXT'),
+    ]),
+    Migration(4, 'report files and blob references', [
+        add_column('interviews', 'report_path', 'TEXT'),
+        add_column('interviews', 'report_size', 'INTEGER'),
+        add_column('interviews', 'report_sha256', 'TEXT'),
+        add_column('interview_questions', 'answer_audio_sha256', 'TEXT'),
+    ]),
+    Migration(5, 'hot path indexes', [
+        # 候选人每个请求都按 token 查面试
+        dedupe_interview_tokens,
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_interviews_token ON interviews (token)',
+        # 按面试读取题目 (WHERE interview_id = ? ORDER BY id)
+        'CREATE INDEX IF NOT EXISTS idx_interview_questions_interview_id_id ON interview_questions (interview_id, id)',
+        # 问题生成 / 报告生成调度器领取任务，只索引待处理的面试，并包含领取条件用到的列
+        '''
+        CREATE INDEX IF NOT EXISTS idx_interviews_pending
+        ON interviews (status, id, claimed_by, lease_expires_at, attempts)
+        WHERE status = 0 OR status = 3
+        ''',
+        # 后台列表的过滤和排序 (app/api/admin.py)
+        'CREATE INDEX IF NOT EXISTS idx_positions_status_id ON positions (status, id)',
+        'CREATE INDEX IF NOT EXISTS idx_positions_created_at_id ON positions (created_at, id)',
+        'CREATE INDEX IF NOT EXISTS idx_candidates_position_id_id ON candidates (position_id, id)',
+        'CREATE INDEX IF NOT EXISTS idx_interviews_status_id ON interviews (status, id)',
+        'CREATE INDEX IF NOT EXISTS idx_interviews_start_time_id ON interviews (start_time, id)',
+        'CREATE INDEX IF NOT EXISTS idx_interviews_candidate_id_id ON interviews (candidate_id, id)',
+    ]),
+    Migration(6, 'durable transcription jobs', [
+        add_column('interview_questions', 'transcribe_lease_expires_at', 'INTEGER'),
+        add_column('interview_questions', 'transcribe_attempts', 'INTEGER NOT NULL DEFAULT 0'),
+        # 已提交但还没有转写结果的回答（转写巡检）
+        '''
+        CREATE INDEX IF NOT EXISTS idx_interview_questions_untranscribed
+        ON interview_questions (id) WHERE answered_at IS NOT NULL AND answer_text IS NULL
+        ''',
+    ]),
+    Migration(7, 'streaming answer chunks', [
+        # 流式回答已收到的分段，任一 Web 进程都可以据此接着处理同一个回答
+        '''
+        CREATE TABLE IF NOT EXISTS stream_chunks (
+            question_id INTEGER NOT NULL,
+            seq INTEGER NOT NULL,
+            chunk {blob} NOT NULL,
+            created_at INTEGER NOT NULL,
+            PRIMARY KEY (question_id, seq)
+        )
+        ''',
+    ]),
+    Migration(8, 'blob reference indexes and deferred deletes', [
+        # 删除文件前检查是否仍被引用 (app/services/blob_store.py)
+        'CREATE INDEX IF NOT EXISTS idx_interview_questions_answer_audio_sha256 ON interview_questions (answer_audio_sha256)',
+        'CREATE INDEX IF NOT EXISTS idx_candidates_resume_sha256 ON candidates (resume_sha256)',
+        'CREATE INDEX IF NOT EXISTS idx_interviews_report_sha256 ON interviews (report_sha256)',
+        # 等待删除的文件（提交失败后登记，宽限期过后由清理线程删除）
+        '''
+        CREATE TABLE IF NOT EXISTS blob_discards (
+            sha256 TEXT PRIMARY KEY,
+            requested_at INTEGER NOT NULL
+        )
+        ''',
+    ]),
+    Migration(9, 'streaming window transcripts', [
+        # 流式回答已转写完成的窗口（在完整录音中的采样区间和文本），
+        # 其他 Web 进程接手同一个回答时直接复用，不再重新转写
+        '''
+        CREATE TABLE IF NOT EXISTS stream_windows (
+            question_id INTEGER NOT NULL,
+            window_index INTEGER NOT NULL,
+            start_sample INTEGER NOT NULL,
+            end_sample INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            created_at INTEGER NOT NULL,
+            PRIMARY KEY (question_id, window_index)
+        )
+        ''',
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+def applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row['version'] for row in cursor.fetchall()}
+
+def _lock(cursor, db_type):
+    """开始迁移事务并获取迁移锁（事务结束时释放）"""
+    if db_type == 'postgres':
+        cursor.execute("SELECT pg_advisory_xact_lock(?)", (PG_LOCK_KEY,))
+    else:
+        cursor.execute("BEGIN IMMEDIATE")
+
+def migrate(conn, db_type=None):
+    """
+    执行所有未执行的迁移
+    Apply pending schema migrations in version order
+
+    Args:
+        conn: 数据库连接（SQLite 连接需要 row_factory = sqlite3.Row）
+        db_type: 'sqlite' 或 'postgres'，默认 Config.DB_TYPE
+
+    Returns:
+        int: 当前的 schema 版本
+    """
+    db_type = db_type or Config.DB_TYPE
+    dialect = DIALECTS[db_type]
+    cursor = conn.cursor()
+    # 并发执行 CREATE TABLE IF NOT EXISTS 在 PostgreSQL 上也可能冲突，同样在锁内执行
+    _lock(cursor, db_type)
+    cursor.execute(SCHEMA_TABLE)
+    conn.commit()
+
+    done = applied_versions(cursor)
+    for migration in MIGRATIONS:
+        if migration.version in done:
+            continue
+        _lock(cursor, db_type)
+        try:
+            # 拿到锁后重新检查，其他进程可能已经执行完
+            if migration.version in applied_versions(cursor):
+                conn.rollback()
+                continue
+            for step in migration.steps:
+                if callable(step):
+                    step(cursor, db_type)
+                else:
+                    cursor.execute(step.format(**dialect))
+            cursor.execute("INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                           (migration.version, migration.name, int(time.time())))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Schema migration {migration.version} ({migration.name}) failed: {e}")
+            raise
+        logger.info(f"Applied schema migration {migration.version}: {migration.name}")
+    return LATEST_VERSION
@@ -3,7 +3,8 @@ AI Intelligent Interview System - Application Entry Point
 AI智能面试系统 - 应用入口文件
 
 此模块作为整个后端应用的启动入口，负责初始化数据库、配置日志、
-创建Flask应用实例，并启动开发服务器。
+创建Flask应用实例并启动后台服务（ASR 预热、评分队列、转写巡检），
+然后启动开发服务器；gunicorn 以 server:app 加载时同样经过这里。
 
 Usage:
     python app/server.py
@@ -28,9 +29,9 @@ logger.info("Initializing database...")
 init_db()
 logger.info("Database initialized successfully.")
 
-# 创建 Flask 应用实例
-# Create Flask application instance
-app = create_app()
+# 创建 Flask 应用实例，服务入口负责启动后台服务
+# Create Flask application instance and start background services
+app = create_app(start_background=True)
 
 if __name__ == '__main__':
     # 启动应用
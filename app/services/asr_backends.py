@@ -0,0 +1,157 @@
+"""
+ASR Backends
+语音识别后端
+
+转写服务通过统一的后端接口调用语音识别模型，具体实现由 Config.ASR_BACKEND 选择：
+- whisper:      原版 Whisper，有 GPU 时加载到 CUDA（fp16），否则在 CPU 上以 float32 运行
+- whisper-int8: CPU 优化版 Whisper，对所有线性层做 torch 动态 int8 量化，
+                可配置 torch 线程数，并在 inference_mode 下推理
+
+whisper / torch 在 load() 时才导入，未选中的后端不要求安装对应依赖。
+新增后端时继承 ASRBackend 并在 BACKENDS 中注册即可。
+"""
+
+import logging
+
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+class ASRBackend:
+    """
+    语音识别后端基类
+    Base class of speech recognition backends
+
+    - load(): 加载模型，只会被调用一次
+    - transcribe(audio): 转写一段不超过 30 秒的 float32 波形
+    - transcribe_windows(windows): 批量转写多个窗口，返回与输入一一对应的文本
+    """
+    name = None
+
+    def __init__(self, model_size, language="zh"):
+        self.model_size = model_size
+        self.language = language
+        self.device = "cpu"
+
+    def load(self):
+        raise NotImplementedError
+
+    def transcribe(self, audio):
+        raise NotImplementedError
+
+    def transcribe_windows(self, windows):
+        return [self.transcribe(audio) for audio in windows]
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.model_size} on {self.device}>"
+
+class WhisperBackend(ASRBackend):
+    """
+    原版 Whisper 后端 (Reference Whisper backend)
+
+    有 GPU 时加载到 CUDA 并使用 fp16，否则使用 CPU float32。
+    """
+    name = "whisper"
+
+    def __init__(self, model_size, language="zh"):
+        super().__init__(model_size, language)
+        self.model = None
+
+    def load(self):
+        import torch
+        import whisper
+
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.model = whisper.load_model(self.model_size, device=self.device)
+        return self
+
+    @property
+    def fp16(self):
+        return self.device == "cuda"
+
+    def transcribe(self, audio):
+        return self.model.transcribe(audio, language=self.language, fp16=self.fp16)["text"]
+
+    def transcribe_windows(self, windows):
+        """
+        把多个窗口合并为一个 mel 频谱批次，编码器只前向一次，再批量解码
+        Batched decoding: one encoder pass for all windows
+        """
+        import torch
+        import whisper
+
+        options = whisper.DecodingOptions(language=self.language, without_timestamps=True, fp16=self.fp16)
+        mel = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(audio)), self.model.dims.n_mels)
+            for audio in windows
+        ]).to(self.model.device)
+        return [decoded.text for decoded in whisper.decode(self.model, mel, options)]
+
+class QuantizedWhisperBackend(WhisperBackend):
+    """
+    CPU 优化的 Whisper 后端 (int8 dynamic quantization on CPU)
+
+    - 强制 CPU 运行，线性层（注意力投影和 MLP，占绝大部分计算量）动态量化为 int8
+    - Config.ASR_CPU_THREADS > 0 时设置 torch 线程数，多进程部署时避免线程超卖
+    - 推理包在 torch.inference_mode() 中，跳过 autograd 记录
+    """
+    name = "whisper-int8"
+
+    def load(self):
+        import torch
+        import whisper
+
+        if Config.ASR_CPU_THREADS > 0:
+            torch.set_num_threads(Config.ASR_CPU_THREADS)
+        self.device = "cpu"
+        model = whisper.load_model(self.model_size, device="cpu")
+        _replace_linear_subclasses(model, torch.nn)
+        self.model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return self
+
+    def transcribe(self, audio):
+        import torch
+
+        with torch.inference_mode():
+            return super().transcribe(audio)
+
+    def transcribe_windows(self, windows):
+        import torch
+
+        with torch.inference_mode():
+            return super().transcribe_windows(windows)
+
+def _replace_linear_subclasses(module, nn):
+    """
+    Whisper 自定义的 Linear 子类无法被 quantize_dynamic 识别，替换为共享权重的 nn.Linear
+    Swap whisper's Linear subclass for plain nn.Linear so quantize_dynamic picks it up
+    """
+    for name, child in module.named_children():
+        if isinstance(child, nn.Linear) and type(child) is not nn.Linear:
+            plain = nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+            plain.weight = child.weight
+            plain.bias = child.bias
+            setattr(module, name, plain)
+        else:
+            _replace_linear_subclasses(child, nn)
+
+# 后端名称 -> 实现类
+BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    QuantizedWhisperBackend.name: QuantizedWhisperBackend,
+}
+
+def create_backend(name=None, model_size=None):
+    """
+    按名称创建（尚未加载的）识别后端
+    Create an unloaded backend, defaults come from Config
+
+    Raises:
+        ValueError: 未知的后端名称
+    """
+    name = name or Config.ASR_BACKEND
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown ASR backend '{name}', expected one of: {', '.join(BACKENDS)}") from None
+    return backend_class(model_size or Config.WHISPER_MODEL_SIZE)
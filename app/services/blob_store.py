@@ -0,0 +1,363 @@
+"""
+Blob Storage Service
+二进制文件存储服务
+
+回答录音、简历 PDF 和面试报告等大文件保存在独立的文件存储中，数据库只保存引用
+（内容的 SHA-256）：
+- interview_questions.answer_audio_sha256 -> 回答录音
+- candidates.resume_sha256 -> 简历 PDF
+- interviews.report_sha256 -> 面试报告 (REPORT_STORAGE=blob)
+
+存储按内容寻址，相同内容只保存一份，写入是幂等的。后端由 BLOB_STORE 选择：
+- local: 本地目录，按哈希前缀分两级子目录 (ab/cd/abcd...)，避免单个目录文件过多
+- s3: S3 兼容的对象存储（AWS S3、MinIO 等，需要安装 boto3）
+- s3-local: S3 接口 + 本地目录模拟，便于在没有对象存储的环境中开发和测试 s3 后端
+
+旧数据中仍保存在 BLOB 列里的内容可以用 scripts/migrate_blobs.py 迁移到文件存储。
+写入引用行的事务提交失败时，文件登记到 blob_discards 表，宽限期过后在锁内确认没有引用再删除。
+"""
+
+import os
+import re
+import time
+import uuid
+import hashlib
+import logging
+import threading
+
+from app.core.config import Config
+from app.core.database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+_KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+def blob_key(data):
+    """内容的 SHA-256，作为文件存储中的键"""
+    return hashlib.sha256(data).hexdigest()
+
+def _check_key(key):
+    # 键会拼接进文件路径和对象名，只接受 SHA-256 十六进制串
+    if not key or not _KEY_PATTERN.match(key):
+        raise ValueError(f"Invalid blob key: {key!r}")
+    return key
+
+class BlobStore:
+    """
+    文件存储接口
+    Content-addressed blob store interface
+    """
+    def put(self, data):
+        """保存内容并返回键（已存在时不重复写入）"""
+        raise NotImplementedError
+
+    def open(self, key):
+        """以二进制只读文件对象打开内容，不存在时抛出 FileNotFoundError"""
+        raise NotImplementedError
+
+    def size(self, key):
+        """内容字节数，不存在时返回 None"""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def modified_at(self, key):
+        """内容写入时间（Unix 时间戳或 datetime），不支持或不存在时返回 None"""
+        return None
+
+    def local_path(self, key):
+        """内容在本机文件系统中的路径（可直接交给 send_file / X-Accel-Redirect），不支持时返回 None"""
+        return None
+
+    def exists(self, key):
+        return self.size(key) is not None
+
+    def get(self, key):
+        with self.open(key) as f:
+            return f.read()
+
+class LocalBlobStore(BlobStore):
+    """本地目录存储：root/ab/cd/abcd..."""
+    def __init__(self, root):
+        self.root = root
+
+    def local_path(self, key):
+        _check_key(key)
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def put(self, data):
+        key = blob_key(data)
+        path = self.local_path(key)
+        if os.path.exists(path):
+            return key
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件再重命名，并发写入同一内容时也不会读到半个文件
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return key
+
+    def open(self, key):
+        return open(self.local_path(key), 'rb')
+
+    def size(self, key):
+        try:
+            return os.path.getsize(self.local_path(key))
+        except FileNotFoundError:
+            return None
+
+    def modified_at(self, key):
+        try:
+            return os.path.getmtime(self.local_path(key))
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key):
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+def _is_not_found(error):
+    # botocore.exceptions.ClientError 把 HTTP 状态放在 error.response 中
+    code = getattr(error, 'response', {}).get('Error', {}).get('Code')
+    return code in ('404', 'NoSuchKey', 'NotFound')
+
+class S3BlobStore(BlobStore):
+    """S3 兼容对象存储，client 为 boto3 S3 客户端或接口相同的对象"""
+    def __init__(self, client, bucket, prefix=''):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _object_name(self, key):
+        return f"{self.prefix}{_check_key(key)}"
+
+    def put(self, data):
+        key = blob_key(data)
+        if not self.exists(key):
+            self.client.put_object(Bucket=self.bucket, Key=self._object_name(key), Body=data)
+        return key
+
+    def open(self, key):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._object_name(key))['Body']
+        except Exception as e:
+            if _is_not_found(e):
+                raise FileNotFoundError(key) from e
+            raise
+
+    def size(self, key):
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._object_name(key))['ContentLength']
+        except Exception as e:
+            if _is_not_found(e):
+                return None
+            raise
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_name(key))
+
+    def modified_at(self, key):
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._object_name(key)).get('LastModified')
+        except Exception as e:
+            if _is_not_found(e):
+                return None
+            raise
+
+class LocalS3NotFound(Exception):
+    """与 botocore ClientError 相同结构的 404 错误"""
+    def __init__(self, key):
+        super().__init__(f"NoSuchKey: {key}")
+        self.response = {'Error': {'Code': 'NoSuchKey'}}
+
+class LocalS3Client:
+    """
+    S3 客户端的本地目录模拟 (BLOB_STORE=s3-local)
+    Minimal local stand-in for the boto3 S3 client methods used by S3BlobStore
+    """
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, bucket, key):
+        return os.path.join(self.root, bucket, *key.split('/'))
+
+    def put_object(self, Bucket, Key, Body):
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(Body)
+        os.replace(tmp_path, path)
+        return {}
+
+    def get_object(self, Bucket, Key):
+        path = self._path(Bucket, Key)
+        if not os.path.exists(path):
+            raise LocalS3NotFound(Key)
+        return {'Body': open(path, 'rb'), 'ContentLength': os.path.getsize(path)}
+
+    def head_object(self, Bucket, Key):
+        path = self._path(Bucket, Key)
+        if not os.path.exists(path):
+            raise LocalS3NotFound(Key)
+        return {'ContentLength': os.path.getsize(path), 'LastModified': os.path.getmtime(path)}
+
+    def delete_object(self, Bucket, Key):
+        path = self._path(Bucket, Key)
+        if os.path.exists(path):
+            os.remove(path)
+        return {}
+
+def _create_store():
+    if Config.BLOB_STORE == 's3':
+        import boto3  # 可选依赖，只有使用 s3 后端时才需要安装
+        client = boto3.client('s3', endpoint_url=Config.BLOB_S3_ENDPOINT_URL or None)
+        return S3BlobStore(client, Config.BLOB_S3_BUCKET, Config.BLOB_S3_PREFIX)
+    if Config.BLOB_STORE == 's3-local':
+        return S3BlobStore(LocalS3Client(Config.BLOB_DIR), Config.BLOB_S3_BUCKET or 'blobs', Config.BLOB_S3_PREFIX)
+    return LocalBlobStore(Config.BLOB_DIR)
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_blob_store():
+    """获取进程内共享的文件存储（按 BLOB_STORE 选择后端）"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _create_store()
+                logger.info(f"Blob store: {Config.BLOB_STORE}")
+    return _store
+
+def load_blob(key, legacy_content=None):
+    """
+    读取内容：旧数据仍保存在数据库 BLOB 列中时直接返回该列，否则从文件存储读取
+    Return the legacy column value if present, otherwise the stored blob (None if neither exists)
+    """
+    if legacy_content:
+        return bytes(legacy_content) if isinstance(legacy_content, memoryview) else legacy_content
+    if not key:
+        return None
+    try:
+        return get_blob_store().get(key)
+    except FileNotFoundError:
+        return None
+
+# 引用文件存储内容的列 (table, column)
+BLOB_REFERENCES = [
+    ('interview_questions', 'answer_audio_sha256'),
+    ('candidates', 'resume_sha256'),
+    ('interviews', 'report_sha256'),
+]
+
+# PostgreSQL advisory lock 的命名空间（第二个键为文件 SHA-256 的 hashtext）
+PG_BLOB_LOCK_NAMESPACE = 7305002
+
+def lock_blob(cursor, key):
+    """
+    写入引用某个文件的记录时，在同一事务中、put 之前调用，防止清理线程同时删除该文件
+    Guard a blob against deletion until the caller's transaction ends
+
+    PostgreSQL 获取共享 advisory lock（事务结束时释放），与 sweep_discarded_blobs 的排他锁互斥；
+    SQLite 的写事务本身是串行的，调用方先写入引用行再 put 即可，这里不需要额外加锁。
+    """
+    if Config.DB_TYPE == 'postgres':
+        cursor.execute("SELECT pg_advisory_xact_lock_shared(?, hashtext(?))", (PG_BLOB_LOCK_NAMESPACE, key))
+
+def _lock_for_delete(cursor, key):
+    """开始删除事务并获取该文件的排他锁"""
+    if Config.DB_TYPE == 'postgres':
+        cursor.execute("SELECT pg_advisory_xact_lock(?, hashtext(?))", (PG_BLOB_LOCK_NAMESPACE, key))
+    else:
+        cursor.execute("BEGIN IMMEDIATE")
+
+def _is_referenced(cursor, key):
+    # 每一列都有索引 (migration 8)
+    for table, column in BLOB_REFERENCES:
+        cursor.execute(f'SELECT 1 FROM {table} WHERE {column} = ? LIMIT 1', (key,))
+        if cursor.fetchone():
+            return True
+    return False
+
+def discard_unreferenced(key):
+    """
+    登记一个可能没有被引用的文件：写入文件存储后数据库事务没有提交成功时调用，避免留下孤立文件
+    Schedule a blob for deletion once the grace period has passed
+
+    不立即删除：同一内容可能正被另一个请求写入、引用行还没有提交。
+    BLOB_DISCARD_GRACE_SECONDS 秒后由 sweep_discarded_blobs 在锁内重新检查引用再删除。
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO blob_discards (sha256, requested_at) VALUES (?, ?)
+        ON CONFLICT (sha256) DO UPDATE SET requested_at = excluded.requested_at
+    ''', (_check_key(key), int(time.time())))
+    conn.commit()
+    conn.close()
+
+def sweep_discarded_blobs(limit=100):
+    """
+    删除登记超过宽限期、且仍没有任何记录引用的文件
+    Delete scheduled blobs that are past the grace period and still unreferenced
+
+    每个文件在持有排他锁的事务中重新检查引用、删除文件并移除登记，
+    与同时引用该文件的写入（lock_blob / SQLite 写锁）互斥。
+
+    Returns:
+        int: 删除的文件数
+    """
+    cutoff = int(time.time()) - Config.BLOB_DISCARD_GRACE_SECONDS
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT sha256 FROM blob_discards WHERE requested_at <= ? ORDER BY requested_at LIMIT ?',
+                   (cutoff, limit))
+    keys = [row['sha256'] for row in cursor.fetchall()]
+    conn.commit()
+
+    deleted = 0
+    try:
+        for key in keys:
+            _lock_for_delete(cursor, key)
+            try:
+                if not _is_referenced(cursor, key):
+                    get_blob_store().delete(key)
+                    deleted += 1
+                    logger.info(f"Discarded unreferenced blob {key}")
+                cursor.execute('DELETE FROM blob_discards WHERE sha256 = ?', (key,))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    finally:
+        conn.close()
+    return deleted
+
+_cleanup_started = False
+_cleanup_lock = threading.Lock()
+
+def start_blob_cleanup():
+    """
+    启动文件清理线程：每 BLOB_DISCARD_GRACE_SECONDS 秒删除一次过期的登记文件
+    Start the background thread that deletes discarded blobs
+    """
+    global _cleanup_started
+    with _cleanup_lock:
+        if _cleanup_started:
+            return
+        _cleanup_started = True
+
+    def cleanup_loop():
+        while True:
+            try:
+                sweep_discarded_blobs()
+            except Exception as e:
+                logger.error(f"Blob cleanup failed: {e}")
+            time.sleep(max(1, Config.BLOB_DISCARD_GRACE_SECONDS))
+
+    threading.Thread(target=cleanup_loop, name='blob-cleanup', daemon=True).start()
@@ -0,0 +1,416 @@
+"""
+Evaluation Queue Service
+AI 评分任务队列
+
+回答转写完成后的实时 AI 评分不再为每个回答单独启动线程，而是写入持久化的任务表
+evaluation_jobs，由固定大小的工作线程池处理：
+
+- 持久化：任务随数据库保存，服务重启后未完成的任务会继续处理
+- 背压：提交只是一次 INSERT；调度线程只在有空闲工作线程时才领取任务，
+  突发提交只会让任务在表中排队，不会创建更多线程或占用更多数据库连接
+- 重试：失败后按指数退避 (EVAL_RETRY_BASE_SECONDS * 2^(n-1)，上限 EVAL_RETRY_MAX_SECONDS) 重新排队，
+  达到 EVAL_MAX_ATTEMPTS 次后进入死信状态 (dead)，保留最后一次错误信息
+- 巡检：定期把已转写但 ai_score 仍为空、且没有评分任务的回答重新入队
+- 批量模式 (EVAL_MODE=batch)：任务入队后延迟 EVAL_BATCH_DELAY_SECONDS 秒（面试完成时立即到期），
+  同一面试的多个回答（最多 EVAL_BATCH_SIZE 个）合并为一次模型请求评分
+
+任务状态: pending (等待) / running (处理中) / done (完成) / dead (死信)。
+已完成面试的最后一个评分任务结束（完成或死信）时才唤醒报告生成工作进程。
+多个 Web 进程可以同时运行工作线程池，任务领取方式与 app/services/job_claims.py 相同。
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import Config
+from app.core.database import get_db_connection
+from app.services.job_claims import REPORT_JOBS, new_claim_token
+from app.services.job_notify import notify_jobs
+
+logger = logging.getLogger(__name__)
+
+def is_batch_mode():
+    return Config.EVAL_MODE == 'batch'
+
+def enqueue_evaluation(question_id, cursor=None):
+    """
+    提交（或重新提交）一个回答的评分任务
+    Enqueue the AI evaluation of an answer
+
+    重新提交的回答会重置尝试次数；传入 cursor 时在调用方的事务中写入。
+    """
+    now = int(time.time())
+    # 批量模式下延迟评分，等待同一面试的更多回答
+    run_at = now + Config.EVAL_BATCH_DELAY_SECONDS if is_batch_mode() else now
+    own_conn = cursor is None
+    if own_conn:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO evaluation_jobs (question_id, status, attempts, next_run_at, updated_at)
+        VALUES (?, 'pending', 0, ?, ?)
+        ON CONFLICT (question_id) DO UPDATE
+        SET status = 'pending', attempts = 0, next_run_at = excluded.next_run_at,
+            claimed_by = NULL, lease_expires_at = NULL, last_error = NULL, updated_at = excluded.updated_at
+    ''', (question_id, run_at, now))
+    if own_conn:
+        conn.commit()
+        conn.close()
+    # 同一进程内的工作线程池立即开始处理
+    get_evaluation_queue().wake()
+
+# 到期的任务：等待中且已到执行时间，或处理中但租约已过期（进程崩溃）
+_DUE_CONDITION = '''((ej.status = 'pending' AND ej.next_run_at <= ?) OR (ej.status = 'running' AND ej.lease_expires_at < ?))
+              AND ej.attempts < ?'''
+
+def claim_evaluations(limit, interview_id=None):
+    """
+    原子领取最多 limit 个到期的评分任务（租约过期的 running 任务也会被重新领取）
+    Atomically claim due evaluation jobs, optionally only those of one interview
+
+    Returns:
+        (str, list): 领取令牌，以及问题 ID 列表
+    """
+    token = new_claim_token()
+    now = int(time.time())
+    lock_clause = 'FOR UPDATE OF ej SKIP LOCKED' if Config.DB_TYPE == 'postgres' else ''
+    interview_filter = ''
+    params = [token, now + Config.EVAL_LEASE_SECONDS, now, now, now, Config.EVAL_MAX_ATTEMPTS]
+    if interview_id is not None:
+        interview_filter = 'AND iq.interview_id = ?'
+        params.append(interview_id)
+    params.append(limit)
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        UPDATE evaluation_jobs
+        SET status = 'running', claimed_by = ?, lease_expires_at = ?, attempts = attempts + 1, updated_at = ?
+        WHERE question_id IN (
+            SELECT ej.question_id FROM evaluation_jobs ej
+            JOIN interview_questions iq ON iq.id = ej.question_id
+            WHERE {_DUE_CONDITION} {interview_filter}
+            ORDER BY ej.next_run_at, ej.question_id
+            LIMIT ?
+            {lock_clause}
+        )
+    ''', params)
+    cursor.execute('SELECT question_id FROM evaluation_jobs WHERE claimed_by = ? ORDER BY question_id', (token,))
+    ids = [row['question_id'] for row in cursor.fetchall()]
+    conn.commit()
+    conn.close()
+    return token, ids
+
+def due_interviews(limit):
+    """有到期评分任务的面试（批量模式下每个面试作为一个批次领取）"""
+    now = int(time.time())
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT iq.interview_id, MIN(ej.next_run_at) AS due_at
+        FROM evaluation_jobs ej
+        JOIN interview_questions iq ON iq.id = ej.question_id
+        WHERE {_DUE_CONDITION}
+        GROUP BY iq.interview_id
+        ORDER BY due_at
+        LIMIT ?
+    ''', (now, now, Config.EVAL_MAX_ATTEMPTS, limit))
+    ids = [row['interview_id'] for row in cursor.fetchall()]
+    conn.close()
+    return ids
+
+def flush_interview_evaluations(interview_id):
+    """
+    面试完成时让该面试延迟中的评分任务立即到期（批量模式），唤醒工作线程池
+    Make the delayed jobs of a completed interview due now
+    """
+    if not is_batch_mode():
+        return
+    now = int(time.time())
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE evaluation_jobs SET next_run_at = ?, updated_at = ?
+        WHERE status = 'pending' AND attempts = 0 AND next_run_at > ?
+          AND question_id IN (SELECT id FROM interview_questions WHERE interview_id = ?)
+    ''', (now, now, now, interview_id))
+    conn.commit()
+    conn.close()
+    get_evaluation_queue().wake()
+
+def notify_report_if_ready(interview_id=None, question_ids=None):
+    """
+    面试已完成且评分任务全部结束时唤醒报告生成工作进程
+    Wake the report workers once a completed interview has no unfinished evaluations
+
+    Args:
+        interview_id: 只检查该面试
+        question_ids: 只检查这些回答所属的面试（都不传时检查所有已完成的面试）
+    """
+    sql = f"SELECT id FROM interviews WHERE status = {int(REPORT_JOBS.pending_status)} AND {REPORT_JOBS.ready_sql}"
+    params = []
+    if interview_id is not None:
+        sql += " AND id = ?"
+        params.append(interview_id)
+    elif question_ids:
+        sql += f" AND id IN (SELECT interview_id FROM interview_questions WHERE id IN ({', '.join('?' * len(question_ids))}))"
+        params.extend(question_ids)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(sql + " LIMIT 1", params)
+    ready = cursor.fetchone() is not None
+    conn.close()
+    if ready:
+        notify_jobs(REPORT_JOBS)
+    return ready
+
+def _retry_delay(attempts):
+    return min(Config.EVAL_RETRY_MAX_SECONDS, Config.EVAL_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+
+def fail_evaluation(question_id, token, error):
+    """
+    评分失败：按指数退避重新排队，超过最大次数后进入死信状态
+    Reschedule a failed job with exponential backoff, or dead-letter it
+    """
+    now = int(time.time())
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT attempts FROM evaluation_jobs WHERE question_id = ? AND claimed_by = ?',
+                   (question_id, token))
+    row = cursor.fetchone()
+    if row is None:
+        # 任务已经被重新提交或被其他进程接管
+        conn.close()
+        return
+    attempts = row['attempts']
+    if attempts >= Config.EVAL_MAX_ATTEMPTS:
+        cursor.execute('''
+            UPDATE evaluation_jobs SET status = 'dead', claimed_by = NULL, lease_expires_at = NULL,
+                   last_error = ?, updated_at = ?
+            WHERE question_id = ? AND claimed_by = ?
+        ''', (str(error)[:1000], now, question_id, token))
+        logger.error(f"Evaluation of question {question_id} dead-lettered after {attempts} attempts: {error}")
+    else:
+        delay = _retry_delay(attempts)
+        cursor.execute('''
+            UPDATE evaluation_jobs SET status = 'pending', claimed_by = NULL, lease_expires_at = NULL,
+                   next_run_at = ?, last_error = ?, updated_at = ?
+            WHERE question_id = ? AND claimed_by = ?
+        ''', (now + delay, str(error)[:1000], now, question_id, token))
+        logger.warning(f"Evaluation of question {question_id} failed (attempt {attempts}), retrying in {delay}s: {error}")
+    conn.commit()
+    conn.close()
+    if attempts >= Config.EVAL_MAX_ATTEMPTS:
+        notify_report_if_ready(question_ids=[question_id])
+
+def sweep_evaluations():
+    """
+    巡检：把已转写但没有评分、也没有评分任务的回答重新入队；
+    租约过期且已达最大尝试次数的任务转入死信
+    Re-enqueue transcribed answers whose ai_score is still NULL
+
+    Returns:
+        int: 重新入队的任务数
+    """
+    now = int(time.time())
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE evaluation_jobs SET status = 'dead', claimed_by = NULL, last_error = 'lease expired', updated_at = ?
+        WHERE status = 'running' AND lease_expires_at < ? AND attempts >= ?
+    ''', (now, now, Config.EVAL_MAX_ATTEMPTS))
+    dead = cursor.rowcount
+    cursor.execute('''
+        INSERT INTO evaluation_jobs (question_id, status, attempts, next_run_at, updated_at)
+        SELECT iq.id, 'pending', 0, ?, ?
+        FROM interview_questions iq
+        LEFT JOIN evaluation_jobs ej ON ej.question_id = iq.id
+        WHERE iq.answer_text IS NOT NULL AND iq.ai_score IS NULL AND ej.question_id IS NULL
+    ''', (now, now))
+    requeued = cursor.rowcount
+    conn.commit()
+    conn.close()
+    if requeued:
+        logger.info(f"Evaluation sweeper re-enqueued {requeued} answers")
+    if dead:
+        notify_report_if_ready()
+    return requeued
+
+def _complete_evaluation(cursor, question_id, token, result, save_question_evaluation):
+    """在同一事务中写入评分并把任务标记为完成；租约已失效时返回 False"""
+    cursor.execute('''
+        UPDATE evaluation_jobs SET status = 'done', claimed_by = NULL, lease_expires_at = NULL,
+               last_error = NULL, updated_at = ?
+        WHERE question_id = ? AND claimed_by = ?
+    ''', (int(time.time()), question_id, token))
+    if cursor.rowcount != 1:
+        # 评分期间回答被重新提交，丢弃旧结果
+        return False
+    if result is not None:
+        save_question_evaluation(cursor, question_id, result)
+    return True
+
+def run_evaluation(question_id, token):
+    """
+    执行一个评分任务：调用模型评分，并在同一事务中写入分数、把任务标记为完成
+    Score one answer and persist the result together with the job completion
+    """
+    from app.services.report_service import score_question, save_question_evaluation
+
+    try:
+        result = score_question(question_id)
+    except Exception as e:
+        fail_evaluation(question_id, token, e)
+        return
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    if not _complete_evaluation(cursor, question_id, token, result, save_question_evaluation):
+        conn.rollback()
+    elif result is not None:
+        logger.info(f"Evaluated question {question_id}: Score {result.get('score')}")
+    conn.commit()
+    conn.close()
+    notify_report_if_ready(question_ids=[question_id])
+
+def run_evaluation_batch(question_ids, token):
+    """
+    批量执行评分任务：同一面试的回答合并为一次模型请求，结果逐行写回
+    Score a batch of answers with one LLM request and persist each result
+
+    模型漏掉的回答按失败处理（退避后单独重试）。
+    """
+    from app.services.report_service import score_questions, save_question_evaluation
+
+    try:
+        results = score_questions(question_ids)
+    except Exception as e:
+        for question_id in question_ids:
+            fail_evaluation(question_id, token, e)
+        return
+
+    missing = [question_id for question_id in question_ids if question_id not in results]
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    saved = 0
+    for question_id in question_ids:
+        if question_id in results:
+            # 每一行单独判断租约，被重新提交的回答不影响同批次的其他回答
+            if _complete_evaluation(cursor, question_id, token, results[question_id], save_question_evaluation):
+                saved += 1
+    conn.commit()
+    conn.close()
+    logger.info(f"Evaluated {saved} of {len(question_ids)} questions in one batch")
+    for question_id in missing:
+        fail_evaluation(question_id, token, "missing from batch evaluation response")
+    if saved:
+        notify_report_if_ready(question_ids=question_ids)
+
+class EvaluationQueue:
+    """
+    评分工作线程池
+    Fixed-size evaluation worker pool fed from the evaluation_jobs table
+
+    一个调度线程负责领取任务：只在有空闲工作线程时领取，没有到期任务时
+    等待 wake() 或 EVAL_POLL_SECONDS 超时；每 EVAL_SWEEP_INTERVAL_SECONDS 执行一次巡检。
+    """
+    def __init__(self, workers):
+        self.workers = max(1, workers)
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._executor = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='evaluation')
+            self._thread = threading.Thread(target=self._dispatch_loop, name='evaluation-dispatcher', daemon=True)
+            self._thread.start()
+        logger.info(f"Evaluation queue started with {self.workers} workers")
+
+    def wake(self):
+        self.start()
+        self._wakeup.set()
+
+    def stop(self, timeout=5):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def _acquire_free_slots(self):
+        """阻塞直到至少有一个空闲工作线程，返回本次占用的空闲数量"""
+        self._slots.acquire()
+        free = 1
+        while self._slots.acquire(blocking=False):
+            free += 1
+        return free
+
+    def _run(self, question_ids, token):
+        try:
+            if len(question_ids) == 1 and not is_batch_mode():
+                run_evaluation(question_ids[0], token)
+            else:
+                run_evaluation_batch(question_ids, token)
+        except Exception as e:
+            logger.error(f"Error evaluating questions {question_ids}: {e}")
+        finally:
+            self._slots.release()
+            self._wakeup.set()
+
+    def _claim(self, free):
+        """领取任务，返回 [(问题 ID 列表, 令牌)]，每一项占用一个工作线程"""
+        if not is_batch_mode():
+            token, ids = claim_evaluations(free)
+            return [([question_id], token) for question_id in ids]
+        batches = []
+        for interview_id in due_interviews(free):
+            token, ids = claim_evaluations(max(1, Config.EVAL_BATCH_SIZE), interview_id)
+            if ids:
+                batches.append((ids, token))
+        return batches
+
+    def _dispatch_loop(self):
+        next_sweep = 0
+        while not self._stopped.is_set():
+            free = self._acquire_free_slots()
+            try:
+                if time.monotonic() >= next_sweep:
+                    sweep_evaluations()
+                    next_sweep = time.monotonic() + Config.EVAL_SWEEP_INTERVAL_SECONDS
+                self._wakeup.clear()
+                batches = self._claim(free)
+            except Exception as e:
+                logger.error(f"Evaluation dispatcher error: {e}")
+                batches = []
+
+            for question_ids, token in batches:
+                self._executor.submit(self._run, question_ids, token)
+            for _ in range(free - len(batches)):
+                self._slots.release()
+
+            if not batches:
+                self._wakeup.wait(Config.EVAL_POLL_SECONDS)
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_evaluation_queue():
+    """
+    单例模式获取评分工作线程池（首次 wake/start 时才启动线程）
+    Get the evaluation queue (Singleton)
+    """
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = EvaluationQueue(Config.EVAL_WORKERS)
+    return _queue
@@ -0,0 +1,142 @@
+"""
+Job Claiming Service
+后台任务领取服务
+
+问题生成（status = 0）和报告生成（status = 3）以 interviews 表本身作为任务队列。
+多个工作进程（可以在不同机器上）通过原子领取避免重复处理同一个面试：
+
+1. 领取：一条 UPDATE 把待处理且未被占用（或租约已过期）的面试标记为
+   claimed_by = 领取令牌、lease_expires_at = 租约到期时间，并把 attempts 加 1。
+   PostgreSQL 使用 SELECT ... FOR UPDATE SKIP LOCKED + UPDATE ... RETURNING，
+   SQLite 的写操作本身是串行的，条件 UPDATE 后按令牌查回领取到的行。
+   报告任务另外要求该面试没有未结束的评分任务 (REPORT_JOBS.ready_sql)。
+2. 处理中：status 不变、claimed_by 非空即为"处理中"状态，不改变前端使用的状态码。
+3. 完成：在保存结果的同一事务中执行 finish_job，只有仍持有租约的进程才能写入结果
+   （租约过期后被其他进程重新领取时，旧进程的结果会被丢弃）。
+4. 失败：release_job 把租约改为重试时间，到期后在 attempts < JOB_MAX_ATTEMPTS 时会被再次领取。
+"""
+
+import os
+import time
+import uuid
+import socket
+import logging
+from collections import namedtuple
+
+from app.core.config import Config
+from app.core.database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# 任务类型：待处理状态 -> 完成状态；ready_sql 为领取的附加条件（可引用 interviews.id）
+JobKind = namedtuple('JobKind', ['name', 'pending_status', 'done_status', 'ready_sql'], defaults=(None,))
+
+# 报告生成要等该面试的评分任务全部结束（完成或死信），否则报告会退回整体评分，
+# 逐题评分的结果被浪费。最后一个评分任务结束时由 app/services/evaluation_queue.py 发送通知
+EVALUATIONS_SETTLED = '''NOT EXISTS (
+                    SELECT 1 FROM evaluation_jobs ej
+                    JOIN interview_questions iq ON iq.id = ej.question_id
+                    WHERE iq.interview_id = interviews.id AND ej.status IN ('pending', 'running')
+                )'''
+
+QUESTION_JOBS = JobKind('questions', 0, 1)
+REPORT_JOBS = JobKind('reports', 3, 4, EVALUATIONS_SETTLED)
+
+def new_claim_token():
+    """领取令牌：主机名 + 进程号 + 随机后缀，同时用于排查是哪个进程在处理"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def claim_jobs(kind, limit=1):
+    """
+    原子领取最多 limit 个待处理的面试
+    Atomically claim up to `limit` pending interviews
+
+    Returns:
+        (str, list): 领取令牌，以及领取到的面试 ID 列表
+    """
+    token = new_claim_token()
+    now = int(time.time())
+    params = (token, now + Config.JOB_LEASE_SECONDS, now, Config.JOB_MAX_ATTEMPTS, limit)
+    # 状态码直接写入 SQL 而不是作为参数：PostgreSQL 预编译语句的通用执行计划
+    # 不知道参数值，无法使用只索引待处理面试的部分索引 idx_interviews_pending
+    pending = int(kind.pending_status)
+    ready = f"AND {kind.ready_sql}" if kind.ready_sql else ''
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    if Config.DB_TYPE == 'postgres':
+        cursor.execute(f'''
+            UPDATE interviews
+            SET claimed_by = ?, lease_expires_at = ?, attempts = attempts + 1
+            WHERE id IN (
+                SELECT id FROM interviews
+                WHERE status = {pending} AND (claimed_by IS NULL OR lease_expires_at < ?) AND attempts < ?
+                  {ready}
+                ORDER BY id
+                LIMIT ?
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id
+        ''', params)
+        ids = [row['id'] for row in cursor.fetchall()]
+    else:
+        cursor.execute(f'''
+            UPDATE interviews
+            SET claimed_by = ?, lease_expires_at = ?, attempts = attempts + 1
+            WHERE id IN (
+                SELECT id FROM interviews
+                WHERE status = {pending} AND (claimed_by IS NULL OR lease_expires_at < ?) AND attempts < ?
+                  {ready}
+                ORDER BY id
+                LIMIT ?
+            )
+        ''', params)
+        cursor.execute('SELECT id FROM interviews WHERE claimed_by = ? ORDER BY id', (token,))
+        ids = [row['id'] for row in cursor.fetchall()]
+    conn.commit()
+    conn.close()
+
+    if ids:
+        logger.info(f"Claimed {kind.name} jobs {ids} as {token}")
+    return token, ids
+
+def finish_job(cursor, kind, interview_id, token):
+    """
+    在保存结果的事务中把任务标记为完成
+    Mark a claimed job done inside the caller's transaction
+
+    Returns:
+        bool: False 表示租约已经失效（被其他进程重新领取），调用方应回滚
+    """
+    cursor.execute('''
+        UPDATE interviews
+        SET status = ?, claimed_by = NULL, lease_expires_at = NULL, attempts = 0
+        WHERE id = ? AND status = ? AND claimed_by = ?
+    ''', (kind.done_status, interview_id, kind.pending_status, token))
+    return cursor.rowcount == 1
+
+def release_job(kind, interview_id, token, error=None):
+    """
+    处理失败时释放任务（尝试次数已在领取时累加）
+    Release a failed job so that it can be retried
+
+    租约到期时间被改为 JOB_RETRY_DELAY_SECONDS * attempts 秒之后，
+    到期后任务按"租约过期"被重新领取，避免同一轮内立即重试。
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT attempts FROM interviews WHERE id = ? AND claimed_by = ?', (interview_id, token))
+    row = cursor.fetchone()
+    if row:
+        retry_at = int(time.time()) + Config.JOB_RETRY_DELAY_SECONDS * row['attempts']
+        cursor.execute('UPDATE interviews SET lease_expires_at = ? WHERE id = ? AND claimed_by = ?',
+                       (retry_at, interview_id, token))
+    conn.commit()
+    conn.close()
+
+    if not row:
+        return
+    if row['attempts'] >= Config.JOB_MAX_ATTEMPTS:
+        logger.error(f"Giving up {kind.name} job for interview {interview_id} after {row['attempts']} attempts: {error}")
+    else:
+        logger.warning(f"{kind.name} job for interview {interview_id} failed (attempt {row['attempts']}), will retry: {error}")
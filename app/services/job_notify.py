@@ -0,0 +1,168 @@
+"""
+Job Notification Service
+后台任务通知服务
+
+面试创建（待生成题目）或面试完成（待生成报告）时立即唤醒对应的工作进程，
+不再等待固定的轮询周期：
+- PostgreSQL: 通过 LISTEN/NOTIFY，通道名为 interview_jobs_<任务类型>，可跨机器
+- SQLite:     同一台机器上的 Unix 数据报套接字，每个工作进程在 JOB_NOTIFY_DIR 下
+              绑定 <任务类型>-<pid>.sock，通知方向目录中所有套接字各发一个字节
+
+通知只是加速手段：丢失通知时工作进程仍会每 JOB_POLL_INTERVAL_SECONDS 秒轮询一次，
+任务领取的正确性由 app/services/job_claims.py 保证。
+"""
+
+import os
+import glob
+import time
+import select
+import socket
+import logging
+
+from app.core.config import Config
+from app.core.database import get_db_connection, get_dedicated_connection
+
+logger = logging.getLogger(__name__)
+
+def _channel(kind):
+    return f"interview_jobs_{kind.name}"
+
+def _socket_pattern(kind):
+    return os.path.join(Config.JOB_NOTIFY_DIR, f"{kind.name}-*.sock")
+
+def notify_jobs(kind):
+    """
+    通知工作进程有新的任务（在写入任务的事务提交之后调用）
+    Wake up the workers of one job kind
+
+    通知失败只记录日志，工作进程的轮询会兜底。
+    """
+    try:
+        if Config.DB_TYPE == 'postgres':
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute('SELECT pg_notify(?, ?)', (_channel(kind), ''))
+            conn.commit()
+            conn.close()
+        else:
+            _notify_local(kind)
+    except Exception as e:
+        logger.warning(f"Failed to notify {kind.name} workers: {e}")
+
+def _notify_local(kind):
+    if not hasattr(socket, 'AF_UNIX'):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        sock.setblocking(False)
+        for path in glob.glob(_socket_pattern(kind)):
+            try:
+                sock.sendto(b'1', path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # 工作进程已退出，清理残留的套接字文件
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except BlockingIOError:
+                # 接收缓冲区已满，说明已经有未处理的唤醒
+                pass
+
+class JobListener:
+    """
+    工作进程一侧的通知监听器
+    Blocks until a job notification arrives or the poll interval elapses
+    """
+    def __init__(self, kind):
+        self.kind = kind
+        self._pg_conn = None
+        self._sock = None
+        self._sock_path = None
+
+    def _connect(self):
+        if Config.DB_TYPE == 'postgres':
+            if self._pg_conn is None:
+                conn = get_dedicated_connection().conn
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {_channel(self.kind)}")
+                self._pg_conn = conn
+        elif self._sock is None and hasattr(socket, 'AF_UNIX'):
+            os.makedirs(Config.JOB_NOTIFY_DIR, exist_ok=True)
+            path = os.path.join(Config.JOB_NOTIFY_DIR, f"{self.kind.name}-{os.getpid()}.sock")
+            if os.path.exists(path):
+                os.unlink(path)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(path)
+            sock.setblocking(False)
+            self._sock, self._sock_path = sock, path
+
+    def wait(self, timeout):
+        """
+        等待通知
+        Wait for a notification
+
+        Returns:
+            bool: True 表示收到通知，False 表示超时（或监听不可用）
+        """
+        try:
+            self._connect()
+            source = self._pg_conn or self._sock
+            if source is None:
+                time.sleep(timeout)
+                return False
+            if not select.select([source], [], [], timeout)[0]:
+                return False
+            return self._drain()
+        except Exception as e:
+            logger.warning(f"Job listener for {self.kind.name} failed, falling back to polling: {e}")
+            self.close()
+            time.sleep(min(timeout, 30))
+            return False
+
+    def _drain(self):
+        """读出所有积压的通知，多个通知只触发一次处理"""
+        if self._pg_conn is not None:
+            self._pg_conn.poll()
+            notified = bool(self._pg_conn.notifies)
+            self._pg_conn.notifies.clear()
+            return notified
+        notified = False
+        while True:
+            try:
+                self._sock.recv(64)
+                notified = True
+            except BlockingIOError:
+                return notified
+
+    def close(self):
+        if self._pg_conn is not None:
+            try:
+                self._pg_conn.close()
+            except Exception:
+                pass
+            self._pg_conn = None
+        if self._sock is not None:
+            self._sock.close()
+            try:
+                os.unlink(self._sock_path)
+            except OSError:
+                pass
+            self._sock = None
+
+def run_job_loop(kind, process):
+    """
+    工作进程主循环：处理一轮任务，然后等待通知或轮询超时，再处理下一轮
+    Worker main loop: process, then wait for a notification or the poll interval
+
+    监听在第一轮处理之前建立，处理期间到达的通知会在下一次 wait 时立即返回。
+    """
+    listener = JobListener(kind)
+    listener.wait(0)
+    try:
+        while True:
+            try:
+                process()
+            except Exception as e:
+                logger.error(f"Error processing {kind.name} jobs: {e}")
+            listener.wait(Config.JOB_POLL_INTERVAL_SECONDS)
+    finally:
+        listener.close()
@@ -0,0 +1,374 @@
+"""
+LLM Client Service
+大模型调用服务
+
+出题、单题评分和报告生成共用的大模型调用入口：
+- get_client(): 进程内共享的 OpenAI 客户端（首次调用时才导入 openai SDK），
+  底层 HTTP 连接池在所有线程之间复用，每次请求都有超时（LLM_TIMEOUT_SECONDS）
+- chat_completion(): 调用模型并返回回复文本，带按内容寻址的响应缓存
+- 容错：超时、连接错误、429 和 5xx 按带随机抖动的指数退避重试 LLM_MAX_RETRIES 次；
+  仍失败时按顺序改用 LLM_FALLBACK_MODELS 中的备选模型。每个模型有独立的熔断器，
+  连续失败 LLM_CIRCUIT_FAILURES 次后在 LLM_CIRCUIT_RESET_SECONDS 秒内直接跳过该模型
+
+响应缓存的键是 (模型, messages, response_format) 的 SHA-256，缓存保存在数据库的 llm_cache 表中，
+Web 进程和后台工作进程共享。崩溃后重跑、重新生成报告、相同的回答（如 "无法识别语音"）
+再次调用时直接返回缓存结果，不再请求模型，也不占用限流额度。
+缓存按 LLM_CACHE_TTL_SECONDS 过期，总大小超过 LLM_CACHE_MAX_BYTES 时淘汰最久未使用的条目。
+"""
+
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+
+from app.core.config import Config
+from app.core.database import get_db_connection
+from app.utils.rate_limit import get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+class LLMUnavailableError(Exception):
+    """所有模型（含备选模型）都调用失败或处于熔断状态"""
+    pass
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """
+    单例模式获取 OpenAI 客户端
+    Get the OpenAI client (Singleton, created on first use)
+
+    重试由 chat_completion 统一处理，SDK 自身的重试关闭（max_retries=0）。
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import httpx
+                from openai import OpenAI
+                pool_size = max(1, Config.LLM_HTTP_POOL_SIZE)
+                _client = OpenAI(
+                    api_key=Config.OPENAI_API_KEY,
+                    base_url=Config.OPENAI_BASE_URL,
+                    timeout=Config.LLM_TIMEOUT_SECONDS,
+                    max_retries=0,
+                    http_client=httpx.Client(
+                        timeout=Config.LLM_TIMEOUT_SECONDS,
+                        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+                    )
+                )
+    return _client
+
+class CircuitBreaker:
+    """
+    单个模型的熔断器
+    Per-model circuit breaker
+
+    - closed: 正常调用，连续失败（可重试的错误，见 is_retryable）达到 failure_threshold 次后打开
+    - open: reset_seconds 内直接跳过该模型
+    - half-open: 到期后放行一个试探请求，成功则关闭，失败则重新打开
+    """
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            return 'half-open' if self._probing else 'open'
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(model):
+    """获取（首次使用时创建）某个模型的熔断器"""
+    with _breakers_lock:
+        breaker = _breakers.get(model)
+        if breaker is None:
+            breaker = CircuitBreaker(Config.LLM_CIRCUIT_FAILURES, Config.LLM_CIRCUIT_RESET_SECONDS)
+            _breakers[model] = breaker
+        return breaker
+
+def is_retryable(error):
+    """超时、连接错误、429 限流和 5xx 服务端错误可以重试；参数错误、鉴权失败等不重试"""
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status == 429 or status == 408 or status >= 500
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # openai.APITimeoutError / APIConnectionError，按类名判断以免导入 SDK
+    return any(cls.__name__ in ('APITimeoutError', 'APIConnectionError') for cls in type(error).__mro__)
+
+def _retry_delay(attempt):
+    """第 attempt 次重试前的等待秒数（full jitter 指数退避）"""
+    return random.uniform(0, min(Config.LLM_RETRY_MAX_SECONDS, Config.LLM_RETRY_BASE_SECONDS * 2 ** attempt))
+
+def candidate_models(model=None):
+    """本次调用依次尝试的模型：指定（或默认）模型在前，其后是去重后的备选模型"""
+    models = []
+    for name in [model or Config.LLM_MODEL] + Config.LLM_FALLBACK_MODELS:
+        if name and name not in models:
+            models.append(name)
+    return models
+
+def _call_model(model, kwargs, timeout):
+    """
+    调用单个模型，可重试的错误按退避重试
+    Returns:
+        str: 回复文本；失败时抛出最后一次的异常
+    """
+    limiter = get_rate_limiter(Config.OPENAI_BASE_URL, Config.LLM_RATE_LIMIT_RPM, Config.LLM_RATE_LIMIT_BURST)
+    attempt = 0
+    while True:
+        # 同一服务商的请求共享限流器，缓存命中的请求不占用额度
+        limiter.acquire()
+        try:
+            response = get_client().chat.completions.create(model=model, timeout=timeout, **kwargs)
+            usage = getattr(response, 'usage', None)
+            usage_stats.incr('requests')
+            if usage is not None:
+                usage_stats.incr('prompt_tokens', usage.prompt_tokens or 0)
+                usage_stats.incr('completion_tokens', usage.completion_tokens or 0)
+            return response.choices[0].message.content
+        except Exception as e:
+            if attempt >= Config.LLM_MAX_RETRIES or not is_retryable(e):
+                raise
+            delay = _retry_delay(attempt)
+            attempt += 1
+            logger.warning(f"LLM call to {model} failed ({e}), retry {attempt} in {delay:.1f}s")
+            time.sleep(delay)
+
+class CacheStats:
+    """
+    进程内的缓存命中统计
+    Per-process LLM cache counters
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def incr(self, name, count=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + count)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "stores": self.stores,
+                    "evictions": self.evictions, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+cache_stats = CacheStats()
+
+def get_cache_stats():
+    """缓存命中统计: hits / misses / stores / evictions / hit_rate"""
+    return cache_stats.snapshot()
+
+class UsageStats:
+    """
+    进程内的模型请求数和 token 用量统计（不含缓存命中）
+    Per-process LLM request and token counters
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def incr(self, name, count=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + count)
+
+    def snapshot(self):
+        with self._lock:
+            return {"requests": self.requests, "prompt_tokens": self.prompt_tokens,
+                    "completion_tokens": self.completion_tokens}
+
+usage_stats = UsageStats()
+
+def get_usage_stats():
+    """模型请求统计: requests / prompt_tokens / completion_tokens"""
+    return usage_stats.snapshot()
+
+def cache_key(model, messages, response_format=None):
+    """模型 + messages + response_format 的 SHA-256"""
+    payload = json.dumps({"model": model, "messages": messages, "response_format": response_format},
+                         ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _cache_get(key):
+    now = int(time.time())
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT response FROM llm_cache WHERE cache_key = ? AND created_at >= ?',
+                   (key, now - Config.LLM_CACHE_TTL_SECONDS))
+    row = cursor.fetchone()
+    if row:
+        cursor.execute('UPDATE llm_cache SET last_used_at = ? WHERE cache_key = ?', (now, key))
+        conn.commit()
+    conn.close()
+    return row['response'] if row else None
+
+def _cache_put(key, model, response):
+    now = int(time.time())
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO llm_cache (cache_key, model, response, size, created_at, last_used_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (cache_key) DO UPDATE
+        SET response = excluded.response, size = excluded.size,
+            created_at = excluded.created_at, last_used_at = excluded.last_used_at
+    ''', (key, model, response, len(response.encode('utf-8')), now, now))
+    conn.commit()
+    conn.close()
+    cache_stats.incr('stores')
+    # 每个进程每写入 LLM_CACHE_EVICT_EVERY 条检查一次过期和总大小
+    if cache_stats.stores % max(1, Config.LLM_CACHE_EVICT_EVERY) == 1:
+        evict_cache()
+
+def evict_cache():
+    """
+    删除过期条目；总大小超过 LLM_CACHE_MAX_BYTES 时按最近使用时间淘汰到上限的 90%
+    Drop expired entries and evict least recently used ones above the size limit
+
+    Returns:
+        int: 删除的条目数
+    """
+    now = int(time.time())
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM llm_cache WHERE created_at < ?', (now - Config.LLM_CACHE_TTL_SECONDS,))
+    removed = max(0, cursor.rowcount)
+
+    cursor.execute('SELECT COALESCE(SUM(size), 0) AS total FROM llm_cache')
+    total = cursor.fetchone()['total']
+    if total > Config.LLM_CACHE_MAX_BYTES:
+        target = Config.LLM_CACHE_MAX_BYTES * 0.9
+        cursor.execute('SELECT cache_key, size FROM llm_cache ORDER BY last_used_at')
+        victims = []
+        for row in cursor.fetchall():
+            if total <= target:
+                break
+            victims.append(row['cache_key'])
+            total -= row['size']
+        for start in range(0, len(victims), 500):
+            batch = victims[start:start + 500]
+            cursor.execute(f"DELETE FROM llm_cache WHERE cache_key IN ({', '.join('?' * len(batch))})", batch)
+        removed += len(victims)
+    conn.commit()
+    conn.close()
+    if removed:
+        cache_stats.incr('evictions', removed)
+        logger.info(f"LLM cache evicted {removed} entries")
+    return removed
+
+def chat_completion(messages, model=None, response_format=None, use_cache=True, timeout=None):
+    """
+    调用大模型并返回回复文本（带响应缓存、超时、重试和备选模型）
+    Call the chat completions API and return the message content
+
+    Args:
+        messages: OpenAI 格式的消息列表
+        model: 首选模型，默认 Config.LLM_MODEL；失败时依次尝试 LLM_FALLBACK_MODELS
+        response_format: 例如 {"type": "json_object"}；要求 JSON 时只缓存可以解析的回复
+        use_cache: False 时跳过缓存读取（结果仍会写入缓存），用于需要重新生成的场景
+        timeout: 单次请求超时秒数，默认 Config.LLM_TIMEOUT_SECONDS
+
+    Returns:
+        str: 模型回复的文本
+
+    Raises:
+        LLMUnavailableError: 所有模型都失败或处于熔断状态
+    """
+    models = candidate_models(model)
+    caching = Config.LLM_CACHE_ENABLED
+    # 缓存按首选模型寻址：备选模型的回复同样缓存在这个键下
+    key = cache_key(models[0], messages, response_format) if caching else None
+
+    if caching and use_cache:
+        try:
+            cached = _cache_get(key)
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            cached = None
+        if cached is not None:
+            cache_stats.incr('hits')
+            return cached
+        cache_stats.incr('misses')
+
+    kwargs = {"messages": messages, "stream": False}
+    if response_format is not None:
+        kwargs["response_format"] = response_format
+    timeout = timeout or Config.LLM_TIMEOUT_SECONDS
+
+    content = None
+    errors = []
+    for name in models:
+        breaker = get_breaker(name)
+        if not breaker.allow():
+            errors.append(f"{name}: circuit open")
+            continue
+        try:
+            content = _call_model(name, kwargs, timeout)
+        except Exception as e:
+            # 只有超时、连接错误、429 和 5xx 说明模型不可用；4xx 等请求本身的错误不触发熔断，
+            # 服务端已经响应，半开状态下的试探请求同样视为成功
+            if is_retryable(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            logger.warning(f"Model {name} failed: {e}")
+            errors.append(f"{name}: {e}")
+            continue
+        breaker.record_success()
+        if name != models[0]:
+            logger.info(f"Served by fallback model {name}")
+        break
+    else:
+        raise LLMUnavailableError("; ".join(errors))
+
+    if caching and content:
+        try:
+            if response_format and response_format.get("type") == "json_object":
+                json.loads(content)
+            _cache_put(key, models[0], content)
+        except ValueError:
+            # 不完整的 JSON 不缓存，下次重新请求
+            pass
+        except Exception as e:
+            logger.warning(f"LLM cache store failed: {e}")
+    return content
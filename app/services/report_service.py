@@ -7,29 +7,33 @@ Report Generation Service
 2. 调用 AI 模型 (OpenAI/Qwen) 生成评估结果
 3. 使用 Jinja2 和 WeasyPrint 生成 PDF 报告
 4. 管理报告文件存储和数据库更新
+
+报告写入磁盘 (REPORT_STORAGE=disk) 或文件存储 (REPORT_STORAGE=blob，见 blob_store)，
+interviews 表只保存 report_path / report_size / report_sha256，不再把整份 PDF 写入 report_content，
+状态扫描和列表查询只读取需要的列。
 """
 
 import os
 import time
 from jinja2 import Environment
-from weasyprint import HTML
 import json
 from datetime import datetime
-from openai import OpenAI
 
 from app.core.config import Config
 from app.core.logger import report_logger as logger
 from app.core.database import get_db_connection
-
-# 初始化OpenAI客户端
-client = OpenAI(
-    api_key=Config.OPENAI_API_KEY,
-    base_url=Config.OPENAI_BASE_URL
-)
+from app.services.job_claims import REPORT_JOBS, claim_jobs, finish_job, release_job
+from app.services.llm_client import chat_completion
+from app.services.blob_store import blob_key, get_blob_store
 
 # Report storage configuration
-# app/services/report_service.py -> app/services -> app -> project -> reports
-REPORT_BASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'reports')
+REPORT_BASE_DIR = Config.REPORT_DIR
+
+# 报告生成只需要的列，避免读出 report_content / resume_content / answer_audio 等大字段
+INTERVIEW_COLUMNS = 'id, candidate_id, interviewer, start_time, status'
+CANDIDATE_COLUMNS = 'id, position_id, name, email'
+POSITION_COLUMNS = 'id, name, requirements, responsibilities'
+QUESTION_COLUMNS = 'id, interview_id, question, score_standard, answer_text, ai_score, ai_evaluation'
 
 def ensure_report_dir():
     """确保报告存储目录存在"""
@@ -52,26 +56,13 @@ def get_report_path(interview_id, candidate_name):
     filename = f"{interview_id}_{safe_name}_report.pdf"
     return os.path.join(date_dir, filename)
 
-def fetch_interviews_with_status_3():
-    """Fetch all interviews with status = 3 (interview completed)"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-    SELECT * FROM interviews WHERE status = 3
-    ''')
-    
-    interviews = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return interviews
-
 def fetch_interview_by_id(interview_id):
     """Fetch interview by ID"""
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    cursor.execute('''
-    SELECT * FROM interviews WHERE id = ?
+    cursor.execute(f'''
+    SELECT {INTERVIEW_COLUMNS} FROM interviews WHERE id = ?
     ''', (interview_id,))
     
     row = cursor.fetchone()
@@ -84,8 +75,8 @@ def fetch_candidate_info(candidate_id):
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    cursor.execute('''
-    SELECT * FROM candidates WHERE id = ?
+    cursor.execute(f'''
+    SELECT {CANDIDATE_COLUMNS} FROM candidates WHERE id = ?
     ''', (candidate_id,))
     
     row = cursor.fetchone()
@@ -98,8 +89,8 @@ def fetch_position_info(position_id):
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    cursor.execute('''
-    SELECT * FROM positions WHERE id = ?
+    cursor.execute(f'''
+    SELECT {POSITION_COLUMNS} FROM positions WHERE id = ?
     ''', (position_id,))
     
     row = cursor.fetchone()
@@ -112,8 +103,8 @@ def fetch_interview_questions(interview_id):
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    cursor.execute('''
-    SELECT * FROM interview_questions WHERE interview_id = ?
+    cursor.execute(f'''
+    SELECT {QUESTION_COLUMNS} FROM interview_questions WHERE interview_id = ? ORDER BY id
     ''', (interview_id,))
     
     questions = [dict(row) for row in cursor.fetchall()]
@@ -138,50 +129,140 @@ def call_ai_model_for_question(question, answer, position_name):
         "comments": "evaluation text"
     }}
     """
-    try:
-        response = client.chat.completions.create(
-            model=Config.LLM_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
-        )
-        return json.loads(response.choices[0].message.content)
-    except Exception as e:
-        logger.error(f"Single question evaluation failed: {e}")
-        return {"score": 0, "comments": "Evaluation failed"}
+    # 失败时直接抛出异常，由评分任务队列负责重试
+    content = chat_completion(
+        messages=[{"role": "user", "content": prompt}],
+        response_format={"type": "json_object"}
+    )
+    return json.loads(content)
+
+def score_question(question_id):
+    """
+    调用 AI 模型为单个问题的回答评分（不写入数据库）
+    Score one answer; the database connection is released before the LLM call
+
+    Returns:
+        dict or None: {"score", "comments"}，没有回答时返回 None；模型调用失败时抛出异常
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT iq.id, iq.interview_id, iq.question, iq.score_standard, iq.answer_text, 
+               c.position_id, p.name as position_name
+        FROM interview_questions iq
+        JOIN interviews i ON iq.interview_id = i.id
+        JOIN candidates c ON i.candidate_id = c.id
+        JOIN positions p ON c.position_id = p.id
+        WHERE iq.id = ?
+    ''', (question_id,))
+    data = cursor.fetchone()
+    conn.close()
+
+    if not data or not data['answer_text']:
+        return None
+    return call_ai_model_for_question(data, data['answer_text'], data['position_name'])
+
+def save_question_evaluation(cursor, question_id, result):
+    """
+    在调用方的事务中写入单个问题的评分
+    Persist one answer's evaluation inside the caller's transaction
+    """
+    cursor.execute('''
+        UPDATE interview_questions 
+        SET ai_score = ?, ai_evaluation = ?
+        WHERE id = ?
+    ''', (result.get('score', 0), result.get('comments', ''), question_id))
+
+def call_ai_model_for_questions(questions, position_name):
+    """
+    Evaluate several answers of one interview in a single AI request
+    在一次模型请求中对同一面试的多个回答评分
+
+    Args:
+        questions: [{"id", "question", "score_standard", "answer_text"}, ...]
+
+    Returns:
+        dict: {问题ID: {"score", "comments"}}，模型漏掉的问题不在结果中；模型调用失败时抛出异常
+    """
+    items = [{"id": q['id'], "question": q['question'], "standard": q['score_standard'], "answer": q['answer_text']}
+             for q in questions]
+    prompt = f"""
+    Evaluate each of the following interview answers for position: {position_name}
+    
+    Answers (JSON):
+    {json.dumps(items, ensure_ascii=False)}
+    
+    Return JSON with one entry per answer, using the same id:
+    {{
+        "evaluations": [
+            {{"id": (answer id), "score": (0-100), "comments": "evaluation text"}}
+        ]
+    }}
+    """
+    content = chat_completion(
+        messages=[{"role": "user", "content": prompt}],
+        response_format={"type": "json_object"}
+    )
+    parsed = json.loads(content)
+    evaluations = parsed.get('evaluations', []) if isinstance(parsed, dict) else parsed
+
+    wanted = {q['id'] for q in questions}
+    results = {}
+    for item in evaluations:
+        try:
+            question_id = int(item.get('id'))
+        except (AttributeError, TypeError, ValueError):
+            continue
+        if question_id in wanted:
+            results[question_id] = {"score": item.get('score', 0), "comments": item.get('comments', '')}
+    return results
+
+def score_questions(question_ids):
+    """
+    批量评分：同一面试的多个回答合并为一次模型请求（按面试分组）
+    Score several answers, one LLM request per interview
+
+    Returns:
+        dict: {问题ID: {"score", "comments"} 或 None（没有回答）}；模型漏掉的问题不在结果中
+    """
+    if not question_ids:
+        return {}
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT iq.id, iq.interview_id, iq.question, iq.score_standard, iq.answer_text, 
+               p.name as position_name
+        FROM interview_questions iq
+        JOIN interviews i ON iq.interview_id = i.id
+        JOIN candidates c ON i.candidate_id = c.id
+        JOIN positions p ON c.position_id = p.id
+        WHERE iq.id IN ({', '.join('?' * len(question_ids))})
+        ORDER BY iq.id
+    ''', list(question_ids))
+    rows = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+
+    results = {row['id']: None for row in rows if not row['answer_text']}
+    groups = {}
+    for row in rows:
+        if row['answer_text']:
+            groups.setdefault(row['interview_id'], []).append(row)
+    for group in groups.values():
+        results.update(call_ai_model_for_questions(group, group[0]['position_name']))
+    return results
 
 def evaluate_single_question(question_id):
     """
-    Worker function to evaluate a single question and update DB
-    后台任务：评估单个问题并更新数据库
+    同步评估单个问题并更新数据库（实时评分走 app/services/evaluation_queue.py）
+    Evaluate a single question and update DB synchronously
     """
     try:
+        result = score_question(question_id)
+        if result is None:
+            return
         conn = get_db_connection()
         cursor = conn.cursor()
-        
-        # Get question info
-        cursor.execute('''
-            SELECT iq.id, iq.interview_id, iq.question, iq.score_standard, iq.answer_text, 
-                   c.position_id, p.name as position_name
-            FROM interview_questions iq
-            JOIN interviews i ON iq.interview_id = i.id
-            JOIN candidates c ON i.candidate_id = c.id
-            JOIN positions p ON c.position_id = p.id
-            WHERE iq.id = ?
-        ''', (question_id,))
-        
-        data = cursor.fetchone()
-        if not data or not data['answer_text']:
-            conn.close()
-            return
-
-        result = call_ai_model_for_question(data, data['answer_text'], data['position_name'])
-        
-        cursor.execute('''
-            UPDATE interview_questions 
-            SET ai_score = ?, ai_evaluation = ?
-            WHERE id = ?
-        ''', (result.get('score', 0), result.get('comments', ''), question_id))
-        
+        save_question_evaluation(cursor, question_id, result)
         conn.commit()
         conn.close()
         logger.info(f"Evaluated question {question_id}: Score {result.get('score')}")
@@ -248,12 +329,10 @@ def call_ai_model(candidate_name, position_name, interviewer, questions):
             }}
             """
             try:
-                response = client.chat.completions.create(
-                    model=Config.LLM_MODEL,
+                summary = json.loads(chat_completion(
                     messages=[{"role": "user", "content": prompt}],
                     response_format={"type": "json_object"}
-                )
-                summary = json.loads(response.choices[0].message.content)
+                ))
                 summary['question_evaluations'] = question_evals
                 
                 model_output = {
@@ -326,37 +405,17 @@ def call_ai_model(candidate_name, position_name, interviewer, questions):
         """
         
         try:
-            # 调用大模型 API
-            # Fallback logic for models
-            models_to_try = [Config.LLM_MODEL, 'qwq-plus', 'qvq-plus', 'qvq-max']
-            
-            response = None
-            last_error = None
-            
-            for model_name in models_to_try:
-                try:
-                    logger.info(f"Trying model: {model_name}")
-                    response = client.chat.completions.create(
-                        model=model_name,
-                        messages=[
-                            {"role": "system", "content": "你是一位专业的招聘面试官，你的评估报告将被用于最终的录用决策，请务必客观、专业、详尽。"},
-                            {"role": "user", "content": prompt}
-                        ],
-                        response_format={"type": "json_object"},
-                        stream = False
-                    )
-                    break # Success
-                except Exception as e:
-                    logger.warning(f"Model {model_name} failed: {e}")
-                    last_error = e
-                    continue
-            
-            if not response:
-                raise last_error
+            # 调用大模型 API（超时、重试和备选模型由 llm_client 统一处理）
+            response = chat_completion(
+                messages=[
+                    {"role": "system", "content": "你是一位专业的招聘面试官，你的评估报告将被用于最终的录用决策，请务必客观、专业、详尽。"},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"}
+            )
 
             # 解析返回的JSON结果
-            result_text = response.choices[0].message.content
-            evaluation_result = json.loads(result_text)
+            evaluation_result = json.loads(response)
             
             # Create model output similar to the example
             model_output = {
@@ -398,6 +457,9 @@ def call_ai_model(candidate_name, position_name, interviewer, questions):
 
 def generate_pdf_report(model_output):
     """Generate PDF report using the template and model output"""
+    # WeasyPrint (及其依赖的 GTK/Pango) 加载较慢，只在真正生成 PDF 时导入
+    from weasyprint import HTML
+
     # HTML template updated to match data structure from call_ai_model
     html_template = """
     <!DOCTYPE html>
@@ -754,51 +816,70 @@ def generate_pdf_report(model_output):
 
     return pdf_bytes
 
-def update_interview_report(interview_id, report_content, report_path=None):
-    """Save the report content to the interview record and update status to 4"""
+def write_report_file(report_path, pdf_bytes):
+    """
+    写入报告文件（先写临时文件再重命名，下载时不会读到半个文件）
+
+    Returns:
+        (int, str): 文件大小和 SHA-256
+    """
+    tmp_path = f"{report_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(pdf_bytes)
+    os.replace(tmp_path, report_path)
+    return len(pdf_bytes), blob_key(pdf_bytes)
+
+def store_report(interview_id, candidate_name, pdf_bytes):
+    """
+    按 REPORT_STORAGE 保存报告
+
+    Returns:
+        (str, int, str): 报告文件路径（存入文件存储时为 None）、大小和 SHA-256
+    """
+    if Config.REPORT_STORAGE == 'blob':
+        return None, len(pdf_bytes), get_blob_store().put(pdf_bytes)
+    report_path = get_report_path(interview_id, candidate_name)
+    report_size, report_sha256 = write_report_file(report_path, pdf_bytes)
+    return report_path, report_size, report_sha256
+
+def update_interview_report(interview_id, report_path, report_size, report_sha256, claim_token=None):
+    """
+    Save the report file metadata to the interview record and update status to 4
+
+    The legacy report_content column is cleared so the row stays small. With a
+    claim_token the report is only saved while this worker still holds the job lease.
+
+    Returns:
+        bool: Whether the report was saved
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
-    
-    # Check if report_path column exists, if not create it (safe migration)
-    try:
-        cursor.execute("SELECT report_path FROM interviews LIMIT 1")
-    except Exception:
-        # SQLite or Postgres failure
-        conn.rollback() # Important for Postgres
-        try:
-            cursor.execute("ALTER TABLE interviews ADD COLUMN report_path TEXT")
-            conn.commit()
-        except:
-            # Postgres or already exists or other error
-            conn.rollback()
-            pass
-
-    if Config.DB_TYPE == 'postgres':
-        # psycopg2 handles bytes automatically
-        cursor.execute('''
-        UPDATE interviews 
-        SET report_content = %s, report_path = %s, status = 4 
-        WHERE id = %s
-        ''', (report_content, report_path, interview_id))
-    else:
-        cursor.execute('''
-        UPDATE interviews 
-        SET report_content = ?, report_path = ?, status = 4 
-        WHERE id = ?
-        ''', (report_content, report_path, interview_id))
+
+    if claim_token is not None and not finish_job(cursor, REPORT_JOBS, interview_id, claim_token):
+        conn.rollback()
+        conn.close()
+        logger.warning(f"Lease on report job {interview_id} was lost, discarding this report")
+        return False
+
+    cursor.execute('''
+    UPDATE interviews 
+    SET report_content = NULL, report_path = ?, report_size = ?, report_sha256 = ?, status = 4 
+    WHERE id = ?
+    ''', (report_path, report_size, report_sha256, interview_id))
     
     conn.commit()
     conn.close()
+    return True
 
-def generate_report_for_interview(interview_id):
-    """Generate report for a specific interview ID"""
+def generate_report_for_interview(interview_id, claim_token=None):
+    """Generate report for a specific interview ID, returns True once the report is saved"""
     logger.info(f"Starting report generation for interview ID {interview_id}")
     try:
         # 1. Get interview info
         interview = fetch_interview_by_id(interview_id)
         if not interview:
             logger.error(f"Interview {interview_id} not found")
-            return
+            return False
             
         candidate_id = interview['candidate_id']
         interviewer = interview['interviewer']
@@ -807,13 +888,13 @@ def generate_report_for_interview(interview_id):
         candidate = fetch_candidate_info(candidate_id)
         if not candidate:
             logger.error(f"Could not find candidate with ID {candidate_id}")
-            return
+            return False
         
         # 3. Get position information
         position = fetch_position_info(candidate['position_id'])
         if not position:
             logger.error(f"Could not find position with ID {candidate['position_id']}")
-            return
+            return False
         
         # 4. Get interview questions and answers
         questions = fetch_interview_questions(interview_id)
@@ -830,15 +911,14 @@ def generate_report_for_interview(interview_id):
         pdf_bytes = generate_pdf_report(model_output)
         
         # Save to file
-        report_path = get_report_path(interview_id, candidate['name'])
-        with open(report_path, 'wb') as f:
-            f.write(pdf_bytes)
+        report_path, report_size, report_sha256 = store_report(interview_id, candidate['name'], pdf_bytes)
         
-        logger.info(f"Report saved to {report_path}")
+        logger.info(f"Report saved to {report_path or 'blob ' + report_sha256} ({report_size} bytes)")
         
-        # 6. Save report to database (both blob and path)
+        # 6. Save report metadata to database
         # 7. Update interview status to 4
-        update_interview_report(interview_id, pdf_bytes, report_path)
+        if not update_interview_report(interview_id, report_path, report_size, report_sha256, claim_token):
+            return False
         
         logger.info(f"Generated report for interview ID {interview_id}, candidate: {candidate['name']}")
         return True
@@ -848,17 +928,18 @@ def generate_report_for_interview(interview_id):
         return False
 
 def process_pending_reports():
-    """Main function to process all interviews with status = 3"""
+    """
+    Main function to process all interviews with status = 3
+
+    Jobs are claimed one at a time (see app/services/job_claims.py), so several
+    report workers can run side by side without generating the same report twice.
+    """
     logger.info("Checking for interviews that need reports...")
     
-    # 1. Get all interviews with status = 3
-    interviews = fetch_interviews_with_status_3()
-    
-    if not interviews:
-        # logger.info("No interviews need reports at this time.")
-        return
-    
-    logger.info(f"Found {len(interviews)} interviews that need reports.")
-    
-    for interview in interviews:
-        generate_report_for_interview(interview['id'])
+    while True:
+        token, ids = claim_jobs(REPORT_JOBS, limit=1)
+        if not ids:
+            return
+        interview_id = ids[0]
+        if not generate_report_for_interview(interview_id, token):
+            release_job(REPORT_JOBS, interview_id, token, "report generation failed")
@@ -0,0 +1,305 @@
+"""
+Resume Text Service
+简历文本缓存服务
+
+简历 PDF 的文本只在上传时解析一次：
+- 上传候选人时简历写入文件存储 (app/services/blob_store.py)，内容的 SHA-256 写入 candidates.resume_sha256
+- 后台线程解析 PDF，把文本写入 resume_texts 表（以 SHA-256 为主键，相同的简历只保存一份）
+- 生成面试问题时按 resume_sha256 直接读取文本，不再读取和解析 PDF
+
+多页的作品集类简历按页段分发到进程池并行提取，提取的页数和文本长度受
+RESUME_MAX_PAGES / RESUME_MAX_TOKENS 限制，避免超出出题 Prompt 的 token 预算。
+
+旧数据（没有 resume_sha256）或后台解析尚未完成时，resolve_resume_text 会解析一次并补齐缓存。
+"""
+
+import io
+import os
+import time
+import atexit
+import hashlib
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.core.config import Config
+from app.core.database import get_db_connection
+from app.services.blob_store import load_blob
+
+logger = logging.getLogger(__name__)
+
+NO_RESUME_TEXT = "无简历内容"
+
+def resume_sha256(content):
+    """简历内容的 SHA-256（十六进制），没有简历时返回 None"""
+    if not content:
+        return None
+    if isinstance(content, memoryview):
+        content = bytes(content)
+    return hashlib.sha256(content).hexdigest()
+
+def estimate_tokens(text):
+    """粗略估计文本的 token 数：中日韩字符按 1 个 token，其他字符按 4 个字符 1 个 token"""
+    cjk = sum(1 for ch in text if '\u2e80' <= ch <= '\u9fff' or '\uac00' <= ch <= '\ud7af')
+    return cjk + (len(text) - cjk + 3) // 4
+
+def truncate_to_token_budget(text, max_tokens):
+    """
+    把文本截断到 token 预算以内（按估计值），max_tokens <= 0 表示不限制
+    Truncate text to an estimated token budget
+    """
+    if max_tokens <= 0 or estimate_tokens(text) <= max_tokens:
+        return text
+    tokens = 0
+    for i, ch in enumerate(text):
+        tokens += 1 if ('\u2e80' <= ch <= '\u9fff' or '\uac00' <= ch <= '\ud7af') else 0.25
+        if tokens > max_tokens:
+            return text[:i]
+    return text
+
+def _open_pdf(pdf_content):
+    """
+    打开 PDF；加密的 PDF 先尝试用空密码解密
+    Returns:
+        PdfReader, or None if the PDF is encrypted and cannot be decrypted
+    """
+    import PyPDF2
+    reader = PyPDF2.PdfReader(io.BytesIO(pdf_content))
+    if reader.is_encrypted:
+        try:
+            if not reader.decrypt(''):
+                return None
+        except Exception:
+            return None
+    return reader
+
+def _extract_pages(pdf_content, start, stop, max_tokens=0):
+    """
+    提取 [start, stop) 页的文本（在进程池中执行时，每个进程各自解析 PDF）
+    Extract the text of a page range
+
+    max_tokens > 0 时，已提取的文本超出 token 预算后不再提取后面的页。
+    """
+    reader = _open_pdf(pdf_content)
+    texts = []
+    tokens = 0
+    for page_num in range(start, stop):
+        try:
+            texts.append(reader.pages[page_num].extract_text() or '')
+        except Exception as e:
+            # 单页解析失败不影响其他页
+            logger.warning(f"PDF第{page_num + 1}页文本提取错误: {e}")
+            texts.append('')
+        if max_tokens > 0:
+            tokens += estimate_tokens(texts[-1])
+            if tokens > max_tokens:
+                break
+    return texts
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+def _process_count():
+    return Config.RESUME_EXTRACT_PROCESSES or min(4, os.cpu_count() or 1)
+
+def _get_process_pool():
+    """
+    单例模式获取解析 PDF 的进程池（spawn 启动，首次解析大文件时创建）
+    Get the page extraction process pool (Singleton)
+    """
+    global _process_pool
+    if _process_pool is None:
+        with _process_pool_lock:
+            if _process_pool is None:
+                _process_pool = ProcessPoolExecutor(max_workers=_process_count(),
+                                                    mp_context=multiprocessing.get_context('spawn'))
+                atexit.register(_process_pool.shutdown)
+    return _process_pool
+
+def _reset_process_pool(pool):
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False)
+
+def _extract_page_texts(pdf_content, page_count):
+    """
+    按页提取文本；页数达到 RESUME_PARALLEL_MIN_PAGES 时按页段分发到进程池并行提取，
+    进程池不可用时退回当前线程顺序提取
+
+    并行提取同样执行 RESUME_MAX_TOKENS 预算：按页序汇总已完成页段的 token 数，
+    超出预算后取消还没有开始的页段，并丢弃后面页段的结果（预算只对前缀有意义）。
+    """
+    max_tokens = Config.RESUME_MAX_TOKENS
+    if page_count < max(2, Config.RESUME_PARALLEL_MIN_PAGES) or _process_count() < 2:
+        return _extract_pages(pdf_content, 0, page_count, max_tokens)
+
+    pool = _get_process_pool()
+    chunks = min(page_count, _process_count() * 2)
+    bounds = [page_count * i // chunks for i in range(chunks + 1)]
+    try:
+        futures = [pool.submit(_extract_pages, pdf_content, bounds[i], bounds[i + 1], max_tokens)
+                   for i in range(chunks)]
+        texts = []
+        tokens = 0
+        for index, future in enumerate(futures):
+            page_texts = future.result()
+            texts.extend(page_texts)
+            if max_tokens > 0:
+                tokens += sum(estimate_tokens(text) for text in page_texts)
+                if tokens > max_tokens:
+                    for pending in futures[index + 1:]:
+                        pending.cancel()
+                    break
+        return texts
+    except BrokenProcessPool as e:
+        logger.warning(f"PDF解析进程池异常，改为顺序提取: {e}")
+        _reset_process_pool(pool)
+        return _extract_pages(pdf_content, 0, page_count, Config.RESUME_MAX_TOKENS)
+
+def extract_text_from_pdf(pdf_content):
+    """
+    从PDF二进制数据中提取文本内容
+    Extract text from PDF binary content
+
+    最多提取 RESUME_MAX_PAGES 页，结果按 RESUME_MAX_TOKENS 截断后用于出题 Prompt；
+    大文件按页并行提取。加密且无法用空密码打开的 PDF、扫描件（没有文本层）返回提示文本。
+
+    Args:
+        pdf_content (bytes): PDF文件二进制数据
+
+    Returns:
+        str: 提取的文本内容
+    """
+    try:
+        # 如果输入是None或空值，返回空字符串
+        if pdf_content is None or pdf_content == b'':
+            return NO_RESUME_TEXT
+        if isinstance(pdf_content, memoryview):
+            pdf_content = bytes(pdf_content)
+
+        # 创建PDF阅读器
+        pdf_reader = _open_pdf(pdf_content)
+        if pdf_reader is None:
+            return "简历PDF已加密，无法提取文本内容"
+
+        total_pages = len(pdf_reader.pages)
+        page_count = total_pages if Config.RESUME_MAX_PAGES <= 0 else min(total_pages, Config.RESUME_MAX_PAGES)
+        if page_count < total_pages:
+            logger.info(f"简历共 {total_pages} 页，只提取前 {page_count} 页")
+
+        text = "\n".join(_extract_page_texts(pdf_content, page_count))
+
+        # 没有提取到文本（例如扫描件）
+        if not text.strip():
+            return "无法从PDF中提取文本内容"
+
+        return truncate_to_token_budget(text, Config.RESUME_MAX_TOKENS)
+    except Exception as e:
+        logger.error(f"PDF文本提取错误: {str(e)}")
+        # 如果pdf解析失败，尝试作为纯文本处理
+        try:
+            if isinstance(pdf_content, bytes):
+                return truncate_to_token_budget(pdf_content.decode('utf-8', errors='ignore'),
+                                                Config.RESUME_MAX_TOKENS)
+            return str(pdf_content)
+        except:
+            return "无法解析简历内容"
+
+def get_cached_resume_text(content_sha256):
+    """按 SHA-256 读取已缓存的简历文本，未缓存时返回 None"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT text FROM resume_texts WHERE content_sha256 = ?', (content_sha256,))
+    row = cursor.fetchone()
+    conn.close()
+    return row['text'] if row else None
+
+def cache_resume_text(content, content_sha256=None):
+    """
+    解析简历并写入缓存（已缓存时直接返回缓存的文本）
+    Extract the resume text once and persist it keyed by content hash
+
+    Returns:
+        str: 简历文本
+    """
+    content_sha256 = content_sha256 or resume_sha256(content)
+    if content_sha256 is None:
+        return NO_RESUME_TEXT
+    text = get_cached_resume_text(content_sha256)
+    if text is not None:
+        return text
+
+    text = extract_text_from_pdf(content)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO resume_texts (content_sha256, text, created_at) VALUES (?, ?, ?)
+        ON CONFLICT (content_sha256) DO NOTHING
+    ''', (content_sha256, text, int(time.time())))
+    conn.commit()
+    conn.close()
+    return text
+
+def resolve_resume_text(candidate_id, content_sha256=None):
+    """
+    获取候选人的简历文本：优先读缓存，缓存缺失时才读取简历并解析
+    Return a candidate's resume text, extracting (and caching) it only on a cache miss
+    """
+    if content_sha256:
+        text = get_cached_resume_text(content_sha256)
+        if text is not None:
+            return text
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT resume_content, resume_sha256 FROM candidates WHERE id = ?', (candidate_id,))
+    row = cursor.fetchone()
+    conn.close()
+    # 旧数据的简历仍在 resume_content 列中，新数据从文件存储读取
+    content = load_blob(row['resume_sha256'], row['resume_content']) if row else None
+    if not content:
+        return NO_RESUME_TEXT
+
+    content_sha256 = resume_sha256(content)
+    text = cache_resume_text(content, content_sha256)
+    # 补齐旧数据的 resume_sha256，下次直接命中缓存
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('UPDATE candidates SET resume_sha256 = ? WHERE id = ?', (content_sha256, candidate_id))
+    conn.commit()
+    conn.close()
+    return text
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=Config.RESUME_EXTRACT_WORKERS,
+                                               thread_name_prefix='resume-extract')
+    return _executor
+
+def _cache_in_background(content, content_sha256):
+    try:
+        cache_resume_text(content, content_sha256)
+        logger.info(f"Cached resume text {content_sha256[:12]}")
+    except Exception as e:
+        # 生成问题时会按需重新解析
+        logger.error(f"Failed to cache resume text {content_sha256[:12]}: {e}")
+
+def schedule_resume_extraction(content, content_sha256=None):
+    """
+    上传简历后在后台线程中解析并缓存文本，不阻塞上传请求
+    Extract and cache the resume text in the background
+    """
+    content_sha256 = content_sha256 or resume_sha256(content)
+    if content_sha256 is None:
+        return
+    _get_executor().submit(_cache_in_background, content, content_sha256)
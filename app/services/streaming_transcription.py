@@ -0,0 +1,353 @@
+"""
+Streaming Transcription Service
+流式语音转写服务
+
+候选人回答过程中前端分段上传音频，服务端按窗口增量转写：
+1. 每个分段解码后追加到会话缓冲区
+2. 缓冲区攒够一个窗口 (STREAM_WINDOW_SECONDS) 时，优先在静音处切分 (VAD)，
+   找不到静音则硬切并与下一个窗口重叠 STREAM_OVERLAP_SECONDS 秒
+3. 窗口交给转写进程池处理；全静音的窗口直接跳过
+4. 回答结束时只需要转写最后一个不足 30 秒的窗口，再按顺序拼接文本
+
+分段需要能独立解码：前端把麦克风 PCM 重新编码为 16kHz 单声道 16bit WAV 分段上传
+（MediaRecorder 的 webm 分片除第一片外都不能单独解码）。
+
+收到的分段先写入 stream_chunks 表，转写完成的窗口（采样区间和文本）写入 stream_windows 表，
+内存中的会话只是转写进度的缓存：多进程部署（gunicorn -w N）时分段或结束请求落到另一个进程，
+该进程从数据库按序补齐分段，区间一致的窗口直接复用已保存的文本，不需要会话保持，也不会重复转写。
+"""
+
+import time
+import threading
+import logging
+import numpy as np
+
+from app.core.config import Config
+from app.core.database import get_db_connection
+from app.utils.audio import SAMPLE_RATE, decode_audio, find_split_point
+from app.services.transcription_service import (
+    get_transcription_pool, transcribe_audio, has_speech, on_transcription_complete, TranscriptionQueueFull,
+    TRANSCRIPTION_FAILED_TEXT, NO_SPEECH_TEXT
+)
+
+logger = logging.getLogger(__name__)
+
+class StreamSequenceError(Exception):
+    """分段序号不连续 (A chunk arrived out of order)"""
+    def __init__(self, expected):
+        super().__init__(f"Expected chunk seq {expected}")
+        self.expected = expected
+
+def merge_overlap(previous, current, max_chars=50):
+    """
+    拼接两个有重叠音频的窗口文本，去掉 current 开头与 previous 结尾重复的部分
+    Join two transcripts whose audio windows overlap
+    """
+    limit = min(len(previous), len(current), max_chars)
+    for size in range(limit, 0, -1):
+        if previous.endswith(current[:size]):
+            return previous + current[size:]
+    return previous + current
+
+def save_chunk(question_id, seq, chunk_bytes):
+    """
+    持久化一个音频分段；重复的分段（客户端重试）会被忽略
+    Persist one uploaded chunk so any web process can continue the stream
+
+    Returns:
+        int: 下一个期望的分段序号
+
+    Raises:
+        StreamSequenceError: 分段序号不连续
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT COUNT(*) AS received FROM stream_chunks WHERE question_id = ?', (question_id,))
+        expected = cursor.fetchone()['received']
+        if seq > expected:
+            raise StreamSequenceError(expected)
+        if seq < expected:
+            return expected
+        cursor.execute('''
+            INSERT INTO stream_chunks (question_id, seq, chunk, created_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (question_id, seq) DO NOTHING
+        ''', (question_id, seq, chunk_bytes, int(time.time())))
+        conn.commit()
+        return seq + 1
+    finally:
+        conn.close()
+
+def load_chunks(question_id, from_seq=0):
+    """按序读取已持久化的分段 [(seq, bytes)]"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT seq, chunk FROM stream_chunks WHERE question_id = ? AND seq >= ? ORDER BY seq',
+                   (question_id, from_seq))
+    chunks = [(row['seq'], bytes(row['chunk'])) for row in cursor.fetchall()]
+    conn.close()
+    return chunks
+
+def save_window(question_id, index, start, end, text):
+    """
+    持久化一个转写完成的窗口；回答已经保存后不再写入（避免留下无人清理的记录）
+    Persist the transcript of one window so other web processes can reuse it
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            INSERT INTO stream_windows (question_id, window_index, start_sample, end_sample, text, created_at)
+            SELECT ?, ?, ?, ?, ?, ?
+            WHERE NOT EXISTS (SELECT 1 FROM interview_questions WHERE id = ? AND answered_at IS NOT NULL)
+            ON CONFLICT (question_id, window_index) DO NOTHING
+        ''', (question_id, index, start, end, text, int(time.time()), question_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+def load_windows(question_id):
+    """读取已转写的窗口 {窗口序号: (起始采样, 结束采样, 文本)}"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT window_index, start_sample, end_sample, text FROM stream_windows WHERE question_id = ?
+    ''', (question_id,))
+    windows = {row['window_index']: (row['start_sample'], row['end_sample'], row['text'])
+               for row in cursor.fetchall()}
+    conn.close()
+    return windows
+
+class StreamingSession:
+    """
+    单个回答的流式转写会话
+    Streaming transcription session for one answer
+    """
+    def __init__(self, interview_id, question_id):
+        self.interview_id = interview_id
+        self.question_id = question_id
+        # 完整录音（int16），结束时写入数据库
+        self.recording = []
+        # 尚未切出窗口的音频，及其在完整录音中的起始采样位置
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.offset = 0
+        self.next_seq = 0
+        self.next_window = 0
+        # 窗口序号 -> 文本；overlapped 记录与下一个窗口有重叠的窗口
+        self.texts = {}
+        self.overlapped = set()
+        # 已持久化的窗口 (load_windows)，区间一致时复用文本
+        self.saved_windows = {}
+        self.failed = 0
+        self.outstanding = 0
+        self.updated_at = time.time()
+        self.cond = threading.Condition()
+
+    def add_chunk(self, seq, chunk_bytes):
+        """
+        追加一个音频分段；重复的分段（客户端重试）会被忽略
+        Append one uploaded chunk and dispatch any full windows
+
+        Returns:
+            int: 下一个期望的分段序号
+        """
+        with self.cond:
+            if seq < self.next_seq:
+                return self.next_seq
+            if seq != self.next_seq:
+                raise StreamSequenceError(self.next_seq)
+        
+        audio = decode_audio(chunk_bytes)
+        with self.cond:
+            # 解码期间可能有同一分段的重试请求已经写入
+            if seq != self.next_seq:
+                return self.next_seq
+            self.next_seq += 1
+            self.updated_at = time.time()
+            self.recording.append((np.clip(audio, -1.0, 1.0) * 32767).astype('<i2'))
+            self.pending = np.concatenate([self.pending, audio])
+            windows = self._cut_windows(final=False)
+        self._dispatch(windows)
+        return self.next_seq
+
+    def catch_up(self):
+        """
+        补齐已持久化但本会话还没有处理的分段（包括其他 Web 进程收到的分段）
+        Replay persisted chunks this in-memory session has not seen yet
+
+        Returns:
+            int: 下一个期望的分段序号
+        """
+        chunks = load_chunks(self.question_id, self.next_seq)
+        if chunks:
+            self.saved_windows = load_windows(self.question_id)
+        for seq, chunk_bytes in chunks:
+            self.add_chunk(seq, chunk_bytes)
+        return self.next_seq
+
+    def _cut_windows(self, final):
+        """在持有锁的情况下从缓冲区切出可转写的窗口"""
+        window = int(Config.STREAM_WINDOW_SECONDS * SAMPLE_RATE)
+        earliest = int(Config.STREAM_MIN_WINDOW_SECONDS * SAMPLE_RATE)
+        overlap = int(Config.STREAM_OVERLAP_SECONDS * SAMPLE_RATE)
+
+        windows = []
+        while len(self.pending) > window or (final and len(self.pending) > 0):
+            if len(self.pending) <= window:
+                cut, carry = len(self.pending), 0
+            else:
+                split = find_split_point(self.pending, earliest, window, threshold_db=Config.VAD_THRESHOLD_DB)
+                cut, carry = (split, 0) if split else (window, overlap)
+
+            index = self.next_window
+            self.next_window += 1
+            if carry:
+                self.overlapped.add(index)
+            windows.append((index, self.offset, self.pending[:cut]))
+            self.pending = self.pending[cut - carry:]
+            self.offset += cut - carry
+        return windows
+
+    def _dispatch(self, windows):
+        for index, start, audio in windows:
+            end = start + len(audio)
+            saved = self.saved_windows.get(index)
+            if saved is not None and saved[:2] == (start, end):
+                # 其他 Web 进程已经转写过这个窗口
+                with self.cond:
+                    self.texts[index] = saved[2]
+                continue
+            if not has_speech(audio):
+                # 全静音窗口不需要转写
+                with self.cond:
+                    self.texts[index] = ""
+                continue
+
+            with self.cond:
+                self.outstanding += 1
+            callback = (lambda _, status, text, index=index, start=start, end=end:
+                        self._on_window_done(index, start, end, status, text))
+            try:
+                if not Config.TRANSCRIBE_ASYNC:
+                    raise TranscriptionQueueFull("async transcription disabled")
+                get_transcription_pool().submit(self.question_id, audio, callback=callback)
+            except TranscriptionQueueFull:
+                # 不能丢弃音频：进程池繁忙时在当前线程内转写这个窗口
+                try:
+                    callback(None, 'completed', transcribe_audio(audio))
+                except Exception as e:
+                    logger.error(f"Window {index} of question {self.question_id} failed: {e}")
+                    callback(None, 'failed', TRANSCRIPTION_FAILED_TEXT)
+
+    def _on_window_done(self, index, start, end, status, text):
+        if status == 'completed':
+            try:
+                save_window(self.question_id, index, start, end, text)
+            except Exception as e:
+                logger.warning(f"Failed to persist window {index} of question {self.question_id}: {e}")
+        with self.cond:
+            if status == 'completed':
+                self.texts[index] = text
+            else:
+                self.texts[index] = ""
+                self.failed += 1
+            self.outstanding -= 1
+            self.cond.notify_all()
+
+    def flush(self):
+        """切出并转写最后一个不足一个窗口的片段 (Dispatch the tail window)"""
+        with self.cond:
+            windows = self._cut_windows(final=True)
+        self._dispatch(windows)
+
+    def recording_audio(self):
+        """已收到的完整录音 (float32)"""
+        with self.cond:
+            recording = np.concatenate(self.recording) if self.recording else np.zeros(0, dtype='<i2')
+        return recording.astype(np.float32) / 32768.0
+
+    def wait_text(self, timeout):
+        """
+        等待所有窗口转写完成并返回拼接后的文本
+        Wait for every dispatched window and return the joined transcript
+
+        Raises:
+            TimeoutError: 超时仍有窗口在转写
+        """
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while self.outstanding > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"{self.outstanding} windows still transcribing")
+                self.cond.wait(remaining)
+
+            text = ""
+            for index in range(self.next_window):
+                piece = self.texts.get(index, "")
+                text = merge_overlap(text, piece) if index - 1 in self.overlapped else text + piece
+            if self.failed and not text.strip():
+                text = TRANSCRIPTION_FAILED_TEXT
+            elif not text.strip():
+                text = NO_SPEECH_TEXT
+        return text
+
+    def finish(self, timeout=60):
+        """
+        转写最后一个窗口并等待所有窗口完成，返回 (完整录音, 拼接后的文本)
+        Flush the tail window, wait for results and return (recording, text)
+        """
+        self.flush()
+        text = self.wait_text(timeout)
+        return self.recording_audio(), text
+
+def finish_in_background(session):
+    """
+    finish 等待超时、回答已按异步转写保存后，在后台线程等待剩余窗口并回写文本
+    （调用方需先 pop_session，会话不再接收分段）
+    Write the transcript back once the remaining windows finish
+
+    等待时长与转写租约相同；本进程在此之前退出或等待再次超时时，
+    由转写巡检重新转写整段录音。
+    """
+    def wait_and_save():
+        try:
+            text = session.wait_text(Config.TRANSCRIBE_LEASE_SECONDS)
+        except TimeoutError as e:
+            logger.warning(f"Streaming answer for question {session.question_id} left to recovery: {e}")
+            return
+        status = 'failed' if text == TRANSCRIPTION_FAILED_TEXT else 'completed'
+        try:
+            on_transcription_complete(session.question_id, status, text)
+        except Exception as e:
+            logger.error(f"Failed to save streamed transcript of question {session.question_id}: {e}")
+
+    threading.Thread(target=wait_and_save, name=f'stream-finish-{session.question_id}', daemon=True).start()
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def _expire_sessions():
+    cutoff = time.time() - Config.STREAM_SESSION_TTL
+    for key in [key for key, session in _sessions.items() if session.updated_at < cutoff]:
+        logger.warning(f"Dropping idle streaming session for question {key[1]}")
+        del _sessions[key]
+
+def get_session(interview_id, question_id, create=True):
+    """
+    获取（或创建）某个回答的流式会话
+    Get or create the streaming session of an answer
+    """
+    key = (interview_id, question_id)
+    with _sessions_lock:
+        _expire_sessions()
+        session = _sessions.get(key)
+        if session is None and create:
+            session = StreamingSession(interview_id, question_id)
+            _sessions[key] = session
+        return session
+
+def pop_session(interview_id, question_id):
+    """结束并移除会话 (Remove the session once the answer is finished)"""
+    with _sessions_lock:
+        return _sessions.pop((interview_id, question_id), None)
@@ -0,0 +1,736 @@
+"""
+Transcription Service
+语音转写服务
+
+此模块负责：
+1. 加载语音识别后端（每个进程一份，见 app/services/asr_backends.py）
+2. 在独立的工作进程池中执行语音转文字，避免阻塞 Flask 请求线程
+3. 转写完成后回写数据库、触发 AI 评分，并在全部回答完成后更新面试状态
+
+任务以 interview_questions.id 作为 job_id；音频在提交前已经写入文件存储并落库，
+因此任务状态可以直接从数据库推导（见 get_transcription_status）。
+进程池只在内存中排队，提交时同时在数据库中记录转写租约 (transcribe_lease_expires_at)：
+进程重启或工作进程崩溃丢失的任务，在租约过期后由 recover_transcriptions 巡检重新提交。
+"""
+
+import os
+import time
+import queue
+import threading
+import logging
+import multiprocessing
+import atexit
+import numpy as np
+
+from app.core.config import Config
+from app.core.database import get_db_connection
+from app.services.asr_backends import create_backend
+from app.services.blob_store import load_blob
+from app.services.evaluation_queue import enqueue_evaluation, flush_interview_evaluations, notify_report_if_ready
+from app.utils.audio import SAMPLE_RATE, decode_audio, detect_speech_segments, pack_segments
+
+logger = logging.getLogger(__name__)
+
+# 转写失败时写入的回答文本
+TRANSCRIPTION_FAILED_TEXT = "无法识别语音 (Speech recognition failed)"
+# 录音中没有检测到语音时写入的回答文本
+NO_SPEECH_TEXT = "未检测到语音回答 (No speech detected)"
+
+# Whisper 每次处理的音频窗口长度 (30 秒)
+WINDOW_SAMPLES = 30 * SAMPLE_RATE
+
+# 全局变量缓存语音识别后端
+# Global variable to cache the ASR backend
+asr_backend = None
+model_lock = threading.Lock()
+
+def get_asr_backend():
+    """
+    单例模式获取语音识别后端（Config.ASR_BACKEND + Config.WHISPER_MODEL_SIZE）
+    Get the loaded ASR backend instance (Singleton)
+
+    加载失败时回退到原版 Whisper 的 tiny 模型，保证流程不中断。
+    """
+    global asr_backend
+    if asr_backend is None:
+        with model_lock:
+            if asr_backend is None:
+                try:
+                    asr_backend = create_backend().load()
+                except Exception as e:
+                    logger.error(f"Failed to load ASR backend '{Config.ASR_BACKEND}': {e}")
+                    # 回退到最小模型
+                    asr_backend = create_backend("whisper", "tiny").load()
+                logger.info(f"Loaded ASR backend {asr_backend!r}")
+    return asr_backend
+
+def warm_up_asr():
+    """
+    加载识别后端并执行一次空白音频的转写，提前完成权重初始化和推理缓冲区分配
+    Load the backend and run one dummy transcription in the current process
+    """
+    backend = get_asr_backend()
+    started = time.monotonic()
+    backend.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32))
+    logger.info(f"ASR backend warmed up in process {os.getpid()} ({time.monotonic() - started:.1f}s dummy run)")
+    return backend
+
+def speech_windows(audio):
+    """
+    语音活动检测预处理：去掉首尾静音，按长停顿切分并丢弃停顿，再打包为不超过 30 秒的窗口
+    VAD pre-processing: trim silence, split on long pauses, pack into 30s windows
+
+    Returns:
+        list[np.ndarray]: 需要转写的窗口，全静音时为空列表
+    """
+    if not Config.VAD_ENABLED:
+        return [audio[start:start + WINDOW_SAMPLES] for start in range(0, len(audio), WINDOW_SAMPLES)]
+
+    segments = detect_speech_segments(audio, threshold_db=Config.VAD_THRESHOLD_DB,
+                                      min_silence_s=Config.VAD_MIN_SILENCE_SECONDS,
+                                      pad_s=Config.VAD_PADDING_SECONDS)
+    total = len(audio) / SAMPLE_RATE
+    kept = sum(end - start for start, end in segments) / SAMPLE_RATE
+    if total > 0:
+        logger.info(f"VAD kept {kept:.1f}s of {total:.1f}s in {len(segments)} segments, "
+                    f"trimmed {total - kept:.1f}s ({(total - kept) / total:.0%})")
+    return pack_segments(audio, segments, WINDOW_SAMPLES)
+
+def has_speech(audio):
+    """
+    判断解码后的录音中是否包含语音 (Whether a decoded waveform contains any speech)
+    """
+    return bool(detect_speech_segments(audio, threshold_db=Config.VAD_THRESHOLD_DB))
+
+def transcribe_audio(audio_data):
+    """
+    将音频二进制数据转写为文本
+    Transcribe raw audio bytes to text
+
+    音频在内存中解码为 float32 数组，经 VAD 去掉静音后直接交给 Whisper；
+    全静音的音频直接返回 NO_SPEECH_TEXT，不会加载模型。
+
+    Args:
+        audio_data (bytes or np.ndarray): 上传的音频文件内容或已解码的波形
+
+    Returns:
+        str: 转写文本
+    """
+    windows = speech_windows(decode_audio(audio_data))
+    if not windows:
+        return NO_SPEECH_TEXT
+
+    backend = get_asr_backend()
+    # 调用语音识别后端进行转录
+    return "".join(backend.transcribe(window) for window in windows)
+
+def transcribe_batch(audio_items):
+    """
+    批量转写：把多段音频经 VAD 切成窗口后合并为一个 mel 频谱批次，编码器只前向一次，再逐条解码
+    Batched transcription: one encoder pass for all pending answers
+
+    只有一段音频时直接走 transcribe_audio（带温度回退等完整流程）；
+    批量解码失败时逐条回退到 transcribe_audio。
+
+    Args:
+        audio_items (list): 多个上传的音频文件内容或已解码的波形
+
+    Returns:
+        list: 与输入一一对应的转写文本，单条失败时对应位置为 Exception
+    """
+    if len(audio_items) == 1:
+        return [_transcribe_or_error(audio_items[0])]
+
+    results = [None] * len(audio_items)
+    windows = []  # (item_index, waveform)
+    for index, audio_data in enumerate(audio_items):
+        try:
+            item_windows = speech_windows(decode_audio(audio_data))
+        except Exception as e:
+            results[index] = e
+            continue
+        if not item_windows:
+            results[index] = NO_SPEECH_TEXT
+        windows.extend((index, window) for window in item_windows)
+
+    if not windows:
+        return results
+
+    texts = [[] for _ in audio_items]
+    try:
+        backend = get_asr_backend()
+        for offset in range(0, len(windows), Config.ASR_MAX_BATCH_SIZE):
+            chunk = windows[offset:offset + Config.ASR_MAX_BATCH_SIZE]
+            decoded = backend.transcribe_windows([audio for _, audio in chunk])
+            for (index, _), text in zip(chunk, decoded):
+                texts[index].append(text)
+    except Exception as e:
+        logger.warning(f"Batched decoding of {len(windows)} windows failed, falling back to one by one: {e}")
+        return [result if result is not None else _transcribe_or_error(audio_data)
+                for result, audio_data in zip(results, audio_items)]
+
+    return [result if result is not None else "".join(text)
+            for result, text in zip(results, texts)]
+
+def _transcribe_or_error(audio_data):
+    try:
+        return transcribe_audio(audio_data)
+    except Exception as e:
+        return e
+
+def _collect_batch(job_queue, first_job):
+    """
+    收到第一个任务后，在批处理窗口内继续收集同时到达的任务
+    Collect jobs arriving within ASR_BATCH_WINDOW_MS of the first one
+
+    Returns:
+        (list, bool): 本批次任务，以及是否收到了停止信号
+    """
+    batch = [first_job]
+    deadline = time.monotonic() + Config.ASR_BATCH_WINDOW_MS / 1000.0
+    while len(batch) < Config.ASR_MAX_BATCH_SIZE:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            job = job_queue.get(timeout=remaining)
+        except queue.Empty:
+            break
+        if job is None:
+            return batch, True
+        batch.append(job)
+    return batch, False
+
+def _worker_main(job_queue, result_queue):
+    """
+    转写工作进程入口：加载一次模型，然后循环按批处理任务
+    Worker process entry point
+    """
+    try:
+        warm_up_asr()
+    except Exception as e:
+        # 模型不可用时不处理任务：报告失败后退出，由进程池记录错误并（退避后）重新启动
+        logger.error(f"Transcription worker {os.getpid()} failed to load model: {e}")
+        result_queue.put((None, 'failed', os.getpid(), str(e)))
+        return
+    result_queue.put((None, 'ready', os.getpid(), None))
+
+    stopping = False
+    while not stopping:
+        job = job_queue.get()
+        if job is None:
+            break
+        batch, stopping = _collect_batch(job_queue, job)
+        for ticket, _, _ in batch:
+            result_queue.put((ticket, 'running', os.getpid(), None))
+
+        if len(batch) > 1:
+            logger.info(f"Transcribing a batch of {len(batch)} answers")
+        results = transcribe_batch([audio_data for _, _, audio_data in batch])
+        for (ticket, job_id, _), text in zip(batch, results):
+            if isinstance(text, Exception):
+                logger.error(f"Whisper transcription failed for job {job_id}: {text}")
+                result_queue.put((ticket, 'failed', os.getpid(), TRANSCRIPTION_FAILED_TEXT))
+            else:
+                result_queue.put((ticket, 'completed', os.getpid(), text))
+
+# 收集线程检查工作进程是否存活的间隔（秒），与结果队列是否空闲无关
+REAP_INTERVAL_SECONDS = 1.0
+# 模型加载失败后重新启动工作进程的退避时间上限（秒）
+RESPAWN_MAX_DELAY_SECONDS = 60
+
+class TranscriptionQueueFull(Exception):
+    """转写队列已满 (Too many transcription jobs queued or running)"""
+    pass
+
+class TranscriptionPool:
+    """
+    转写工作进程池
+    Transcription Worker Process Pool
+
+    - workers: 工作进程数，每个进程持有自己的 Whisper 模型
+    - queue_size: 排队 + 正在执行的任务上限，满了之后 submit 抛出 TranscriptionQueueFull
+    - on_complete: 任务结束后在父进程中回调 on_complete(job_id, status, text)
+    """
+    def __init__(self, workers, queue_size, on_complete):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.on_complete = on_complete
+        # 使用 spawn，避免子进程继承 Flask / 数据库连接池 / CUDA 的状态
+        self._ctx = multiprocessing.get_context('spawn')
+        self._job_queue = self._ctx.Queue()
+        self._result_queue = self._ctx.Queue()
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._processes = []
+        # 已完成模型加载和预热的工作进程
+        self._ready_pids = set()
+        # ticket -> {'job_id', 'status', 'pid', 'submitted_at'}
+        self._jobs = {}
+        self._next_ticket = 0
+        # 已预留 (reserve) 但还没有提交的名额
+        self._reserved = 0
+        # 最近一次模型加载失败的错误信息，以及连续失败次数（用于重启退避）
+        self.load_error = None
+        self._load_failures = 0
+        self._next_spawn_at = 0
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def start(self):
+        for _ in range(self.workers):
+            self._spawn_worker()
+        collector = threading.Thread(target=self._collect_results, name='transcription-collector')
+        collector.daemon = True
+        collector.start()
+        logger.info(f"Transcription pool started with {self.workers} workers (queue size {self.queue_size})")
+
+    def _spawn_worker(self):
+        process = self._ctx.Process(target=_worker_main, args=(self._job_queue, self._result_queue))
+        process.daemon = True
+        process.start()
+        self._processes.append(process)
+
+    def reserve(self):
+        """
+        预留一个任务名额，队列已满时抛出 TranscriptionQueueFull
+        Reserve a slot before persisting the job
+
+        预留后用 submit(..., reserved=True) 提交任务，或者用 release_reservation() 归还名额。
+        """
+        if not self._slots.acquire(blocking=False):
+            raise TranscriptionQueueFull(f"{self.queue_size} transcription jobs already pending")
+        with self._lock:
+            self._reserved += 1
+
+    def release_reservation(self):
+        """归还 reserve() 预留但没有使用的名额"""
+        with self._lock:
+            self._reserved -= 1
+        self._slots.release()
+
+    def submit(self, job_id, audio_data, callback=None, reserved=False):
+        """
+        提交转写任务，队列已满时抛出 TranscriptionQueueFull
+        Submit a job; raises TranscriptionQueueFull when the pool is saturated
+
+        Args:
+            job_id: 任务标识
+            audio_data (bytes or np.ndarray): 音频文件内容或已解码的波形
+            callback: 可选，替代 on_complete 接收本任务的结果
+            reserved: 是否使用之前 reserve() 预留的名额
+        """
+        if not reserved:
+            self.reserve()
+        with self._lock:
+            self._reserved -= 1
+            self._next_ticket += 1
+            ticket = self._next_ticket
+            self._jobs[ticket] = {'job_id': job_id, 'status': 'queued', 'pid': None,
+                                  'submitted_at': time.time(), 'callback': callback}
+        self._job_queue.put((ticket, job_id, audio_data))
+
+    def job_ids(self):
+        """排队或正在转写的任务标识 (Job ids queued or running in this process)"""
+        with self._lock:
+            return {job['job_id'] for job in self._jobs.values()}
+
+    def job_status(self, job_id):
+        with self._lock:
+            for job in self._jobs.values():
+                if job['job_id'] == job_id:
+                    return job['status']
+        return None
+
+    def ready_workers(self):
+        """已完成预热且仍在运行的工作进程数 (Number of warmed-up live workers)"""
+        with self._lock:
+            return sum(1 for process in self._processes if process.pid in self._ready_pids and process.is_alive())
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._jobs)
+
+    def free_slots(self):
+        """还能提交的任务数 (Number of jobs that can be submitted without TranscriptionQueueFull)"""
+        with self._lock:
+            return max(0, self.queue_size - len(self._jobs) - self._reserved)
+
+    def _finish(self, ticket, status, text):
+        with self._lock:
+            job = self._jobs.pop(ticket, None)
+        if job is None:
+            return
+        job_id = job['job_id']
+        self._slots.release()
+        try:
+            (job['callback'] or self.on_complete)(job_id, status, text)
+        except Exception as e:
+            logger.error(f"Error handling transcription result for job {job_id}: {e}")
+
+    def _collect_results(self):
+        next_reap = time.monotonic() + REAP_INTERVAL_SECONDS
+        while not self._stopped:
+            # 按固定间隔检查工作进程，持续有结果返回时也能及时发现退出的进程
+            if time.monotonic() >= next_reap:
+                self._reap_dead_workers()
+                next_reap = time.monotonic() + REAP_INTERVAL_SECONDS
+            try:
+                ticket, status, pid, text = self._result_queue.get(timeout=REAP_INTERVAL_SECONDS)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+
+            if status == 'ready':
+                with self._lock:
+                    self._ready_pids.add(pid)
+                    self._load_failures = 0
+                    self.load_error = None
+                logger.info(f"Transcription worker {pid} is ready")
+            elif ticket is None and status == 'failed':
+                with self._lock:
+                    self._load_failures += 1
+                    self.load_error = text
+                    delay = min(RESPAWN_MAX_DELAY_SECONDS, 2 ** (self._load_failures - 1))
+                    self._next_spawn_at = time.monotonic() + delay
+                logger.error(f"Transcription worker {pid} could not load the model, retrying in {delay}s: {text}")
+            elif status == 'running':
+                with self._lock:
+                    if ticket in self._jobs:
+                        self._jobs[ticket].update(status='running', pid=pid)
+            else:
+                self._finish(ticket, status, text)
+
+    def _reap_dead_workers(self):
+        """
+        工作进程退出时，将其正在处理的任务标记为失败并补充新进程
+        Fail the jobs of exited workers and replace them
+
+        模型加载失败退出的进程按指数退避（最长 RESPAWN_MAX_DELAY_SECONDS 秒）重新启动。
+        """
+        if self._stopped:
+            return
+        for process in list(self._processes):
+            if process.is_alive():
+                continue
+            logger.error(f"Transcription worker {process.pid} exited with code {process.exitcode}")
+            self._processes.remove(process)
+            with self._lock:
+                self._ready_pids.discard(process.pid)
+                lost = [ticket for ticket, job in self._jobs.items() if job['pid'] == process.pid]
+            for ticket in lost:
+                self._finish(ticket, 'failed', TRANSCRIPTION_FAILED_TEXT)
+        if time.monotonic() < self._next_spawn_at:
+            return
+        for _ in range(self.workers - len(self._processes)):
+            self._spawn_worker()
+
+    def shutdown(self, timeout=5):
+        self._stopped = True
+        for _ in self._processes:
+            self._job_queue.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_transcription_pool():
+    """
+    单例模式获取转写进程池（首次调用时启动工作进程）
+    Get the transcription pool (Singleton, started lazily)
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = TranscriptionPool(Config.TRANSCRIBE_WORKERS, Config.TRANSCRIBE_QUEUE_SIZE,
+                                         on_transcription_complete)
+                pool.start()
+                atexit.register(pool.shutdown)
+                _pool = pool
+    return _pool
+
+# 预热状态: idle (未启动) / warming / ready / failed
+_warmup_state = 'idle'
+_warmup_error = None
+_warmup_lock = threading.Lock()
+
+def start_asr_warmup():
+    """
+    在后台线程中预热语音识别，不阻塞服务启动
+    Warm up speech recognition in a background thread
+
+    异步模式下启动转写进程池，由每个工作进程自行加载模型并试转写一次；
+    同步模式下在当前进程中加载模型。进度通过 get_asr_readiness 查询。
+    """
+    global _warmup_state
+    with _warmup_lock:
+        if _warmup_state != 'idle':
+            return
+        _warmup_state = 'warming'
+
+    def warm_up():
+        global _warmup_state, _warmup_error
+        try:
+            if Config.TRANSCRIBE_ASYNC:
+                get_transcription_pool()
+            else:
+                warm_up_asr()
+                _warmup_state = 'ready'
+        except Exception as e:
+            logger.error(f"ASR warm-up failed: {e}")
+            _warmup_error = str(e)
+            _warmup_state = 'failed'
+
+    threading.Thread(target=warm_up, name='asr-warmup', daemon=True).start()
+
+def get_asr_readiness():
+    """
+    查询语音识别是否可以立即处理请求（供 /health 使用）
+    Report whether transcription is warmed up
+
+    Returns:
+        dict: {"ready": bool, "state": str, "workers_ready": int, "error": str or None}；
+        未启动预热时 (ASR_WARMUP 关闭) 视为就绪，模型在首次使用时加载；
+        工作进程都没有就绪且最近一次模型加载失败时 state 为 failed
+    """
+    state = _warmup_state
+    error = _warmup_error
+    workers_ready = 0
+    if Config.TRANSCRIBE_ASYNC and _pool is not None and state in ('warming', 'ready'):
+        workers_ready = _pool.ready_workers()
+        if workers_ready > 0:
+            state = 'ready'
+        elif _pool.load_error:
+            state, error = 'failed', _pool.load_error
+    return {"ready": state in ('idle', 'ready'), "state": state, "workers_ready": workers_ready, "error": error}
+
+def save_transcription(question_id, text):
+    """
+    回写转写文本
+    Persist the transcript of an answered question
+
+    Returns:
+        int or None: 问题所属的面试 ID
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('UPDATE interview_questions SET answer_text = ?, transcribe_lease_expires_at = NULL WHERE id = ?',
+                   (text, question_id))
+    cursor.execute('SELECT interview_id FROM interview_questions WHERE id = ?', (question_id,))
+    row = cursor.fetchone()
+    conn.commit()
+    conn.close()
+    return row['interview_id'] if row else None
+
+def complete_interview_if_finished(interview_id):
+    """
+    所有问题都已回答且转写完成时，将面试状态更新为"已完成" (3)
+    Mark the interview completed once every answer is in and transcribed
+
+    Returns:
+        bool: 面试是否已完成
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT COUNT(*) as total,
+               SUM(CASE WHEN answered_at IS NOT NULL THEN 1 ELSE 0 END) as answered,
+               SUM(CASE WHEN answer_text IS NOT NULL THEN 1 ELSE 0 END) as transcribed
+        FROM interview_questions
+        WHERE interview_id = ?
+    ''', (interview_id,))
+    counts = cursor.fetchone()
+
+    finished = counts['total'] > 0 and counts['total'] == counts['answered'] == counts['transcribed']
+    completed_now = False
+    if finished:
+        cursor.execute('UPDATE interviews SET status = 3 WHERE id = ? AND status < 3', (interview_id,))
+        completed_now = cursor.rowcount == 1
+        conn.commit()
+    conn.close()
+    if completed_now:
+        # 批量评分模式下立即评分该面试剩余的回答；评分任务都已结束时直接唤醒报告生成工作进程，
+        # 否则由最后一个结束的评分任务唤醒
+        try:
+            flush_interview_evaluations(interview_id)
+            notify_report_if_ready(interview_id=interview_id)
+        except Exception as e:
+            logger.error(f"Failed to flush evaluations of interview {interview_id}: {e}")
+    return finished
+
+def start_evaluation(question_id):
+    """
+    把该问题的回答加入实时评分队列
+    Enqueue the asynchronous AI evaluation of one answer
+
+    入队失败只记录日志，评分队列的巡检会把漏掉的回答重新入队。
+    """
+    try:
+        enqueue_evaluation(question_id)
+    except Exception as e:
+        logger.error(f"Failed to enqueue evaluation for question {question_id}: {e}")
+
+def on_transcription_complete(question_id, status, text):
+    """
+    转写任务结束回调（在 Web 进程的收集线程中执行）
+    Called in the web process when a worker finishes a job
+    """
+    interview_id = save_transcription(question_id, text)
+    logger.info(f"Transcription {status} for question {question_id}")
+    if interview_id is None:
+        return
+    start_evaluation(question_id)
+    complete_interview_if_finished(interview_id)
+
+def _claim_stale_transcriptions(limit, in_flight):
+    """
+    领取转写租约已过期的回答（条件更新，多个 Web 进程同时巡检时每行只有一个能领取成功）
+    Claim answers whose transcription lease expired
+
+    Returns:
+        list: [(question_id, 领取前的尝试次数)]
+    """
+    now = int(time.time())
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, transcribe_attempts FROM interview_questions
+        WHERE answered_at IS NOT NULL AND answer_text IS NULL
+          AND (transcribe_lease_expires_at IS NULL OR transcribe_lease_expires_at < ?)
+        ORDER BY id
+        LIMIT ?
+    ''', (now, limit + len(in_flight)))
+    claimed = []
+    for row in cursor.fetchall():
+        if row['id'] in in_flight or len(claimed) >= limit:
+            continue
+        cursor.execute('''
+            UPDATE interview_questions
+            SET transcribe_lease_expires_at = ?, transcribe_attempts = transcribe_attempts + 1
+            WHERE id = ? AND answer_text IS NULL
+              AND (transcribe_lease_expires_at IS NULL OR transcribe_lease_expires_at < ?)
+        ''', (now + Config.TRANSCRIBE_LEASE_SECONDS, row['id'], now))
+        if cursor.rowcount == 1:
+            claimed.append((row['id'], row['transcribe_attempts']))
+    conn.commit()
+    conn.close()
+    return claimed
+
+def _load_answer_audio(question_id):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT answer_audio_sha256, answer_audio FROM interview_questions WHERE id = ?', (question_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return load_blob(row['answer_audio_sha256'], row['answer_audio']) if row else None
+
+def _release_transcription(question_id):
+    """领取后未能提交（队列已满），归还租约和尝试次数"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE interview_questions
+        SET transcribe_lease_expires_at = NULL, transcribe_attempts = transcribe_attempts - 1
+        WHERE id = ? AND answer_text IS NULL
+    ''', (question_id,))
+    conn.commit()
+    conn.close()
+
+def recover_transcriptions():
+    """
+    重新提交丢失的转写任务
+    Resubmit answers whose transcription was lost (restart, worker crash)
+
+    已提交但没有转写文本、且转写租约已过期的回答：从文件存储重新读取录音并提交转写；
+    已经尝试 TRANSCRIBE_MAX_ATTEMPTS 次或录音丢失的回答记为识别失败，面试可以继续完成并生成报告。
+
+    Returns:
+        int: 本次处理的回答数
+    """
+    pool = get_transcription_pool() if Config.TRANSCRIBE_ASYNC else None
+    limit = pool.free_slots() if pool else Config.TRANSCRIBE_QUEUE_SIZE
+    if limit <= 0:
+        return 0
+    in_flight = pool.job_ids() if pool else set()
+
+    claimed = _claim_stale_transcriptions(limit, in_flight)
+    for index, (question_id, attempts) in enumerate(claimed):
+        audio_data = _load_answer_audio(question_id) if attempts < Config.TRANSCRIBE_MAX_ATTEMPTS else None
+        if audio_data is None:
+            logger.error(f"Giving up transcription of question {question_id} after {attempts} attempts")
+            on_transcription_complete(question_id, 'failed', TRANSCRIPTION_FAILED_TEXT)
+            continue
+
+        logger.warning(f"Resubmitting lost transcription of question {question_id} (attempt {attempts + 1})")
+        if pool is None:
+            text = _transcribe_or_error(audio_data)
+            if isinstance(text, Exception):
+                logger.error(f"Whisper transcription failed for question {question_id}: {text}")
+                on_transcription_complete(question_id, 'failed', TRANSCRIPTION_FAILED_TEXT)
+            else:
+                on_transcription_complete(question_id, 'completed', text)
+            continue
+        try:
+            pool.submit(question_id, audio_data)
+        except TranscriptionQueueFull:
+            for pending_id, _ in claimed[index:]:
+                _release_transcription(pending_id)
+            break
+    return len(claimed)
+
+_recovery_started = False
+_recovery_lock = threading.Lock()
+
+def start_transcription_recovery():
+    """
+    启动转写巡检线程：立即巡检一次，之后每 TRANSCRIBE_SWEEP_SECONDS 秒一次
+    Start the background sweep that resubmits lost transcription jobs
+    """
+    global _recovery_started
+    with _recovery_lock:
+        if _recovery_started:
+            return
+        _recovery_started = True
+
+    def sweep_loop():
+        while True:
+            try:
+                recover_transcriptions()
+            except Exception as e:
+                logger.error(f"Transcription recovery sweep failed: {e}")
+            time.sleep(Config.TRANSCRIBE_SWEEP_SECONDS)
+
+    threading.Thread(target=sweep_loop, name='transcription-recovery', daemon=True).start()
+
+def get_transcription_status(interview_id, question_id):
+    """
+    查询某个回答的转写状态
+    Get the transcription status of an answer
+
+    Returns:
+        dict or None: {"job_id", "status", "text"}；问题不存在时返回 None
+        status: not_submitted / queued / running / pending / completed
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT answer_text, answered_at FROM interview_questions
+        WHERE id = ? AND interview_id = ?
+    ''', (question_id, interview_id))
+    row = cursor.fetchone()
+    conn.close()
+
+    if not row:
+        return None
+    if row['answer_text'] is not None:
+        status = 'completed'
+    elif row['answered_at'] is None:
+        status = 'not_submitted'
+    else:
+        # 任务可能由其他 Web 进程受理，本进程查不到时统一返回 pending
+        status = (_pool.job_status(question_id) if _pool else None) or 'pending'
+    return {"job_id": question_id, "status": status, "text": row['answer_text']}
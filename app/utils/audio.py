@@ -0,0 +1,198 @@
+"""
+Audio Decoding Utilities
+音频解码工具
+
+在内存中把上传的音频解码为 Whisper 需要的 16kHz 单声道 float32 数组，
+不再落地临时文件：
+- 已经是 16kHz / 单声道 / 16bit PCM 的 WAV 直接用 NumPy 解析
+- 其他格式通过 stdin/stdout 管道交给 ffmpeg 转码
+
+另外提供基于短时能量的语音活动检测 (VAD)，用于跳过静音和寻找切分点。
+"""
+
+import io
+import wave
+import subprocess
+import numpy as np
+
+# Whisper 模型要求的采样率
+SAMPLE_RATE = 16000
+
+def decode_audio(data, sample_rate=SAMPLE_RATE):
+    """
+    将音频二进制数据解码为单声道 float32 波形 (取值范围 -1.0 ~ 1.0)
+    Decode audio bytes into a mono float32 waveform
+
+    Args:
+        data (bytes): 上传的音频文件内容 (wav/webm/ogg/mp3 ...)
+        sample_rate (int): 目标采样率
+
+    Returns:
+        np.ndarray: float32 数组，可直接传给 model.transcribe
+    """
+    if isinstance(data, np.ndarray):
+        # 已经解码过的波形（例如流式转写切出的窗口）
+        return data.astype(np.float32, copy=False)
+    audio = _decode_pcm_wav(data, sample_rate)
+    if audio is not None:
+        return audio
+    return _decode_with_ffmpeg(data, sample_rate)
+
+def _decode_pcm_wav(data, sample_rate):
+    """
+    快速路径：采样率和声道数已经符合要求的 16bit PCM WAV，无需 ffmpeg
+    Returns None when the container needs resampling or transcoding
+    """
+    if data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        return None
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wav_file:
+            if (wav_file.getnchannels() != 1 or wav_file.getsampwidth() != 2
+                    or wav_file.getframerate() != sample_rate or wav_file.getcomptype() != 'NONE'):
+                return None
+            frames = wav_file.readframes(wav_file.getnframes())
+    except (wave.Error, EOFError):
+        return None
+    return np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768.0
+
+def _decode_with_ffmpeg(data, sample_rate):
+    """
+    通过管道调用 ffmpeg 解码并重采样
+    Pipe the bytes through ffmpeg (stdin -> s16le stdout)
+    """
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le",
+        "-ac", "1",
+        "-acodec", "pcm_s16le",
+        "-ar", str(sample_rate),
+        "pipe:1"
+    ]
+    try:
+        out = subprocess.run(cmd, input=data, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='ignore')}") from e
+    return np.frombuffer(out, dtype=np.int16).astype(np.float32) / 32768.0
+
+def encode_wav(audio, sample_rate=SAMPLE_RATE):
+    """
+    将 float32 波形编码为 16bit PCM 单声道 WAV
+    Encode a float32 waveform as mono 16-bit PCM WAV bytes
+    """
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype('<i2')
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+# === 语音活动检测 (Voice Activity Detection) ===
+
+# 分帧长度（毫秒）
+VAD_FRAME_MS = 30
+
+def speech_frames(audio, sample_rate=SAMPLE_RATE, threshold_db=-40.0, frame_ms=VAD_FRAME_MS):
+    """
+    按帧计算 RMS 能量 (dBFS)，高于阈值的帧视为有声
+    Per-frame speech flags based on RMS energy
+
+    Returns:
+        np.ndarray: bool 数组，每个元素对应 frame_ms 毫秒
+    """
+    frame_len = int(sample_rate * frame_ms / 1000)
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return np.zeros(0, dtype=bool)
+    frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    energy_db = 20 * np.log10(np.maximum(rms, 1e-10))
+    return energy_db > threshold_db
+
+def detect_speech_segments(audio, sample_rate=SAMPLE_RATE, threshold_db=-40.0,
+                           min_silence_s=0.5, pad_s=0.2, frame_ms=VAD_FRAME_MS):
+    """
+    检测语音片段：短于 min_silence_s 的停顿会被合并，每个片段前后各保留 pad_s 秒
+    Detect speech segments, merging pauses shorter than min_silence_s
+
+    Returns:
+        list: [(start_sample, end_sample), ...]，全静音时返回空列表
+    """
+    flags = speech_frames(audio, sample_rate, threshold_db, frame_ms)
+    frame_len = int(sample_rate * frame_ms / 1000)
+    min_gap = max(1, int(min_silence_s * 1000 / frame_ms))
+    pad = int(pad_s * sample_rate)
+
+    segments = []
+    start = None
+    silence = 0
+    for i, is_speech in enumerate(flags):
+        if is_speech:
+            if start is None:
+                start = i
+            silence = 0
+        elif start is not None:
+            silence += 1
+            if silence >= min_gap:
+                segments.append((start, i - silence + 1))
+                start = None
+                silence = 0
+    if start is not None:
+        segments.append((start, len(flags) - silence))
+
+    return [(max(0, s * frame_len - pad), min(len(audio), e * frame_len + pad)) for s, e in segments]
+
+def find_split_point(audio, earliest, latest, sample_rate=SAMPLE_RATE, threshold_db=-40.0,
+                     frame_ms=VAD_FRAME_MS):
+    """
+    在 [earliest, latest) 区间内寻找最长静音段的中点作为切分位置，避免切断词语
+    Find the middle of the longest pause between two sample offsets
+
+    Returns:
+        int or None: 切分位置（采样点下标），区间内没有静音时返回 None
+    """
+    frame_len = int(sample_rate * frame_ms / 1000)
+    flags = speech_frames(audio[:latest], sample_rate, threshold_db, frame_ms)
+    first = earliest // frame_len
+
+    best_len = 0
+    best_mid = None
+    run_start = None
+    for i in range(first, len(flags) + 1):
+        silent = i < len(flags) and not flags[i]
+        if silent and run_start is None:
+            run_start = i
+        elif not silent and run_start is not None:
+            if i - run_start > best_len:
+                best_len = i - run_start
+                best_mid = (run_start + i) // 2
+            run_start = None
+
+    return best_mid * frame_len if best_mid is not None else None
+
+def pack_segments(audio, segments, max_samples):
+    """
+    把语音片段按顺序拼接成不超过 max_samples 的窗口，静音部分被丢弃
+    Pack speech segments into windows of at most max_samples
+
+    Whisper 会把每次输入补齐到 30 秒，零碎的短片段单独送入反而浪费算力，
+    因此相邻片段尽量合并到同一个窗口里。
+    """
+    windows = []
+    current = []
+    current_len = 0
+    for start, end in segments:
+        for offset in range(start, end, max_samples):
+            piece = audio[offset:min(end, offset + max_samples)]
+            if current_len + len(piece) > max_samples and current:
+                windows.append(np.concatenate(current))
+                current, current_len = [], 0
+            current.append(piece)
+            current_len += len(piece)
+    if current:
+        windows.append(np.concatenate(current))
+    return windows
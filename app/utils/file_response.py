@@ -0,0 +1,84 @@
+"""
+File Response Helpers
+文件下载响应工具
+
+报告和简历下载不再把整个文件读入内存再返回：
+- 本地文件交给 send_file 流式发送（gunicorn 下使用 sendfile），支持 Range 分段请求
+- 对象存储中的文件按块读取流式返回，同样支持 Range
+- 带 ETag（内容的 SHA-256）和 Last-Modified，浏览器再次预览同一报告时返回 304
+- 配置 DOWNLOAD_ACCEL 后由前端 Web 服务器直接发送文件
+  (nginx: X-Accel-Redirect，Apache/lighttpd: X-Sendfile)，Python 进程只返回响应头
+"""
+
+import os
+from urllib.parse import quote
+
+from flask import current_app, request, send_file
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+
+from app.core.config import Config
+
+def _accel_uri(path):
+    """本地文件对应的 nginx internal location 路径，不在映射目录下时返回 None"""
+    path = os.path.realpath(path)
+    for root, uri in ((Config.REPORT_DIR, Config.DOWNLOAD_ACCEL_REPORTS_URI),
+                      (Config.BLOB_DIR, Config.DOWNLOAD_ACCEL_BLOBS_URI)):
+        root = os.path.realpath(root)
+        if path.startswith(root + os.sep):
+            return uri + quote(os.path.relpath(path, root).replace(os.sep, '/'))
+    return None
+
+def _accel_response(path, download_name, etag, as_attachment, mimetype):
+    """只返回响应头，由 Web 服务器发送文件（Range 和条件请求也由 Web 服务器处理）"""
+    if Config.DOWNLOAD_ACCEL == 'nginx':
+        uri = _accel_uri(path)
+        if uri is None:
+            return None
+        header = ('X-Accel-Redirect', uri)
+    elif Config.DOWNLOAD_ACCEL == 'sendfile':
+        header = ('X-Sendfile', os.path.realpath(path))
+    else:
+        return None
+
+    response = current_app.response_class(mimetype=mimetype)
+    response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline', filename=download_name)
+    response.headers[header[0]] = header[1]
+    response.cache_control.no_cache = True
+    if etag:
+        response.set_etag(etag)
+    response = response.make_conditional(request)
+    if response.status_code == 304:
+        response.headers.pop(header[0], None)
+    return response
+
+def send_stored_file(download_name, etag=None, path=None, stream=None, size=None, last_modified=None,
+                     as_attachment=True, mimetype='application/pdf'):
+    """
+    流式发送本地文件 (path) 或已打开的二进制文件对象 (stream)
+    Stream a stored file with Range, ETag / If-None-Match and Last-Modified support
+
+    Args:
+        download_name: 下载文件名
+        etag: 内容的 SHA-256，为空时本地文件使用 mtime + 大小
+        size: stream 的字节数（已知时才支持 Range）
+        last_modified: stream 的修改时间（Unix 时间戳或 datetime），用于 Last-Modified / If-Modified-Since；
+            本地文件使用 mtime
+    """
+    try:
+        if path is not None:
+            response = _accel_response(path, download_name, etag, as_attachment, mimetype)
+            if response is not None:
+                return response
+            return send_file(path, mimetype=mimetype, as_attachment=as_attachment,
+                             download_name=download_name, etag=etag or True)
+
+        response = send_file(stream, mimetype=mimetype, as_attachment=as_attachment,
+                             download_name=download_name, etag=etag or False, conditional=False,
+                             last_modified=last_modified)
+        if size is not None:
+            response.content_length = size
+        return response.make_conditional(request, accept_ranges=True, complete_length=size)
+    except RequestedRangeNotSatisfiable as e:
+        if stream is not None:
+            stream.close()
+        return e.get_response()
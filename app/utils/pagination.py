@@ -0,0 +1,162 @@
+"""
+List Pagination Helpers
+列表分页工具
+
+后台列表接口（职位、候选人、面试）共用的分页、过滤、排序和字段选择：
+- 键集（游标）分页：按 (排序列, id) 定位下一页，翻页代价与页码无关，每页最多 ADMIN_MAX_PAGE_SIZE 行
+- 过滤和排序只允许白名单中的列，对应的复合索引由 app/core/migrations.py 创建
+- fields 参数选择返回的列，默认不返回大字段
+
+响应体仍是 JSON 数组（兼容现有前端），下一页的游标放在 X-Next-Cursor 响应头中，
+同时给出 Link: <...>; rel="next"。没有下一页时不返回这两个响应头。
+
+Query Params:
+    limit: 每页行数 (默认 ADMIN_PAGE_SIZE)
+    cursor: 上一页返回的 X-Next-Cursor
+    sort: 排序列，前缀 '-' 表示倒序，如 -start_time
+    fields: 逗号分隔的返回列，如 id,name
+    以及各接口定义的过滤参数
+"""
+
+import json
+import base64
+from datetime import datetime
+from collections import namedtuple
+from urllib.parse import urlencode
+
+from app.core.config import Config
+
+class PaginationError(ValueError):
+    """分页、过滤或排序参数不合法（返回 400）"""
+    pass
+
+# name: 查询参数名; sql: WHERE 条件（? 为参数）; parse: 参数值解析函数，返回列表时 sql 中的 (?) 展开为 IN 列表
+Filter = namedtuple('Filter', ['name', 'sql', 'parse'])
+
+# table: 表名; columns: 可返回的列; default_fields: 默认返回的列; sortable: 可排序的列 (均为 NOT NULL)
+# filters: Filter 列表
+ListSpec = namedtuple('ListSpec', ['table', 'columns', 'default_fields', 'sortable', 'filters'])
+
+def parse_int(value):
+    try:
+        return int(value)
+    except ValueError:
+        raise PaginationError(f"Invalid integer: {value!r}")
+
+def parse_int_list(value):
+    """逗号分隔的整数列表，如 status=3,4"""
+    return [parse_int(v) for v in value.split(',') if v.strip()]
+
+def parse_timestamp(value):
+    """Unix 时间戳或 ISO 日期 (2024-05-01 / 2024-05-01T09:30:00)，按服务器本地时区"""
+    if value.isdigit():
+        return int(value)
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except ValueError:
+        raise PaginationError(f"Invalid date: {value!r}")
+
+def encode_cursor(sort, value, row_id):
+    raw = json.dumps([sort, value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor, sort):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, row_id = json.loads(raw)
+    except Exception:
+        raise PaginationError("Invalid cursor")
+    if cursor_sort != sort:
+        raise PaginationError("Cursor does not match the sort order")
+    return value, row_id
+
+def _page_size(args):
+    limit = parse_int(args['limit']) if args.get('limit') else Config.ADMIN_PAGE_SIZE
+    return max(1, min(limit, Config.ADMIN_MAX_PAGE_SIZE))
+
+def _fields(spec, args):
+    if not args.get('fields'):
+        return list(spec.default_fields)
+    fields = [f.strip() for f in args['fields'].split(',') if f.strip()]
+    unknown = [f for f in fields if f not in spec.columns]
+    if unknown:
+        raise PaginationError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def paginate(cursor, spec, args):
+    """
+    按请求参数查询一页数据
+    Run one keyset-paginated, filtered, projected page query
+
+    Args:
+        cursor: 数据库游标
+        spec: ListSpec
+        args: 请求参数 (request.args)
+
+    Returns:
+        (list, str): 当前页的行（dict），以及下一页游标（没有下一页时为 None）
+    """
+    limit = _page_size(args)
+    fields = _fields(spec, args)
+
+    sort = args.get('sort') or 'id'
+    sort_column = sort.lstrip('-')
+    if sort_column not in spec.sortable:
+        raise PaginationError(f"Cannot sort by {sort_column!r}")
+    descending = sort.startswith('-')
+    direction = 'DESC' if descending else 'ASC'
+
+    where, params = [], []
+    for f in spec.filters:
+        value = args.get(f.name)
+        if value is None or value == '':
+            continue
+        parsed = f.parse(value)
+        if isinstance(parsed, list):
+            # 列表参数展开为 IN (?, ?, ...)
+            if not parsed:
+                continue
+            where.append(f.sql.replace('(?)', f"({', '.join('?' * len(parsed))})"))
+            params.extend(parsed)
+        else:
+            where.append(f.sql)
+            params.append(parsed)
+
+    if args.get('cursor'):
+        value, row_id = decode_cursor(args['cursor'], sort)
+        op = '<' if descending else '>'
+        if sort_column == 'id':
+            where.append(f"id {op} ?")
+            params.append(row_id)
+        else:
+            where.append(f"({sort_column}, id) {op} (?, ?)")
+            params.extend([value, row_id])
+
+    # 游标需要 id 和排序列，不在 fields 中时额外查询但不返回
+    select = list(dict.fromkeys(fields + ['id', sort_column]))
+    order = f"{sort_column} {direction}, id {direction}" if sort_column != 'id' else f"id {direction}"
+    sql = f"SELECT {', '.join(select)} FROM {spec.table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {order} LIMIT ?"
+
+    cursor.execute(sql, params + [limit + 1])
+    rows = [dict(row) for row in cursor.fetchall()]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, last[sort_column], last['id'])
+    return [{f: row[f] for f in fields} for row in rows], next_cursor
+
+def page_headers(request, next_cursor):
+    """下一页的 X-Next-Cursor 和 Link 响应头"""
+    if not next_cursor:
+        return {}
+    args = request.args.to_dict()
+    args['cursor'] = next_cursor
+    return {
+        'X-Next-Cursor': next_cursor,
+        'Link': f'<{request.base_url}?{urlencode(args)}>; rel="next"',
+    }
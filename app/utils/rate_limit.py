@@ -0,0 +1,64 @@
+"""
+Rate Limiting Utilities
+限流工具
+
+按模型服务商（OPENAI_BASE_URL 的主机名）共享的令牌桶限流器，
+多个线程并发调用同一个服务商时，总请求速率不超过配置的每分钟请求数。
+"""
+
+import time
+import threading
+from urllib.parse import urlparse
+
+class RateLimiter:
+    """
+    令牌桶限流器 (Thread-safe token bucket)
+
+    - rate_per_minute: 每分钟允许的请求数，<= 0 表示不限流
+    - burst: 桶容量，即允许的瞬时突发请求数
+    """
+    def __init__(self, rate_per_minute, burst=1):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        获取一个令牌，必要时阻塞等待
+        Block until a request may be sent
+
+        Returns:
+            float: 等待的秒数
+        """
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(base_url, rate_per_minute, burst=1):
+    """
+    获取某个服务商共享的限流器（同一进程内按主机名复用）
+    Get the limiter shared by every caller of one provider
+    """
+    provider = urlparse(base_url).netloc if base_url else 'api.openai.com'
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limiter = RateLimiter(rate_per_minute, burst)
+            _limiters[provider] = limiter
+        return limiter
@@ -1,6 +1,13 @@
 import axios from 'axios'
 import { ElMessage } from 'element-plus'
 
+declare module 'axios' {
+  interface AxiosRequestConfig {
+    // 返回完整响应（需要读取响应头时使用，如分页游标 X-Next-Cursor）
+    fullResponse?: boolean
+  }
+}
+
 const service = axios.create({
   baseURL: '/api',
   timeout: 10000,
@@ -21,7 +28,7 @@ service.interceptors.request.use(
 
 service.interceptors.response.use(
   (response) => {
-    return response.data
+    return response.config.fullResponse ? response : response.data
   },
   (error) => {
     const msg = error.response?.data?.error || error.response?.data?.message || 'Request failed'
@@ -34,4 +41,27 @@ service.interceptors.response.use(
   }
 )
 
+export interface Page<T> {
+  items: T[]
+  nextCursor: string | null
+}
+
+// 后台列表接口按键集分页：响应体是当前页，下一页游标在 X-Next-Cursor 响应头中
+export const getPage = async <T>(url: string, params: Record<string, any> = {}): Promise<Page<T>> => {
+  const response: any = await service.get(url, { params, fullResponse: true })
+  return { items: response.data, nextCursor: response.headers['x-next-cursor'] || null }
+}
+
+// 逐页读取整个列表（用于下拉框等需要全部选项的场景，配合 fields 只取需要的列）
+export const getAll = async <T>(url: string, params: Record<string, any> = {}): Promise<T[]> => {
+  const items: T[] = []
+  let cursor: string | null = null
+  do {
+    const page: Page<T> = await getPage<T>(url, cursor ? { ...params, cursor } : params)
+    items.push(...page.items)
+    cursor = page.nextCursor
+  } while (cursor)
+  return items
+}
+
 export default service
@@ -0,0 +1,119 @@
+// 麦克风录音：采集 PCM，降采样为 16kHz 单声道，按固定时长切成可独立解码的 16bit WAV 分段
+// （MediaRecorder 的 webm 分片除第一片外不能单独解码，流式转写接口需要 WAV 分段）
+
+export const TARGET_SAMPLE_RATE = 16000
+
+export const encodeWav = (samples: Float32Array, sampleRate = TARGET_SAMPLE_RATE): Blob => {
+  const buffer = new ArrayBuffer(44 + samples.length * 2)
+  const view = new DataView(buffer)
+  const writeString = (offset: number, text: string) => {
+    for (let i = 0; i < text.length; i++) view.setUint8(offset + i, text.charCodeAt(i))
+  }
+  writeString(0, 'RIFF')
+  view.setUint32(4, 36 + samples.length * 2, true)
+  writeString(8, 'WAVE')
+  writeString(12, 'fmt ')
+  view.setUint32(16, 16, true)
+  view.setUint16(20, 1, true) // PCM
+  view.setUint16(22, 1, true) // 单声道
+  view.setUint32(24, sampleRate, true)
+  view.setUint32(28, sampleRate * 2, true)
+  view.setUint16(32, 2, true)
+  view.setUint16(34, 16, true)
+  writeString(36, 'data')
+  view.setUint32(40, samples.length * 2, true)
+  for (let i = 0; i < samples.length; i++) {
+    const s = Math.max(-1, Math.min(1, samples[i]))
+    view.setInt16(44 + i * 2, s < 0 ? s * 0x8000 : s * 0x7fff, true)
+  }
+  return new Blob([buffer], { type: 'audio/wav' })
+}
+
+const concat = (parts: Float32Array[]): Float32Array => {
+  const result = new Float32Array(parts.reduce((total, part) => total + part.length, 0))
+  let offset = 0
+  for (const part of parts) {
+    result.set(part, offset)
+    offset += part.length
+  }
+  return result
+}
+
+export class WavRecorder {
+  // 每个分段的时长（秒）
+  chunkSeconds: number
+  // 每切出一个分段调用一次（按顺序）
+  onChunk: (chunk: Blob) => void
+
+  private stream: MediaStream | null = null
+  private context: AudioContext | null = null
+  private processor: ScriptProcessorNode | null = null
+  private source: MediaStreamAudioSourceNode | null = null
+  // 降采样时上一块剩余的小数位置
+  private position = 0
+  private pending: Float32Array[] = []
+  private pendingLength = 0
+  private recording: Float32Array[] = []
+
+  constructor(onChunk: (chunk: Blob) => void, chunkSeconds = 5) {
+    this.onChunk = onChunk
+    this.chunkSeconds = chunkSeconds
+  }
+
+  async start() {
+    this.stream = await navigator.mediaDevices.getUserMedia({ audio: true })
+    this.context = new AudioContext()
+    this.source = this.context.createMediaStreamSource(this.stream)
+    this.processor = this.context.createScriptProcessor(4096, 1, 1)
+    this.processor.onaudioprocess = (event) => {
+      this.push(this.downsample(event.inputBuffer.getChannelData(0)))
+    }
+    this.source.connect(this.processor)
+    this.processor.connect(this.context.destination)
+  }
+
+  // 停止录音，发出最后一个分段，返回完整录音（WAV），用于流式上传失败时整段提交
+  async stop(): Promise<Blob> {
+    this.processor?.disconnect()
+    this.source?.disconnect()
+    this.stream?.getTracks().forEach(track => track.stop())
+    await this.context?.close()
+    this.flush()
+    return encodeWav(concat(this.recording))
+  }
+
+  private downsample(input: Float32Array): Float32Array {
+    const ratio = this.context!.sampleRate / TARGET_SAMPLE_RATE
+    const output: number[] = []
+    let position = this.position
+    // 对每个输出采样覆盖的输入区间取平均（简单的抗混叠）
+    while (position + ratio <= input.length) {
+      // 上一块末尾的采样已经用过，从本块开头继续
+      const start = Math.max(0, Math.floor(position))
+      const end = Math.max(start + 1, Math.floor(position + ratio))
+      let sum = 0
+      for (let i = start; i < end; i++) sum += input[i]
+      output.push(sum / (end - start))
+      position += ratio
+    }
+    this.position = position - input.length
+    return Float32Array.from(output)
+  }
+
+  private push(samples: Float32Array) {
+    this.recording.push(samples)
+    this.pending.push(samples)
+    this.pendingLength += samples.length
+    if (this.pendingLength >= this.chunkSeconds * TARGET_SAMPLE_RATE) {
+      this.flush()
+    }
+  }
+
+  private flush() {
+    if (this.pendingLength === 0) return
+    const chunk = encodeWav(concat(this.pending))
+    this.pending = []
+    this.pendingLength = 0
+    this.onChunk(chunk)
+  }
+}
@@ -0,0 +1,103 @@
+"""
+ASR Backend Benchmark
+语音识别后端基准测试
+
+在一组固定的样本录音上对比各模型大小在 float32 (whisper) 与 int8 (whisper-int8) 后端下的
+实时率 (RTF = 转写耗时 / 音频时长，越小越快) 和错误率。
+
+样本目录需要自行准备（仓库不附带录音，例如使用 Common Voice 的 zh-CN 片段或征得同意的面试回答录音），
+每个 <name>.wav 需要有同名的 <name>.txt 作为参考文本。
+中文文本按字计算错误率 (CER)，其他文本按空格分词计算 WER。
+测试强制在 CPU 上运行，以便与 int8 后端公平对比。
+
+Usage:
+    python scripts/benchmark_asr.py <samples_dir> [--models tiny base small] [--backends whisper whisper-int8]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import re
+import time
+import argparse
+from pathlib import Path
+
+from app.utils.audio import SAMPLE_RATE, decode_audio
+from app.services.asr_backends import BACKENDS, create_backend
+
+_CJK = re.compile(r'[一-鿿]')
+_PUNCTUATION = re.compile(r'[^\w\s]')
+
+def tokenize(text):
+    """中文按字切分，其他语言按空格切分，忽略标点和大小写"""
+    text = _PUNCTUATION.sub(' ', text.lower())
+    if _CJK.search(text):
+        return [ch for ch in text if not ch.isspace()]
+    return text.split()
+
+def edit_distance(ref, hyp):
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1]
+
+def load_samples(samples_dir):
+    samples = []
+    for wav_path in sorted(Path(samples_dir).glob("*.wav")):
+        ref_path = wav_path.with_suffix(".txt")
+        if not ref_path.exists():
+            print(f"Skipping {wav_path.name}: missing {ref_path.name}")
+            continue
+        audio = decode_audio(wav_path.read_bytes())
+        samples.append((wav_path.name, audio, ref_path.read_text(encoding="utf-8").strip()))
+    return samples
+
+def run(backend_name, model_size, samples):
+    started = time.perf_counter()
+    backend = create_backend(backend_name, model_size).load()
+    load_time = time.perf_counter() - started
+
+    # 预热一次，避免首次推理的内存分配计入结果
+    backend.transcribe(samples[0][1][:SAMPLE_RATE])
+
+    elapsed = 0.0
+    errors = 0
+    words = 0
+    for _, audio, reference in samples:
+        started = time.perf_counter()
+        text = backend.transcribe(audio)
+        elapsed += time.perf_counter() - started
+        ref_tokens = tokenize(reference)
+        errors += edit_distance(ref_tokens, tokenize(text))
+        words += len(ref_tokens)
+    return load_time, elapsed, errors / max(words, 1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("samples_dir", help="包含 <name>.wav 和参考文本 <name>.txt 的目录")
+    parser.add_argument("--models", nargs="+", default=["tiny", "base", "small"])
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    args = parser.parse_args()
+    # 基准测试只比较 CPU 推理；必须在 torch 首次导入前设置
+    os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+    samples = load_samples(args.samples_dir)
+    if not samples:
+        sys.exit(f"No <name>.wav + <name>.txt pairs found in {args.samples_dir}")
+    duration = sum(len(audio) for _, audio, _ in samples) / SAMPLE_RATE
+
+    print(f"{len(samples)} samples, {duration:.1f}s of audio")
+    print(f"{'model':<8} {'backend':<14} {'load (s)':>9} {'total (s)':>10} {'RTF':>7} {'WER':>7}")
+    print("-" * 60)
+    for model_size in args.models:
+        for backend_name in args.backends:
+            load_time, elapsed, wer = run(backend_name, model_size, samples)
+            print(f"{model_size:<8} {backend_name:<14} {load_time:>9.2f} {elapsed:>10.2f} "
+                  f"{elapsed / duration:>7.3f} {wer:>7.1%}")
+
+if __name__ == "__main__":
+    main()
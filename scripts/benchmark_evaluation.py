@@ -0,0 +1,117 @@
+"""
+Answer Evaluation Benchmark
+回答评分基准测试
+
+比较两种评分模式在一场面试上的耗时和 token 用量：
+- single: 每个回答一次模型请求 (call_ai_model_for_question)，可用 --concurrency 模拟评分线程池
+- batch:  所有回答合并为一次模型请求 (call_ai_model_for_questions)
+
+默认调用 Config 中配置的真实模型（关闭响应缓存），token 用量取自接口返回的 usage；
+--dry-run 不调用模型，按估算方法统计请求数和提示词 token 数，可离线比较提示词开销。
+
+Usage:
+    python scripts/benchmark_evaluation.py [--questions 10] [--concurrency 1] [--dry-run]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import Config
+from app.services import report_service
+from app.services.llm_client import get_usage_stats
+from app.services.resume_text import estimate_tokens
+
+POSITION = "高级 Python 后端工程师"
+
+SAMPLE_QUESTIONS = [
+    ("请简述 Python 中 GIL 的概念及其对多线程的影响。", "准确解释 GIL，说明 CPU 密集型和 IO 密集型场景的区别",
+     "GIL 是全局解释器锁，同一时刻只有一个线程执行字节码，所以 CPU 密集型任务用多进程，IO 密集型任务多线程仍然有效。"),
+    ("什么是 RESTful API？请举例说明。", "理解资源、HTTP 方法、状态码",
+     "RESTful 用 URL 表示资源，用 GET、POST、PUT、DELETE 表示操作，比如 GET /users/1 获取用户，返回 200 或 404。"),
+    ("如何在 PostgreSQL 中优化慢查询？", "提及 Explain, 索引, 配置优化等",
+     "先用 EXPLAIN ANALYZE 看执行计划，找顺序扫描的地方加索引，再看 work_mem 之类的参数。"),
+    ("描述一次你排查线上故障的经历。", "问题定位过程5分，解决方案5分",
+     "有一次接口超时，通过日志发现数据库连接池耗尽，加了连接池监控并修复了连接泄漏。"),
+    ("你如何设计一个分布式任务队列？", "可靠性5分，扩展性5分",
+     "任务存数据库或消息队列，工作进程领取时加租约，失败重试并有死信，保证至少执行一次。"),
+]
+
+def build_questions(count):
+    questions = []
+    for i in range(count):
+        question, standard, answer = SAMPLE_QUESTIONS[i % len(SAMPLE_QUESTIONS)]
+        questions.append({"id": i + 1, "question": question, "score_standard": standard, "answer_text": answer})
+    return questions
+
+class DryRunModel:
+    """替代 chat_completion：不调用模型，记录请求数并估算提示词 token 数"""
+    def __init__(self, question_ids):
+        self.question_ids = question_ids
+        self.requests = 0
+        self.prompt_tokens = 0
+
+    def __call__(self, messages, **kwargs):
+        self.requests += 1
+        self.prompt_tokens += sum(estimate_tokens(message['content']) for message in messages)
+        return json.dumps({"score": 80, "comments": "ok",
+                           "evaluations": [{"id": i, "score": 80, "comments": "ok"} for i in self.question_ids]})
+
+def run_single(questions, concurrency):
+    def evaluate(question):
+        return report_service.call_ai_model_for_question(question, question['answer_text'], POSITION)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        return list(pool.map(evaluate, questions))
+
+def run_batch(questions, batch_size):
+    results = {}
+    for start in range(0, len(questions), batch_size):
+        results.update(report_service.call_ai_model_for_questions(questions[start:start + batch_size], POSITION))
+    return results
+
+def measure(label, func, dry_run_model):
+    before = get_usage_stats()
+    if dry_run_model:
+        dry_run_model.requests = dry_run_model.prompt_tokens = 0
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    if dry_run_model:
+        requests, prompt, completion = dry_run_model.requests, dry_run_model.prompt_tokens, '-'
+    else:
+        after = get_usage_stats()
+        requests = after['requests'] - before['requests']
+        prompt = after['prompt_tokens'] - before['prompt_tokens']
+        completion = after['completion_tokens'] - before['completion_tokens']
+    print(f"{label:<8} {elapsed:>9.2f}s {requests:>9} {prompt:>14} {completion:>18}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--questions', type=int, default=10, help='面试中的回答数')
+    parser.add_argument('--concurrency', type=int, default=1, help='single 模式同时进行的请求数')
+    parser.add_argument('--batch-size', type=int, default=Config.EVAL_BATCH_SIZE, help='batch 模式每次请求的回答数')
+    parser.add_argument('--dry-run', action='store_true', help='不调用模型，只估算提示词 token')
+    args = parser.parse_args()
+
+    questions = build_questions(args.questions)
+    Config.LLM_CACHE_ENABLED = False
+    dry_run_model = None
+    if args.dry_run:
+        dry_run_model = DryRunModel([q['id'] for q in questions])
+        report_service.chat_completion = dry_run_model
+    elif not Config.OPENAI_API_KEY:
+        print("OPENAI_API_KEY is not set; use --dry-run to compare prompt sizes offline")
+        sys.exit(1)
+
+    print(f"{args.questions} answers, model {Config.LLM_MODEL}{' (dry run, estimated tokens)' if args.dry_run else ''}")
+    print(f"{'mode':<8} {'wall time':>10} {'requests':>9} {'prompt tokens':>14} {'completion tokens':>18}")
+    measure('single', lambda: run_single(questions, args.concurrency), dry_run_model)
+    measure('batch', lambda: run_batch(questions, max(1, args.batch_size)), dry_run_model)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Resume PDF Extraction Benchmark
+简历 PDF 文本提取基准测试
+
+对 data/resumes 下的样例简历比较顺序提取和按页并行提取的耗时。
+样例简历通常只有一两页，--pages 会把每份简历的页面重复拼接成指定页数的 PDF，
+用来模拟 30 页以上的作品集。
+
+输出每份简历的页数、提取字符数（截断前 / 截断后）以及两种方式的耗时。
+
+Usage:
+    python scripts/benchmark_pdf_extract.py [--dir data/resumes] [--pages 40] [--repeat 3] [--processes 4]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import io
+import glob
+import time
+import argparse
+
+from app.core.config import Config
+from app.services import resume_text
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def expand_pdf(content, pages):
+    """把 PDF 的页面循环重复，拼成 pages 页的新 PDF"""
+    import PyPDF2
+    reader = PyPDF2.PdfReader(io.BytesIO(content))
+    writer = PyPDF2.PdfWriter()
+    for i in range(pages):
+        writer.add_page(reader.pages[i % len(reader.pages)])
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+def timed(content, parallel_min_pages, repeat):
+    """返回 (最短耗时, 提取结果)"""
+    Config.RESUME_PARALLEL_MIN_PAGES = parallel_min_pages
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = resume_text.extract_text_from_pdf(content)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, text
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dir', default=os.path.join(PROJECT_ROOT, 'data', 'resumes'), help='样例简历目录')
+    parser.add_argument('--pages', type=int, default=40, help='把每份简历扩展到的页数，0 表示使用原始文件')
+    parser.add_argument('--repeat', type=int, default=3, help='每种方式重复次数，取最短耗时')
+    parser.add_argument('--processes', type=int, default=Config.RESUME_EXTRACT_PROCESSES,
+                        help='并行提取的进程数，0 表示 min(4, CPU 核数)')
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.dir, '*.pdf')))
+    if not files:
+        print(f"No PDF files found in {args.dir}")
+        sys.exit(1)
+
+    Config.RESUME_EXTRACT_PROCESSES = args.processes
+    # 基准测试关注提取速度，页数不设上限
+    Config.RESUME_MAX_PAGES = 0
+    max_tokens = Config.RESUME_MAX_TOKENS
+
+    # 预先启动进程池，避免把进程启动时间计入第一份简历
+    resume_text._get_process_pool().submit(int).result()
+
+    print(f"{'resume':<36} {'pages':>5} {'chars':>8} {'kept':>8} {'serial':>9} {'parallel':>9} {'speedup':>8}")
+    total_serial = total_parallel = 0.0
+    for path in files:
+        with open(path, 'rb') as f:
+            content = f.read()
+        if args.pages > 0:
+            content = expand_pdf(content, args.pages)
+
+        Config.RESUME_MAX_TOKENS = 0
+        serial, full_text = timed(content, sys.maxsize, args.repeat)
+        Config.RESUME_MAX_TOKENS = max_tokens
+        parallel, kept_text = timed(content, 2, args.repeat)
+        total_serial += serial
+        total_parallel += parallel
+
+        pages = args.pages or '-'
+        print(f"{os.path.basename(path)[:36]:<36} {pages:>5} {len(full_text):>8} {len(kept_text):>8} "
+              f"{serial:>8.3f}s {parallel:>8.3f}s {serial / parallel:>7.2f}x")
+
+    print(f"{'TOTAL':<36} {'':>5} {'':>8} {'':>8} {total_serial:>8.3f}s {total_parallel:>8.3f}s "
+          f"{total_serial / total_parallel:>7.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+SQL Placeholder Translation Benchmark
+SQL 占位符翻译基准测试
+
+对比 PGCursorAdapter 旧的 sql.replace('?', '%s') 写法与
+translate_placeholders 的 LRU 缓存路径，测试语句取自 app/api/interview.py 的热点查询。
+
+Usage:
+    python scripts/benchmark_sql_translation.py [iterations]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import timeit
+from app.core.database import translate_placeholders
+
+# app/api/interview.py 中每个请求都会执行的语句
+INTERVIEW_QUERIES = [
+    '''
+            SELECT i.id, i.question_count, i.voice_reading, i.start_time, i.status,
+                   c.name as candidate_name, c.email as candidate_email,
+                   p.name as position_name, p.requirements
+            FROM interviews i
+            JOIN candidates c ON i.candidate_id = c.id
+            JOIN positions p ON c.position_id = p.id
+            WHERE i.token = ?
+        ''',
+    'SELECT id FROM interviews WHERE token = ?',
+    '''
+                SELECT id, question as text
+                FROM interview_questions
+                WHERE interview_id = ?
+                ORDER BY id ASC
+                LIMIT 1
+            ''',
+    '''
+                SELECT id, question as text
+                FROM interview_questions
+                WHERE interview_id = ? AND id > ?
+                ORDER BY id ASC
+                LIMIT 1
+            ''',
+    '''
+            UPDATE interview_questions
+            SET answer_audio = ?, answer_text = ?, answered_at = ?
+            WHERE id = ? AND interview_id = ?
+        ''',
+    '''
+                SELECT COUNT(*) as total, SUM(CASE WHEN answered_at IS NOT NULL THEN 1 ELSE 0 END) as answered
+                FROM interview_questions
+                WHERE interview_id = ?
+            ''',
+    'UPDATE interviews SET status = 3 WHERE id = ?',
+    'UPDATE interviews SET voice_reading = ? WHERE token = ?',
+]
+
+def run_replace():
+    for sql in INTERVIEW_QUERIES:
+        sql.replace('?', '%s')
+
+def run_uncached():
+    for sql in INTERVIEW_QUERIES:
+        translate_placeholders.__wrapped__(sql)
+
+def run_cached():
+    for sql in INTERVIEW_QUERIES:
+        translate_placeholders(sql).pyformat
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    statements = iterations * len(INTERVIEW_QUERIES)
+    
+    print(f"{len(INTERVIEW_QUERIES)} statements x {iterations} iterations")
+    print(f"{'path':<28} {'total (s)':>10} {'per stmt (us)':>14}")
+    print("-" * 54)
+    for label, func in [
+        ("str.replace (old)", run_replace),
+        ("tokenizer, uncached", run_uncached),
+        ("tokenizer, LRU cached", run_cached),
+    ]:
+        elapsed = timeit.timeit(func, number=iterations)
+        print(f"{label:<28} {elapsed:>10.3f} {elapsed / statements * 1e6:>14.3f}")
+    print(translate_placeholders.cache_info())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Startup Import-Time Benchmark
+启动导入耗时基准测试
+
+在全新的解释器中用 python -X importtime 测量以下入口的冷启动耗时：
+- create_app(): Web 服务（导入全部蓝图）
+- scripts/generate_interview_questions.py: 面试问题生成脚本
+- scripts/generate_interview_reports.py: 报告生成脚本
+
+输出每个入口的总导入耗时和最慢的顶层模块。torch / whisper / weasyprint / openai / PyPDF2
+等重量级依赖应当在首次使用时才导入，若在启动阶段被导入，或总耗时超过 --max-seconds，
+脚本以非零状态退出，可用于 CI 守护冷启动时间。
+
+Usage:
+    python scripts/benchmark_startup.py [--max-seconds 2.0] [--top 10]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import subprocess
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 启动阶段不允许导入的模块
+HEAVY_MODULES = ['torch', 'whisper', 'weasyprint', 'openai', 'PyPDF2']
+
+ENTRY_POINTS = {
+    'create_app': 'from app.api import create_app; create_app()',
+    'generate_interview_questions': 'import scripts.generate_interview_questions',
+    'generate_interview_reports': 'import scripts.generate_interview_reports',
+}
+
+def measure(code):
+    """
+    在子进程中执行 code，解析 -X importtime 输出
+
+    Returns:
+        (dict, list): {模块名: 累计耗时(us)}，以及顶层模块 [(模块名, 累计耗时(us))]
+    """
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT, ASR_WARMUP='false')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Entry point failed:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    top_level = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+        if not name[1:].startswith(' '):
+            # 缩进为一个空格的行是直接由入口导入的顶层模块
+            top_level.append((name.strip(), int(cumulative)))
+    return modules, top_level
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-seconds', type=float, default=2.0,
+                        help='单个入口允许的最大总导入耗时')
+    parser.add_argument('--top', type=int, default=10, help='显示最慢的顶层模块数量')
+    args = parser.parse_args()
+
+    failed = False
+    for label, code in ENTRY_POINTS.items():
+        modules, top_level = measure(code)
+        total = sum(cumulative for _, cumulative in top_level) / 1e6
+        heavy = [name for name in HEAVY_MODULES if name in modules]
+
+        print(f"== {label}: {total:.3f}s total import time, {len(modules)} modules")
+        for name, cumulative in sorted(top_level, key=lambda item: -item[1])[:args.top]:
+            print(f"   {cumulative / 1e3:>9.1f} ms  {name}")
+        if heavy:
+            print(f"   FAIL: heavy modules imported at startup: {', '.join(heavy)}")
+            failed = True
+        if total > args.max_seconds:
+            print(f"   FAIL: exceeds --max-seconds {args.max_seconds}")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
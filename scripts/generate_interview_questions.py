@@ -17,134 +17,50 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import time
-import schedule
 import threading
 import json
-import io
 from datetime import datetime
-from openai import OpenAI
-import PyPDF2
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 from app.core.config import Config
 from app.core.logger import question_logger as logger
-from app.core.database import get_db_connection
+from app.core.database import get_db_connection, init_db, insert_many
+from app.services.job_claims import QUESTION_JOBS, claim_jobs, finish_job, release_job
+from app.services.job_notify import run_job_loop
+from app.services.resume_text import resolve_resume_text
+from app.services.llm_client import chat_completion, get_cache_stats
 
-# 初始化OpenAI客户端
-client = OpenAI(
-    api_key=Config.OPENAI_API_KEY,
-    base_url=Config.OPENAI_BASE_URL
-)
-    
-def extract_text_from_pdf(pdf_content):
-    """
-    从PDF二进制数据中提取文本内容
-    Extract text from PDF binary content
-    
-    Args:
-        pdf_content (bytes): PDF文件二进制数据
-        
-    Returns:
-        str: 提取的文本内容
-    """
-    try:
-        # 如果输入是None或空值，返回空字符串
-        if pdf_content is None or pdf_content == b'':
-            return "无简历内容"
-            
-        # 创建BytesIO对象处理二进制数据
-        pdf_file = io.BytesIO(pdf_content)
-        
-        # 创建PDF阅读器
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        
-        # 提取所有页面的文本
-        text = ""
-        for page_num in range(len(pdf_reader.pages)):
-            page = pdf_reader.pages[page_num]
-            text += page.extract_text() + "\n"
-        
-        # 如果没有提取到文本，尝试使用另一种方法
-        if not text.strip():
-            return "无法从PDF中提取文本内容"
-            
-        return text
-    except Exception as e:
-        logger.error(f"PDF文本提取错误: {str(e)}")
-        # 如果pdf解析失败，尝试作为纯文本处理
-        try:
-            if isinstance(pdf_content, bytes):
-                return pdf_content.decode('utf-8', errors='ignore')
-            return str(pdf_content)
-        except:
-            return "无法解析简历内容"
-
-def get_pending_interviews():
+def get_interview_context(interview_id):
     """
-    获取未开始的面试列表
-    Fetch all pending interviews (status = 0)
+    一次查询获取生成问题所需的候选人、岗位信息和已缓存的简历文本（不读取简历 PDF）
+    Fetch candidate, position and cached resume text of an interview in one query
     """
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    # 获取所有状态为0(未开始)的面试
     cursor.execute('''
-        SELECT i.id, i.candidate_id, i.interviewer, i.start_time
+        SELECT c.id as candidate_id, c.name as candidate_name, c.resume_sha256, rt.text as resume_text,
+               p.name as position_name, p.requirements, p.responsibilities
         FROM interviews i
-        WHERE i.status = 0
-    ''')
-    
-    interviews = cursor.fetchall()
-    conn.close()
-    return interviews
-
-def get_candidate_info(candidate_id):
-    """
-    获取候选人信息
-    Fetch candidate info by ID
-    """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT c.id, c.name, c.email, c.resume_content, c.position_id
-        FROM candidates c
-        WHERE c.id = ?
-    ''', (candidate_id,))
-    
-    candidate = cursor.fetchone()
-    conn.close()
-    return candidate
-
-def get_position_info(position_id):
-    """
-    获取岗位信息
-    Fetch position info by ID
-    """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+        JOIN candidates c ON i.candidate_id = c.id
+        JOIN positions p ON c.position_id = p.id
+        LEFT JOIN resume_texts rt ON rt.content_sha256 = c.resume_sha256
+        WHERE i.id = ?
+    ''', (interview_id,))
     
-    cursor.execute('''
-        SELECT p.id, p.name, p.requirements, p.responsibilities
-        FROM positions p
-        WHERE p.id = ?
-    ''', (position_id,))
-    
-    position = cursor.fetchone()
+    context = cursor.fetchone()
     conn.close()
-    return position
+    return context
 
-def generate_questions(resume_content, position_name, requirements, responsibilities):
+def generate_questions(resume_text, position_name, requirements, responsibilities):
     """
-    根据简历内容和岗位信息生成面试问题
+    根据简历文本和岗位信息生成面试问题
     Generate interview questions using LLM
+
+    大模型调用失败时抛出异常，由调用方释放任务等待重试；
+    只有开启 Config.LLM_MOCK_QUESTIONS（本地开发）时才返回固定的示例问题。
     """
-    # 解析简历内容 : 抽取pdf中resume_content的文本内容
-    try:
-        resume_text = extract_text_from_pdf(resume_content)
-    except:
-        resume_text = "无法解析简历内容"
-    
     # 返回json格式参考
     json_format = [
          {"question": "请介绍一下你的专业背景和技能", "score_standard": "清晰度5分，相关性5分，深度5分"},
@@ -153,32 +69,32 @@ def generate_questions(resume_content, position_name, requirements, responsibili
          {"question": "你如何看待团队合作？", "score_standard": "协作能力5分，沟通能力5分，角色意识5分"},
          {"question": "你对这个行业的未来趋势有什么看法？", "score_standard": "了解程度5分，前瞻性5分，分析能力5分"}
     ]
-    # 调用OpenAI API生成面试问题
+    # 调用OpenAI API生成面试问题（相同的岗位和简历会命中响应缓存）
     try:
-        response = client.chat.completions.create(
-            #model="gpt-4", # 或其他适合的模型
-            model=Config.LLM_MODEL,
+        questions_json = chat_completion(
             messages=[
                 {"role": "system", "content": "你是一名专业的招聘面试官，请根据岗位要求和候选人简历生成5个针对性的技术面试问题，每个问题附带评分标准,返回标准的json格式。"},
                 {"role": "user", "content": f"岗位名称: {position_name}\n岗位要求: {requirements}\n岗位职责: {responsibilities}\n候选人简历: {resume_text}\n\n请生成10个面试问题和评分标准，JSON格式参考 {json_format} ，每个问题满分10分。"}
             ],
-            response_format={"type": "json_object"},
-            stream = False
+            response_format={"type": "json_object"}
         )
         
         # 解析响应内容
-        questions_json = response.choices[0].message.content
         questions = json.loads(questions_json)
         
         # 兼容不同格式的返回 (有时模型会返回 {'questions': [...]})
         if isinstance(questions, dict) and 'questions' in questions:
             questions = questions['questions']
+        if not isinstance(questions, list) or not questions:
+            raise ValueError(f"模型没有返回问题列表: {questions_json[:200]}")
             
         return questions
 
     except Exception as e:
         logger.error(f"生成面试问题时出错: {str(e)}")
-        logger.info("使用Mock数据作为回退...")
+        if not Config.LLM_MOCK_QUESTIONS:
+            raise
+        logger.info("LLM_MOCK_QUESTIONS 已开启，使用Mock数据作为回退...")
         return [
             {"question": "请介绍一下你的专业背景和技能（Mock）", "score_standard": "清晰度5分，相关性5分，深度5分"},
             {"question": "你认为自己最适合这个岗位的原因是什么？（Mock）", "score_standard": "匹配度5分，自我认知5分，表达5分"},
@@ -186,131 +102,148 @@ def generate_questions(resume_content, position_name, requirements, responsibili
         ]
  
 
-def save_questions(interview_id, questions):
+def save_questions(interview_id, questions, claim_token=None):
     """
     将生成的问题保存到数据库
     Save generated questions to DB
+
+    传入 claim_token 时，只有仍持有该任务租约才会写入（见 app/services/job_claims.py）。
+
+    Returns:
+        bool: 是否已保存
     """
     conn = get_db_connection()
     cursor = conn.cursor()
     
+    # 更新面试状态为"试题已备好"(1)
+    if claim_token is None:
+        cursor.execute('UPDATE interviews SET status = 1 WHERE id = ?', (interview_id,))
+    elif not finish_job(cursor, QUESTION_JOBS, interview_id, claim_token):
+        conn.rollback()
+        conn.close()
+        logger.warning(f"面试ID: {interview_id} 的任务租约已失效，丢弃本次生成的问题")
+        return False
+    
+    rows = []
     for question in questions:
         # 将score_standard转换为JSON字符串(如果是字典类型)
         score_standard = question.get('score_standard', '')
         if isinstance(score_standard, dict):
             score_standard = json.dumps(score_standard, ensure_ascii=False)
-            
-        cursor.execute('''
-            INSERT INTO interview_questions (interview_id, question, score_standard)
-            VALUES (?, ?, ?)
-        ''', (interview_id, question.get('question'), score_standard))
+        rows.append((interview_id, question.get('question'), score_standard))
     
-    # 更新面试状态为"试题已备好"(1)
-    cursor.execute('''
-        UPDATE interviews SET status = 1 , question_count = ? WHERE id = ?
-    ''', (len(questions), interview_id))
+    # 所有问题一次批量写入
+    insert_many(conn, 'interview_questions', ['interview_id', 'question', 'score_standard'], rows, returning=None)
+    
+    cursor.execute('UPDATE interviews SET question_count = ? WHERE id = ?', (len(questions), interview_id))
     
     conn.commit()
     conn.close()
+    return True
+
+def process_interview(interview_id, claim_token=None):
+    """
+    为单个面试生成并保存问题
+    Generate and save the questions of one interview
+
+    Returns:
+        int: 生成的问题数，候选人或岗位信息缺失、或租约已失效时返回 0
+    """
+    context = get_interview_context(interview_id)
+    if not context:
+        logger.error(f"无法找到面试ID: {interview_id} 的候选人或岗位信息")
+        return 0
+    
+    logger.info(f"为面试ID: {interview_id}, 候选人: {context['candidate_name']}, 岗位: {context['position_name']} 生成面试问题")
+    
+    # 简历文本在上传时已解析缓存；缓存缺失（旧数据或后台解析未完成）时才解析 PDF
+    resume_text = context['resume_text']
+    if resume_text is None:
+        try:
+            resume_text = resolve_resume_text(context['candidate_id'], context['resume_sha256'])
+        except Exception as e:
+            logger.error(f"面试ID: {interview_id} 的简历解析失败: {e}")
+            resume_text = "无法解析简历内容"
+    
+    # 生成面试问题
+    questions = generate_questions(resume_text, context['position_name'],
+                                   context['requirements'], context['responsibilities'])
+    
+    # 保存问题到数据库
+    if not save_questions(interview_id, questions, claim_token):
+        return 0
+
+    logger.info(f"已为面试ID: {interview_id} 成功生成 {len(questions)} 个问题")
+    return len(questions)
 
 def process_pending_interviews():
     """
     处理未开始的面试的主逻辑
     Main processing function
+
+    每个工作线程循环领取一个待处理的面试（原子领取，多个脚本实例可以同时运行），
+    同时进行的 LLM 请求数不超过 Config.LLM_MAX_CONCURRENCY，
+    请求速率由按服务商共享的限流器控制；结束后输出本轮吞吐量和耗时统计。
     """
     logger.info("开始处理未开始的面试...")
     
-    # 获取所有未开始的面试
-    pending_interviews = get_pending_interviews()
-    
-    if not pending_interviews:
-        # logger.info("没有未开始的面试需要处理")
-        return
+    latencies = []
+    failures = []
     
-    logger.info(f"找到 {len(pending_interviews)} 个待处理的面试")
-    
-    for interview in pending_interviews:
-        # Check if interview is dict (Postgres) or Row (SQLite)
-        if isinstance(interview, dict):
-            interview_id = interview['id']
-            candidate_id = interview['candidate_id']
-            interviewer = interview['interviewer']
-            start_time = interview['start_time']
-        else:
-            # Assume tuple/Row
-            interview_id = interview['id']
-            candidate_id = interview['candidate_id']
-            interviewer = interview['interviewer']
-            start_time = interview['start_time']
-        
-        # 获取候选人信息
-        candidate = get_candidate_info(candidate_id)
-        if not candidate:
-            logger.error(f"无法找到候选人ID: {candidate_id}的信息")
-            continue
-        
-        if isinstance(candidate, dict):
-            candidate_name = candidate['name']
-            candidate_email = candidate['email']
-            resume_content = candidate['resume_content']
-            position_id = candidate['position_id']
-        else:
-            candidate_name = candidate['name']
-            candidate_email = candidate['email']
-            resume_content = candidate['resume_content']
-            position_id = candidate['position_id']
-        
-        # 获取岗位信息
-        position = get_position_info(position_id)
-        if not position:
-            logger.error(f"无法找到岗位ID: {position_id}的信息")
-            continue
-            
-        if isinstance(position, dict):
-            position_name = position['name']
-            requirements = position['requirements']
-            responsibilities = position['responsibilities']
-        else:
-            position_name = position['name']
-            requirements = position['requirements']
-            responsibilities = position['responsibilities']
-        
-        logger.info(f"为面试ID: {interview_id}, 候选人: {candidate_name}, 岗位: {position_name} 生成面试问题")
-        
-        # 生成面试问题
-        questions = generate_questions(resume_content, position_name, requirements, responsibilities)
-        
-        # 保存问题到数据库
-        save_questions(interview_id, questions)
-
-        logger.info(f"已为面试ID: {interview_id} 成功生成 {len(questions)} 个问题")
+    def work():
+        while True:
+            token, ids = claim_jobs(QUESTION_JOBS, limit=1)
+            if not ids:
+                return
+            interview_id = ids[0]
+            started = time.monotonic()
+            try:
+                count = process_interview(interview_id, token)
+            except Exception as e:
+                logger.error(f"为面试ID: {interview_id} 生成问题失败: {e}")
+                count = 0
+                release_job(QUESTION_JOBS, interview_id, token, e)
+            else:
+                if not count:
+                    release_job(QUESTION_JOBS, interview_id, token, "missing candidate/position or lost lease")
+            (latencies if count else failures).append(time.monotonic() - started)
+    
+    run_started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, Config.LLM_MAX_CONCURRENCY),
+                            thread_name_prefix='question-gen') as executor:
+        for future in [executor.submit(work) for _ in range(max(1, Config.LLM_MAX_CONCURRENCY))]:
+            future.result()
+    
+    if latencies or failures:
+        log_run_summary(len(latencies) + len(failures), len(failures), latencies, time.monotonic() - run_started)
+
+def log_run_summary(total, failed, latencies, wall_time):
+    """输出本轮处理的吞吐量和单个面试的耗时分布"""
+    summary = f"本轮处理 {total} 个面试: 成功 {total - failed}, 失败 {failed}, 总耗时 {wall_time:.1f}s"
+    if latencies and wall_time > 0:
+        latencies = sorted(latencies)
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        summary += (f", 吞吐量 {len(latencies) / wall_time * 60:.1f} 个/分钟"
+                    f", 单个耗时 p50 {p50:.1f}s / p95 {p95:.1f}s / max {latencies[-1]:.1f}s")
+    stats = get_cache_stats()
+    if stats['hits'] + stats['misses']:
+        summary += f", LLM 缓存命中率 {stats['hit_rate']:.0%} ({stats['hits']}/{stats['hits'] + stats['misses']})"
+    logger.info(summary)
 
 def run_scheduler():
     """
-    定时任务调度器
-    Scheduler runner
+    任务调度：新建面试时通过通知立即唤醒，没有通知时按 JOB_POLL_INTERVAL_SECONDS 兜底轮询
+    Event-driven scheduler with polling as a safety net
     """
-    schedule.every(5).minutes.do(process_pending_interviews)
-    
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+    run_job_loop(QUESTION_JOBS, process_pending_interviews)
 
 if __name__ == "__main__":
-  
-    # 立即运行一次，然后启动定时任务
-    process_pending_interviews()
-    
-    # 在后台线程中运行定时任务
-    scheduler_thread = threading.Thread(target=run_scheduler)
-    scheduler_thread.daemon = True
-    scheduler_thread.start()
-    
-    logger.info("面试问题生成定时任务已启动，每5分钟执行一次")
+    # 执行未执行的数据库迁移
+    init_db()
+    logger.info(f"面试问题生成服务已启动，收到新面试通知时立即处理，兜底轮询间隔 {Config.JOB_POLL_INTERVAL_SECONDS} 秒")
     
     try:
-        # 保持主线程运行
-        while True:
-            time.sleep(60)
+        run_scheduler()
     except KeyboardInterrupt:
-        logger.info("程序已停止") 
+        logger.info("程序已停止")
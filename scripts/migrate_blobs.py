@@ -0,0 +1,101 @@
+"""
+Blob Migration Script
+BLOB 数据迁移脚本
+
+把仍保存在数据库 BLOB 列中的旧数据迁移到文件存储 (app/services/blob_store.py)：
+- interview_questions.answer_audio -> answer_audio_sha256
+- candidates.resume_content -> resume_sha256
+- interviews.report_content -> report_sha256 / report_size
+
+按主键分批迁移：每批只查询 ID，再逐行读取 BLOB 写入文件存储，同一时间内存中只有一个文件；
+每批提交一次，中断后重新运行会从剩余的行继续。写回引用时要求 BLOB 列仍非空，
+迁移期间被重新提交的回答不会被旧内容覆盖。
+
+Usage:
+    python scripts/migrate_blobs.py [--batch-size 100] [--dry-run]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import argparse
+
+from app.core.config import Config
+from app.core.database import get_db_connection, init_db
+from app.services.blob_store import get_blob_store
+
+# (表, BLOB 列, 引用列, 大小列)
+BLOB_COLUMNS = [
+    ('interview_questions', 'answer_audio', 'answer_audio_sha256', None),
+    ('candidates', 'resume_content', 'resume_sha256', None),
+    ('interviews', 'report_content', 'report_sha256', 'report_size'),
+]
+
+def migrate_column(table, blob_column, ref_column, size_column=None, batch_size=100, dry_run=False):
+    """
+    迁移一列 BLOB，返回 (迁移行数, 字节数)
+    Move one BLOB column into the blob store in primary-key batches
+    """
+    store = get_blob_store()
+    set_size = f", {size_column} = ?" if size_column else ""
+    moved = moved_bytes = 0
+    last_id = 0
+    while True:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT id FROM {table}
+            WHERE id > ? AND {blob_column} IS NOT NULL
+            ORDER BY id
+            LIMIT ?
+        ''', (last_id, batch_size))
+        ids = [row['id'] for row in cursor.fetchall()]
+        if not ids:
+            conn.close()
+            break
+
+        for row_id in ids:
+            cursor.execute(f'SELECT {blob_column} FROM {table} WHERE id = ?', (row_id,))
+            row = cursor.fetchone()
+            content = row[blob_column] if row else None
+            if not content:
+                continue
+            content = bytes(content)
+            moved += 1
+            moved_bytes += len(content)
+            if dry_run:
+                continue
+            key = store.put(content)
+            params = (key, len(content), row_id) if size_column else (key, row_id)
+            cursor.execute(f'''
+                UPDATE {table} SET {blob_column} = NULL, {ref_column} = ?{set_size}
+                WHERE id = ? AND {blob_column} IS NOT NULL
+            ''', params)
+
+        conn.commit()
+        conn.close()
+        last_id = ids[-1]
+        print(f"  {table}.{blob_column}: {moved} rows, {moved_bytes / 1024 / 1024:.1f} MB (up to id {last_id})")
+    return moved, moved_bytes
+
+def migrate_blobs(batch_size=100, dry_run=False):
+    init_db()
+    print(f"Migrating BLOB columns to blob store '{Config.BLOB_STORE}'{' (dry run)' if dry_run else ''}...")
+    started = time.time()
+    total_rows = total_bytes = 0
+    for table, blob_column, ref_column, size_column in BLOB_COLUMNS:
+        rows, size = migrate_column(table, blob_column, ref_column, size_column, batch_size, dry_run)
+        total_rows += rows
+        total_bytes += size
+    print(f"Done: {total_rows} rows, {total_bytes / 1024 / 1024:.1f} MB in {time.time() - started:.1f}s")
+    if Config.DB_TYPE == 'postgres' and total_rows and not dry_run:
+        print("Run VACUUM on the migrated tables to return the freed space")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=100, help='每批迁移的行数')
+    parser.add_argument('--dry-run', action='store_true', help='只统计需要迁移的行数和大小')
+    args = parser.parse_args()
+    migrate_blobs(args.batch_size, args.dry_run)
@@ -3,10 +3,12 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import sqlite3
 import psycopg2
-from psycopg2.extras import execute_values
+from psycopg2.extras import RealDictCursor, execute_values
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 import os
 from app.core.config import Config
+from app.core.database import PGConnectionAdapter
+from app.core.migrations import migrate
 
 # PostgreSQL 配置
 PG_HOST = Config.PG_HOST
@@ -54,70 +56,14 @@ def get_pg_conn():
         port=PG_PORT,
         user=PG_USER,
         password=PG_PASSWORD,
-        dbname=PG_DB
+        dbname=PG_DB,
+        cursor_factory=RealDictCursor
     )
 
 def create_pg_tables(pg_conn):
-    cursor = pg_conn.cursor()
-    
-    # 1. positions 表
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS positions (
-        id SERIAL PRIMARY KEY,
-        name TEXT NOT NULL,
-        requirements TEXT NOT NULL,
-        responsibilities TEXT NOT NULL,
-        quantity INTEGER NOT NULL,
-        status TEXT NOT NULL,
-        created_at INTEGER NOT NULL,
-        recruiter TEXT NOT NULL
-    );
-    """)
-    
-    # 2. candidates 表
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS candidates (
-        id SERIAL PRIMARY KEY,
-        position_id INTEGER NOT NULL REFERENCES positions(id),
-        name TEXT NOT NULL,
-        email TEXT NOT NULL,
-        resume_content BYTEA
-    );
-    """)
-    
-    # 3. interviews 表
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS interviews (
-        id SERIAL PRIMARY KEY,
-        candidate_id INTEGER NOT NULL REFERENCES candidates(id),
-        interviewer TEXT NOT NULL,
-        start_time INTEGER NOT NULL,
-        status INTEGER NOT NULL DEFAULT 0,
-        is_passed INTEGER NOT NULL DEFAULT 0,
-        token TEXT,
-        report_content BYTEA,
-        question_count INTEGER DEFAULT 0,
-        voice_reading INTEGER DEFAULT 0
-    );
-    """)
-    
-    # 4. interview_questions 表
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS interview_questions (
-        id SERIAL PRIMARY KEY,
-        interview_id INTEGER NOT NULL REFERENCES interviews(id),
-        question TEXT NOT NULL,
-        score_standard TEXT,
-        answer_audio BYTEA,
-        answer_text TEXT,
-        answered_at INTEGER,
-        score INTEGER,
-        comments TEXT
-    );
-    """)
-    
-    pg_conn.commit()
-    print("PostgreSQL 表结构创建完成")
+    # 表结构和索引定义在 app/core/migrations.py，与 SQLite 共用同一套版本化迁移
+    version = migrate(PGConnectionAdapter(pg_conn), 'postgres')
+    print(f"PostgreSQL 表结构创建完成 (schema 版本 {version})")
 
 def migrate_data():
     sqlite_conn = get_sqlite_conn()
@@ -4,6 +4,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import psycopg2
 import time
 from app.core.config import Config
+from app.core.database import PGConnectionAdapter, insert_many
+from app.services.blob_store import get_blob_store
 import logging
 
 # 配置日志
@@ -42,27 +44,16 @@ def seed_data():
         ]
         
         logger.info("插入职位数据...")
-        for p in positions_data:
-            cursor.execute("""
-                INSERT INTO positions (name, requirements, responsibilities, quantity, status, created_at, recruiter)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                RETURNING id;
-            """, (p[0], p[1], p[2], p[3], p[4], int(time.time()), p[5]))
-        
-        # 获取刚才插入的职位ID（为了简化，这里重新查询一下，或者直接假设ID）
-        # 在实际脚本中，最好使用 RETURNING id
-        # 这里为了演示，我们先提交一次
-        conn.commit()
-        
-        cursor.execute("SELECT id FROM positions WHERE name = %s", ("高级 Python 后端工程师",))
-        py_position_id = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT id FROM positions WHERE name = %s", ("前端开发工程师 (React)",))
-        fe_position_id = cursor.fetchone()[0]
+        now = int(time.time())
+        db = PGConnectionAdapter(conn)
+        py_position_id, fe_position_id, _ = insert_many(
+            db, 'positions',
+            ['name', 'requirements', 'responsibilities', 'quantity', 'status', 'created_at', 'recruiter'],
+            [(p[0], p[1], p[2], p[3], p[4], now, p[5]) for p in positions_data])
 
         # 2. 插入候选人 (Candidates)
-        # 模拟一个空的 PDF 内容 (bytea)
-        mock_resume_content = b"%PDF-1.4 Mock Resume Content..."
+        # 模拟一个空的 PDF 内容，写入文件存储，数据库只保存引用
+        mock_resume_sha256 = get_blob_store().put(b"%PDF-1.4 Mock Resume Content...")
         
         candidates_data = [
             (py_position_id, "张三", "zhangsan@example.com"),
@@ -71,14 +62,8 @@ def seed_data():
         ]
         
         logger.info("插入候选人数据...")
-        candidate_ids = []
-        for c in candidates_data:
-            cursor.execute("""
-                INSERT INTO candidates (position_id, name, email, resume_content)
-                VALUES (%s, %s, %s, %s)
-                RETURNING id;
-            """, (c[0], c[1], c[2], mock_resume_content))
-            candidate_ids.append(cursor.fetchone()[0])
+        candidate_ids = insert_many(db, 'candidates', ['position_id', 'name', 'email', 'resume_sha256'],
+                                    [(c[0], c[1], c[2], mock_resume_sha256) for c in candidates_data])
 
         # 3. 插入面试记录 (Interviews)
         # 使用第一个候选人 (张三) 创建一个面试
@@ -101,11 +86,8 @@ def seed_data():
         ]
         
         logger.info("插入面试问题...")
-        for q in questions_data:
-            cursor.execute("""
-                INSERT INTO interview_questions (interview_id, question, score_standard)
-                VALUES (%s, %s, %s)
-            """, (interview_id, q[0], q[1]))
+        insert_many(db, 'interview_questions', ['interview_id', 'question', 'score_standard'],
+                    [(interview_id, q[0], q[1]) for q in questions_data], returning=None)
 
         conn.commit()
         logger.info("✅ 模拟数据填充成功！")
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import database
+from app.core.config import Config
+from app.services import blob_store
+
+
+@pytest.fixture
+def empty_db(tmp_path, monkeypatch):
+    """临时 SQLite 数据库（尚未建表），前后重置连接池和文件存储"""
+    monkeypatch.setattr(Config, 'DB_TYPE', 'sqlite')
+    monkeypatch.setattr(Config, 'DB_PATH', str(tmp_path / 'test.db'))
+    monkeypatch.setattr(Config, 'BLOB_DIR', str(tmp_path / 'blobs'))
+    monkeypatch.setattr(blob_store, '_store', None)
+    database.close_pool()
+    yield Config.DB_PATH
+    database.close_pool()
+
+
+@pytest.fixture
+def sqlite_db(empty_db):
+    """已执行全部迁移的临时 SQLite 数据库；测试模块可以定义同名 fixture 在此基础上写入数据"""
+    database.init_db()
+    return empty_db
@@ -0,0 +1,82 @@
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import Config
+from app.core.database import get_db_connection
+from app.api.admin import CANDIDATE_LIST, INTERVIEW_LIST
+from app.utils.pagination import PaginationError, paginate
+
+
+@pytest.fixture
+def sqlite_db(sqlite_db):
+    conn = get_db_connection()
+    conn.execute("INSERT INTO positions (name, requirements, responsibilities, quantity, status, created_at, recruiter) "
+                 "VALUES ('Backend', '', '', 1, 'open', 0, 'hr')")
+    conn.execute("INSERT INTO positions (name, requirements, responsibilities, quantity, status, created_at, recruiter) "
+                 "VALUES ('Frontend', '', '', 1, 'open', 0, 'hr')")
+    for i in range(4):
+        conn.execute("INSERT INTO candidates (position_id, name, email) VALUES (?, ?, ?)",
+                     (1 if i < 3 else 2, f'C{i}', f'c{i}@example.com'))
+    # 25 场面试，start_time 有重复值，验证 (start_time, id) 游标不会漏行或重复
+    for i in range(25):
+        conn.execute("INSERT INTO interviews (candidate_id, interviewer, start_time, status) VALUES (?, 'hr', ?, ?)",
+                     (i % 4 + 1, 1000 + i // 3, i % 5))
+    conn.commit()
+    conn.close()
+
+
+def fetch_all(spec, **args):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    pages, next_cursor = [], None
+    while True:
+        page_args = dict(args, cursor=next_cursor) if next_cursor else args
+        rows, next_cursor = paginate(cursor, spec, page_args)
+        pages.append(rows)
+        if not next_cursor:
+            break
+    conn.close()
+    return pages
+
+
+def test_keyset_pages_cover_filtered_rows_once(sqlite_db):
+    pages = fetch_all(INTERVIEW_LIST, limit='4', sort='-start_time', status='3,4', fields='id,start_time')
+    rows = [row for page in pages for row in page]
+    assert [len(page) for page in pages] == [4, 4, 2]
+    assert sorted(row['id'] for row in rows) == [i + 1 for i in range(25) if i % 5 in (3, 4)]
+    assert [(r['start_time'], r['id']) for r in rows] == sorted(((r['start_time'], r['id']) for r in rows), reverse=True)
+    assert set(rows[0]) == {'id', 'start_time'}
+
+    # 按职位过滤：候选人 4 属于职位 2
+    rows = [row for page in fetch_all(INTERVIEW_LIST, position_id='2') for row in page]
+    assert {row['candidate_id'] for row in rows} == {4}
+
+
+def test_page_size_is_bounded(sqlite_db, monkeypatch):
+    monkeypatch.setattr(Config, 'ADMIN_MAX_PAGE_SIZE', 10)
+    assert [len(page) for page in fetch_all(INTERVIEW_LIST, limit='1000')] == [10, 10, 5]
+    assert [len(page) for page in fetch_all(CANDIDATE_LIST, limit='5')] == [4]
+
+
+def test_default_page_size_applies_without_limit(sqlite_db, monkeypatch):
+    monkeypatch.setattr(Config, 'ADMIN_PAGE_SIZE', 10)
+    # 不带 limit 的请求同样分页，响应大小与表的行数无关
+    assert [len(page) for page in fetch_all(INTERVIEW_LIST)] == [10, 10, 5]
+
+
+@pytest.mark.parametrize('args', [
+    {'sort': 'token'},
+    {'fields': 'id,report_content'},
+    {'status': 'done'},
+    {'cursor': 'not-a-cursor'},
+])
+def test_invalid_parameters_are_rejected(sqlite_db, args):
+    conn = get_db_connection()
+    with pytest.raises(PaginationError):
+        paginate(conn.cursor(), INTERVIEW_LIST, args)
+    conn.close()
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import Config
+from app.services.asr_backends import QuantizedWhisperBackend, WhisperBackend, create_backend
+
+
+def test_backend_is_selected_from_config_without_loading(monkeypatch):
+    monkeypatch.setattr(Config, 'ASR_BACKEND', 'whisper-int8')
+    monkeypatch.setattr(Config, 'WHISPER_MODEL_SIZE', 'small')
+    backend = create_backend()
+    assert isinstance(backend, QuantizedWhisperBackend)
+    assert backend.model_size == 'small'
+    assert backend.model is None
+
+    assert isinstance(create_backend('whisper', 'tiny'), WhisperBackend)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match='whisper-int8'):
+        create_backend('kaldi')
@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+import queue
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import Config
+from app.services import transcription_service
+from app.services.transcription_service import (
+    NO_SPEECH_TEXT, WINDOW_SAMPLES, _collect_batch, transcribe_batch,
+)
+
+
+class FakeBackend:
+    """每个窗口识别为 "w<第一个采样值>"，记录每次批量调用的窗口数"""
+    def __init__(self, fail_batch=False, bad_marker=None):
+        self.fail_batch = fail_batch
+        self.bad_marker = bad_marker
+        self.batches = []
+
+    def transcribe(self, audio):
+        if int(audio[0]) == self.bad_marker:
+            raise RuntimeError("decoder blew up")
+        return f"w{int(audio[0])}"
+
+    def transcribe_windows(self, windows):
+        self.batches.append(len(windows))
+        if self.fail_batch:
+            raise RuntimeError("batch decoding failed")
+        return [self.transcribe(window) for window in windows]
+
+
+def clip(marker, windows=1):
+    """marker 填充的波形，长度跨越 windows 个 30 秒窗口"""
+    return np.full((windows - 1) * WINDOW_SAMPLES + 100, marker, dtype=np.float32)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = FakeBackend()
+    monkeypatch.setattr(Config, 'VAD_ENABLED', False)
+    monkeypatch.setattr(Config, 'ASR_MAX_BATCH_SIZE', 8)
+    monkeypatch.setattr(transcription_service, 'asr_backend', backend)
+    return backend
+
+
+def jobs(*job_ids):
+    job_queue = queue.Queue()
+    for job_id in job_ids:
+        job_queue.put(job_id)
+    return job_queue
+
+
+def test_collect_batch_stops_at_max_batch_size(monkeypatch):
+    monkeypatch.setattr(Config, 'ASR_MAX_BATCH_SIZE', 3)
+    monkeypatch.setattr(Config, 'ASR_BATCH_WINDOW_MS', 5000)
+    job_queue = jobs('b', 'c', 'd', 'e')
+
+    started = time.monotonic()
+    assert _collect_batch(job_queue, 'a') == (['a', 'b', 'c'], False)
+    # 批次已满时不等待批处理窗口结束
+    assert time.monotonic() - started < 1
+    assert job_queue.qsize() == 2
+
+
+def test_collect_batch_flushes_after_max_wait(monkeypatch):
+    monkeypatch.setattr(Config, 'ASR_MAX_BATCH_SIZE', 8)
+    monkeypatch.setattr(Config, 'ASR_BATCH_WINDOW_MS', 50)
+
+    started = time.monotonic()
+    assert _collect_batch(jobs('b'), 'a') == (['a', 'b'], False)
+    elapsed = time.monotonic() - started
+    assert 0.04 <= elapsed < 1
+
+
+def test_collect_batch_reports_stop_signal(monkeypatch):
+    monkeypatch.setattr(Config, 'ASR_BATCH_WINDOW_MS', 5000)
+    job_queue = jobs('b', None, 'c')
+    assert _collect_batch(job_queue, 'a') == (['a', 'b'], True)
+
+
+def test_batch_results_map_back_to_their_clips(backend, monkeypatch):
+    monkeypatch.setattr(Config, 'ASR_MAX_BATCH_SIZE', 2)
+    # 窗口数不同的录音混在一个批次中，跨越多次 transcribe_windows 调用
+    items = [clip(1, windows=3), clip(2), np.zeros(0, dtype=np.float32), clip(4, windows=2)]
+
+    assert transcribe_batch(items) == ["w1w1w1", "w2", NO_SPEECH_TEXT, "w4w4"]
+    assert backend.batches == [2, 2, 2]
+
+
+def test_undecodable_clip_fails_alone(backend, monkeypatch):
+    decode_audio = transcription_service.decode_audio
+
+    def decode_or_fail(data):
+        if isinstance(data, bytes):
+            raise ValueError("not audio")
+        return decode_audio(data)
+
+    monkeypatch.setattr(transcription_service, 'decode_audio', decode_or_fail)
+    results = transcribe_batch([clip(1), b'garbage', clip(3)])
+
+    assert results[0] == "w1" and results[2] == "w3"
+    assert isinstance(results[1], ValueError)
+    assert backend.batches == [2]
+
+
+def test_failed_batch_falls_back_to_one_by_one(backend):
+    backend.fail_batch = True
+    backend.bad_marker = 2
+
+    results = transcribe_batch([clip(1), clip(2), clip(3)])
+
+    assert results[0] == "w1" and results[2] == "w3"
+    assert isinstance(results[1], RuntimeError)
+
+
+def test_worker_reports_each_result_under_its_ticket(backend, monkeypatch):
+    monkeypatch.setattr(Config, 'ASR_BATCH_WINDOW_MS', 5000)
+    backend.bad_marker = 5
+    job_queue = jobs((11, 'q1', clip(1, windows=2)), (12, 'q2', clip(5)), (13, 'q3', clip(3)), None)
+    result_queue = queue.Queue()
+
+    transcription_service._worker_main(job_queue, result_queue)
+
+    messages = [result_queue.get_nowait() for _ in range(result_queue.qsize())]
+    assert messages[0][1] == 'ready'
+    finished = {ticket: (status, text) for ticket, status, _, text in messages if status not in ('ready', 'running')}
+    assert finished == {11: ('completed', 'w1w1'),
+                        12: ('failed', transcription_service.TRANSCRIPTION_FAILED_TEXT),
+                        13: ('completed', 'w3')}
@@ -0,0 +1,62 @@
+import io
+import os
+import sys
+import shutil
+import wave
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.audio import decode_audio, detect_speech_segments, pack_segments
+
+
+def make_wav(samples, rate=16000, channels=1):
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(rate)
+        wav_file.writeframes(np.asarray(samples, dtype='<i2').tobytes())
+    return buf.getvalue()
+
+
+def test_pcm_wav_is_decoded_without_ffmpeg(monkeypatch):
+    # 快速路径不应该调用 ffmpeg
+    monkeypatch.setattr('subprocess.run', lambda *a, **k: pytest.fail('ffmpeg should not be used'))
+    audio = decode_audio(make_wav([0, 16384, -32768, 32767]))
+    assert audio.dtype == np.float32
+    assert audio.tolist() == pytest.approx([0.0, 0.5, -1.0, 32767 / 32768])
+
+
+def test_silent_wav_from_test_flow():
+    audio = decode_audio(make_wav(np.zeros(16000)))
+    assert audio.shape == (16000,)
+    assert not audio.any()
+
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='ffmpeg not installed')
+def test_other_sample_rates_are_resampled_by_ffmpeg():
+    audio = decode_audio(make_wav(np.zeros(8000), rate=8000, channels=1))
+    assert audio.dtype == np.float32
+    assert abs(len(audio) - 16000) < 200
+
+
+def test_vad_drops_silence_and_packs_segments():
+    rate = 16000
+    tone = (0.3 * np.sin(2 * np.pi * 440 * np.arange(rate) / rate)).astype(np.float32)
+    silence = np.zeros(3 * rate, dtype=np.float32)
+    audio = np.concatenate([silence, tone, silence, tone, silence])
+
+    segments = detect_speech_segments(audio, min_silence_s=1.0, pad_s=0.2)
+    assert len(segments) == 2
+    assert segments[0][0] == pytest.approx(2.8 * rate, abs=0.05 * rate)
+
+    # 两段语音（含前后留白）打包进同一个 30 秒窗口，静音被丢弃
+    windows = pack_segments(audio, segments, 30 * rate)
+    assert len(windows) == 1
+    assert len(windows[0]) < len(audio) / 3
+
+    assert detect_speech_segments(silence) == []
@@ -0,0 +1,102 @@
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import Config
+from app.core.database import get_db_connection
+from app.services import blob_store
+from app.services.blob_store import LocalBlobStore, LocalS3Client, S3BlobStore, blob_key
+from scripts.migrate_blobs import migrate_blobs
+
+
+@pytest.mark.parametrize('backend', ['local', 's3'])
+def test_store_is_content_addressed(tmp_path, backend):
+    if backend == 'local':
+        store = LocalBlobStore(str(tmp_path))
+    else:
+        store = S3BlobStore(LocalS3Client(str(tmp_path)), 'bucket', 'blobs/')
+    key = store.put(b'audio')
+    assert key == blob_key(b'audio')
+    assert store.put(b'audio') == key
+    assert (store.get(key), store.size(key)) == (b'audio', 5)
+
+    missing = blob_key(b'missing')
+    assert not store.exists(missing)
+    with pytest.raises(FileNotFoundError):
+        store.open(missing)
+    with pytest.raises(ValueError):
+        store.open('../../etc/passwd')
+
+    if backend == 'local':
+        # 按哈希前缀分两级子目录
+        assert store.local_path(key) == os.path.join(str(tmp_path), key[:2], key[2:4], key)
+    store.delete(key)
+    assert not store.exists(key)
+
+
+@pytest.fixture
+def sqlite_db(sqlite_db):
+    conn = get_db_connection()
+    conn.execute("INSERT INTO positions (name, requirements, responsibilities, quantity, status, created_at, recruiter) "
+                 "VALUES ('Backend', '', '', 1, 'open', 0, 'hr')")
+    conn.execute("INSERT INTO candidates (position_id, name, email, resume_content) VALUES (1, 'Alice', 'a@x.com', ?)",
+                 (b'resume pdf',))
+    conn.execute("INSERT INTO interviews (candidate_id, interviewer, start_time, report_content) VALUES (1, 'hr', 0, ?)",
+                 (b'report pdf',))
+    for i in range(5):
+        conn.execute("INSERT INTO interview_questions (interview_id, question, answer_audio) VALUES (1, ?, ?)",
+                     (f'Q{i}', f'audio {i}'.encode()))
+    conn.commit()
+    conn.close()
+
+
+def test_migration_moves_blobs_out_of_the_database(sqlite_db):
+    migrate_blobs(batch_size=2)
+
+    store = blob_store.get_blob_store()
+    conn = get_db_connection()
+    audio = conn.execute("SELECT answer_audio, answer_audio_sha256 FROM interview_questions ORDER BY id").fetchall()
+    report = conn.execute("SELECT report_content, report_sha256, report_size FROM interviews").fetchone()
+    candidate = conn.execute("SELECT resume_content, resume_sha256 FROM candidates").fetchone()
+    conn.close()
+
+    assert [row['answer_audio'] for row in audio] == [None] * 5
+    assert [store.get(row['answer_audio_sha256']) for row in audio] == [f'audio {i}'.encode() for i in range(5)]
+    assert (report['report_content'], report['report_size']) == (None, len(b'report pdf'))
+    assert store.get(report['report_sha256']) == b'report pdf'
+    assert candidate['resume_content'] is None
+    assert blob_store.load_blob(candidate['resume_sha256']) == b'resume pdf'
+
+    # 重复运行没有需要迁移的行
+    migrate_blobs(batch_size=2)
+
+
+def test_discarded_blob_is_deleted_after_grace_period_unless_referenced(sqlite_db, monkeypatch):
+    monkeypatch.setattr(Config, 'BLOB_DISCARD_GRACE_SECONDS', 600)
+    store = blob_store.get_blob_store()
+    orphan = store.put(b'orphan audio')
+    shared = store.put(b'shared audio')
+    blob_store.discard_unreferenced(orphan)
+    blob_store.discard_unreferenced(shared)
+
+    # 宽限期内不删除：同一内容可能正被其他请求写入
+    assert blob_store.sweep_discarded_blobs() == 0
+    assert store.exists(orphan) and store.exists(shared)
+
+    # 登记之后另一个请求引用了同一内容
+    conn = get_db_connection()
+    conn.execute("UPDATE interview_questions SET answer_audio_sha256 = ? WHERE id = 1", (shared,))
+    conn.execute("UPDATE blob_discards SET requested_at = 0")
+    conn.commit()
+    conn.close()
+
+    assert blob_store.sweep_discarded_blobs() == 1
+    assert not store.exists(orphan)
+    assert store.get(shared) == b'shared audio'
+    conn = get_db_connection()
+    assert conn.execute("SELECT COUNT(*) FROM blob_discards").fetchone()[0] == 0
+    conn.close()
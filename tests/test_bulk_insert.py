@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import database
+from app.core.database import get_db_connection, insert_many
+
+
+@pytest.mark.parametrize('version', [None, (3, 30, 0)])
+def test_insert_many_returns_ids_in_row_order(sqlite_db, monkeypatch, version):
+    if version:
+        # 不支持 RETURNING 的旧版本 SQLite 逐行插入
+        monkeypatch.setattr(database.sqlite3, 'sqlite_version_info', version)
+    conn = get_db_connection()
+    conn.execute("INSERT INTO interview_questions (interview_id, question) VALUES (99, 'existing')")
+    # 超过单条语句的参数上限，需要分多条 INSERT
+    rows = [(1, f'Q{i}', f'S{i}') for i in range(500)]
+    ids = insert_many(conn, 'interview_questions', ['interview_id', 'question', 'score_standard'], rows)
+    conn.commit()
+
+    cursor = conn.cursor()
+    cursor.execute('SELECT id, question FROM interview_questions WHERE interview_id = 1')
+    by_id = {row['id']: row['question'] for row in cursor.fetchall()}
+    conn.close()
+    assert [by_id[i] for i in ids] == [f'Q{i}' for i in range(500)]
+
+
+def test_insert_many_without_returning(sqlite_db):
+    conn = get_db_connection()
+    assert insert_many(conn, 'interview_questions', ['interview_id', 'question'],
+                       [(1, 'a'), (1, 'b')], returning=None) == []
+    assert insert_many(conn, 'interview_questions', ['interview_id', 'question'], []) == []
+    conn.commit()
+    assert conn.execute('SELECT COUNT(*) FROM interview_questions').fetchone()[0] == 2
+    conn.close()
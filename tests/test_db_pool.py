@@ -0,0 +1,89 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import database
+from app.core.config import Config
+from app.core.database import ConnectionPool, PoolTimeoutError, get_db_connection
+
+
+@pytest.fixture
+def sqlite_db(empty_db, monkeypatch):
+    monkeypatch.setattr(Config, 'DB_POOL_ENABLED', True)
+
+
+def test_connection_is_reused(sqlite_db):
+    conn = get_db_connection()
+    raw = conn._conn
+    conn.close()
+
+    conn = get_db_connection()
+    assert conn._conn is raw
+    conn.close()
+
+
+def test_uncommitted_work_is_rolled_back_on_release(sqlite_db):
+    conn = get_db_connection()
+    conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)')
+    conn.commit()
+    conn.execute("INSERT INTO t (v) VALUES ('dirty')")
+    conn.close()
+
+    conn = get_db_connection()
+    assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+    conn.close()
+
+
+def test_overflow_limit_and_timeout(sqlite_db):
+    pool = ConnectionPool(database._create_connection, size=1, max_overflow=1, timeout=0.1)
+    a = pool.acquire()
+    b = pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+
+    # 归还后等待者可以拿到连接，超出常驻数量的连接被直接关闭
+    b.close()
+    c = pool.acquire()
+    a.close()
+    c.close()
+    assert pool.status()['idle'] == 1
+    assert pool.status()['checked_out'] == 0
+
+
+def test_waiting_thread_gets_released_connection(sqlite_db):
+    pool = ConnectionPool(database._create_connection, size=1, max_overflow=0, timeout=5)
+    held = pool.acquire()
+    got = []
+
+    worker = threading.Thread(target=lambda: got.append(pool.acquire()))
+    worker.start()
+    held.close()
+    worker.join(timeout=5)
+
+    assert len(got) == 1
+    got[0].close()
+
+
+def test_idle_and_broken_connections_are_replaced(sqlite_db):
+    pool = ConnectionPool(database._create_connection, size=2, max_overflow=0, idle_timeout=0)
+    conn = pool.acquire()
+    raw = conn._conn
+    conn.close()
+    # idle_timeout=0: 空闲连接在下一次取出时被丢弃重建
+    conn = pool.acquire()
+    assert conn._conn is not raw
+
+    # 底层连接被关闭后，健康检查失败并重建
+    pool.idle_timeout = 300
+    raw = conn._conn
+    conn.close()
+    raw.close()
+    conn = pool.acquire()
+    assert conn._conn is not raw
+    assert conn.execute('SELECT 1').fetchone()[0] == 1
+    conn.close()
@@ -0,0 +1,161 @@
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import Config
+from app.core.database import get_db_connection
+from app.services import evaluation_queue, report_service
+from app.services.job_claims import REPORT_JOBS, claim_jobs
+from app.services.evaluation_queue import (
+    enqueue_evaluation, claim_evaluations, run_evaluation, sweep_evaluations,
+    due_interviews, flush_interview_evaluations, run_evaluation_batch,
+)
+
+
+class IdleQueue:
+    """测试中不启动工作线程，由测试直接调用 claim / run"""
+    def wake(self):
+        pass
+
+
+@pytest.fixture
+def sqlite_db(sqlite_db, monkeypatch):
+    monkeypatch.setattr(Config, 'EVAL_MAX_ATTEMPTS', 3)
+    monkeypatch.setattr(Config, 'EVAL_RETRY_BASE_SECONDS', 10)
+    monkeypatch.setattr(evaluation_queue, '_queue', IdleQueue())
+    conn = get_db_connection()
+    conn.execute("INSERT INTO positions (name, requirements, responsibilities, quantity, status, created_at, recruiter) "
+                 "VALUES ('Backend', '', '', 1, 'open', 0, 'hr')")
+    conn.execute("INSERT INTO candidates (position_id, name, email) VALUES (1, 'Alice', 'alice@example.com')")
+    conn.execute("INSERT INTO interviews (candidate_id, interviewer, start_time) VALUES (1, 'hr', 0)")
+    for i in range(3):
+        conn.execute("INSERT INTO interview_questions (interview_id, question, answer_text) VALUES (1, ?, ?)",
+                     (f'Q{i}', f'A{i}' if i < 2 else None))
+    conn.commit()
+    conn.close()
+
+
+def fetch(sql, params=()):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    row = cursor.fetchone()
+    conn.close()
+    return row
+
+
+def make_due(question_id):
+    conn = get_db_connection()
+    conn.execute("UPDATE evaluation_jobs SET next_run_at = 0 WHERE question_id = ?", (question_id,))
+    conn.commit()
+    conn.close()
+
+
+def test_failed_evaluation_backs_off_then_dead_letters(sqlite_db, monkeypatch):
+    def failing(question_id):
+        raise RuntimeError('rate limited')
+    monkeypatch.setattr(report_service, 'score_question', failing)
+    enqueue_evaluation(1)
+
+    delays = []
+    for attempt in range(3):
+        token, ids = claim_evaluations(4)
+        assert ids == [1]
+        # 处理中的任务不会被重复领取
+        assert claim_evaluations(4)[1] == []
+        run_evaluation(1, token)
+        job = fetch("SELECT * FROM evaluation_jobs WHERE question_id = 1")
+        delays.append(job['next_run_at'] - job['updated_at'])
+        make_due(1)
+
+    assert delays[:2] == [10, 20]
+    assert job['status'] == 'dead'
+    assert job['last_error'] == 'rate limited'
+    assert claim_evaluations(4)[1] == []
+
+
+def test_successful_evaluation_saves_score_and_completes_job(sqlite_db, monkeypatch):
+    monkeypatch.setattr(report_service, 'call_ai_model_for_question',
+                        lambda question, answer, position: {'score': 88, 'comments': 'good'})
+    enqueue_evaluation(2)
+    token, ids = claim_evaluations(4)
+    run_evaluation(2, token)
+
+    assert fetch("SELECT status FROM evaluation_jobs WHERE question_id = 2")['status'] == 'done'
+    row = fetch("SELECT ai_score, ai_evaluation FROM interview_questions WHERE id = 2")
+    assert (row['ai_score'], row['ai_evaluation']) == (88, 'good')
+
+
+def test_resubmitted_answer_discards_stale_result(sqlite_db, monkeypatch):
+    monkeypatch.setattr(report_service, 'score_question', lambda question_id: {'score': 1, 'comments': 'stale'})
+    enqueue_evaluation(1)
+    token, _ = claim_evaluations(4)
+    enqueue_evaluation(1)
+    run_evaluation(1, token)
+
+    assert fetch("SELECT ai_score FROM interview_questions WHERE id = 1")['ai_score'] is None
+    assert fetch("SELECT status FROM evaluation_jobs WHERE question_id = 1")['status'] == 'pending'
+
+
+def test_sweeper_requeues_answers_without_score(sqlite_db):
+    # 问题 1、2 已转写但没有评分任务，问题 3 尚未回答
+    assert sweep_evaluations() == 2
+    assert sweep_evaluations() == 0
+    _, ids = claim_evaluations(4)
+    assert sorted(ids) == [1, 2]
+
+
+def test_batch_mode_scores_interview_in_one_request(sqlite_db, monkeypatch):
+    monkeypatch.setattr(Config, 'EVAL_MODE', 'batch')
+    monkeypatch.setattr(Config, 'EVAL_BATCH_DELAY_SECONDS', 120)
+    requests = []
+    def batch_model(questions, position):
+        requests.append([q['id'] for q in questions])
+        # 模型漏掉了问题 2
+        return {1: {'score': 70, 'comments': 'ok'}}
+    monkeypatch.setattr(report_service, 'call_ai_model_for_questions', batch_model)
+    enqueue_evaluation(1)
+    enqueue_evaluation(2)
+
+    # 延迟期内不领取，面试完成后立即到期
+    assert due_interviews(4) == []
+    flush_interview_evaluations(1)
+    assert due_interviews(4) == [1]
+    token, ids = claim_evaluations(10, interview_id=1)
+    run_evaluation_batch(ids, token)
+
+    assert requests == [[1, 2]]
+    assert fetch("SELECT ai_score FROM interview_questions WHERE id = 1")['ai_score'] == 70
+    job = fetch("SELECT * FROM evaluation_jobs WHERE question_id = 2")
+    assert (job['status'], job['attempts']) == ('pending', 1)
+    assert job['last_error'] == 'missing from batch evaluation response'
+
+
+def test_report_waits_for_the_last_evaluation(sqlite_db, monkeypatch):
+    notified = []
+    monkeypatch.setattr(evaluation_queue, 'notify_jobs', notified.append)
+    monkeypatch.setattr(report_service, 'score_question', lambda question_id: {'score': 70, 'comments': 'ok'})
+    enqueue_evaluation(1)
+    enqueue_evaluation(2)
+    conn = get_db_connection()
+    conn.execute("UPDATE interviews SET status = 3 WHERE id = 1")
+    conn.commit()
+    conn.close()
+
+    # 评分任务未结束：报告任务不能被领取，也不发送通知
+    assert evaluation_queue.notify_report_if_ready(interview_id=1) is False
+    assert claim_jobs(REPORT_JOBS)[1] == []
+
+    token, ids = claim_evaluations(1)
+    run_evaluation(ids[0], token)
+    assert notified == [] and claim_jobs(REPORT_JOBS)[1] == []
+
+    # 最后一个评分任务结束后唤醒报告生成
+    token, ids = claim_evaluations(1)
+    run_evaluation(ids[0], token)
+    assert notified == [REPORT_JOBS]
+    assert claim_jobs(REPORT_JOBS)[1] == [1]
@@ -0,0 +1,83 @@
+import io
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api.admin import _send_bytes
+from app.core.config import Config
+from app.utils.file_response import send_stored_file
+
+CONTENT = bytes(range(256)) * 40
+ETAG = 'a' * 64
+LEGACY_TIME = 1767225600  # 2026-01-01 00:00:00 UTC
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'REPORT_DIR', str(tmp_path))
+    monkeypatch.setattr(Config, 'DOWNLOAD_ACCEL', '')
+    path = tmp_path / '2026-01-01' / '1_report.pdf'
+    path.parent.mkdir()
+    path.write_bytes(CONTENT)
+
+    app = Flask(__name__)
+
+    @app.route('/file')
+    def from_path():
+        return send_stored_file('report.pdf', etag=ETAG, path=str(path), as_attachment=False)
+
+    @app.route('/stream')
+    def from_stream():
+        return send_stored_file('report.pdf', etag=ETAG, stream=io.BytesIO(CONTENT), size=len(CONTENT))
+
+    @app.route('/legacy')
+    def from_legacy_column():
+        return _send_bytes(memoryview(CONTENT), 'report.pdf', True, last_modified=LEGACY_TIME)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('url', ['/file', '/stream'])
+def test_range_and_conditional_requests(client, url):
+    response = client.get(url)
+    assert response.data == CONTENT
+    assert response.headers['ETag'] == f'"{ETAG}"'
+    assert response.headers['Accept-Ranges'] == 'bytes'
+
+    response = client.get(url, headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.data == CONTENT[100:200]
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(CONTENT)}'
+
+    response = client.get(url, headers={'If-None-Match': f'"{ETAG}"'})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    assert client.get(url, headers={'Range': f'bytes={len(CONTENT) + 10}-'}).status_code == 416
+
+
+def test_nginx_accel_redirect(client, monkeypatch):
+    monkeypatch.setattr(Config, 'DOWNLOAD_ACCEL', 'nginx')
+    response = client.get('/file')
+    assert response.headers['X-Accel-Redirect'] == '/_protected/reports/2026-01-01/1_report.pdf'
+    assert response.headers['Content-Disposition'] == 'inline; filename=report.pdf'
+    assert response.data == b''
+
+    response = client.get('/file', headers={'If-None-Match': f'"{ETAG}"'})
+    assert response.status_code == 304
+    assert 'X-Accel-Redirect' not in response.headers
+
+
+def test_legacy_column_supports_range_and_last_modified(client):
+    response = client.get('/legacy', headers={'Range': 'bytes=0-9'})
+    assert response.status_code == 206
+    assert response.data == CONTENT[:10]
+    assert response.headers['Content-Range'] == f'bytes 0-9/{len(CONTENT)}'
+    assert response.headers['Last-Modified'] == 'Thu, 01 Jan 2026 00:00:00 GMT'
+
+    response = client.get('/legacy', headers={'If-Modified-Since': 'Thu, 01 Jan 2026 00:00:00 GMT'})
+    assert response.status_code == 304
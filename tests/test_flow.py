@@ -166,13 +166,23 @@ def test_flow():
         data = {'question_id': q_id}
         resp = requests.post(f"{BASE_URL}/api/interview/{token}/submit_answer", data=data, files=files)
         # print(f"提交响应: {resp.text}")
+        assert resp.status_code == 200
+        
+        # 转写状态可以轮询查询
+        resp = requests.get(f"{BASE_URL}/api/interview/{token}/transcription/{q_id}")
+        assert resp.json()['status'] in ('queued', 'running', 'pending', 'completed')
         
         current_q_id = q_id
         
     # 6. 触发生成报告
     print("\n6. 触发生成报告...")
     # 此时状态应该是 3 (已完成)
-    resp = requests.get(f"{BASE_URL}/api/interview/{token}/info")
+    # 语音在后台转写，最后一个回答转写完成后状态才会变为 3，这里轮询等待
+    for _ in range(60):
+        resp = requests.get(f"{BASE_URL}/api/interview/{token}/info")
+        if resp.json()['status'] == 3:
+            break
+        time.sleep(1)
     assert resp.json()['status'] == 3
     
     generate_interview_reports.process_pending_reports()
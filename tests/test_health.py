@@ -0,0 +1,57 @@
+import os
+import sys
+import threading
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.api
+from app.api import create_app
+from app.core.config import Config
+from app.services import transcription_service
+
+
+class BlockingBackend:
+    """预热时阻塞在 transcribe，直到测试放行"""
+    def __init__(self):
+        self.release = threading.Event()
+
+    def transcribe(self, audio):
+        self.release.wait(5)
+        return ""
+
+
+def test_health_reports_asr_warm_up(monkeypatch):
+    backend = BlockingBackend()
+    monkeypatch.setattr(Config, 'ASR_WARMUP', False)
+    monkeypatch.setattr(Config, 'TRANSCRIBE_ASYNC', False)
+    monkeypatch.setattr(transcription_service, 'asr_backend', backend)
+    monkeypatch.setattr(transcription_service, '_warmup_state', 'idle')
+    client = create_app().test_client()
+
+    # 未启用预热时模型在首次使用时加载，实例视为就绪
+    assert client.get('/health').status_code == 200
+
+    transcription_service.start_asr_warmup()
+    response = client.get('/health')
+    assert response.status_code == 503
+    assert response.json['status'] == 'warming_up'
+
+    backend.release.set()
+    for thread in threading.enumerate():
+        if thread.name == 'asr-warmup':
+            thread.join(5)
+    response = client.get('/health')
+    assert response.status_code == 200
+    assert response.json['asr']['state'] == 'ready'
+
+
+def test_factory_does_not_start_background_services(monkeypatch):
+    started = []
+    monkeypatch.setattr(app.api, 'start_background_services', lambda: started.append(True))
+
+    create_app()
+    assert started == []
+    # 只有服务入口 (app/server.py) 启动评分队列、ASR 预热和转写巡检
+    create_app(start_background=True)
+    assert started == [True]
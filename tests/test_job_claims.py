@@ -0,0 +1,83 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import Config
+from app.core.database import get_db_connection
+from app.services.job_claims import QUESTION_JOBS, claim_jobs, finish_job, release_job
+
+
+@pytest.fixture
+def sqlite_db(sqlite_db):
+    conn = get_db_connection()
+    for _ in range(20):
+        conn.execute("INSERT INTO interviews (candidate_id, interviewer, start_time) VALUES (1, 'hr', 0)")
+    conn.commit()
+    conn.close()
+
+
+def execute(sql, params=()):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    conn.commit()
+    conn.close()
+
+
+def test_concurrent_workers_never_claim_the_same_job(sqlite_db):
+    claimed = []
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            _, ids = claim_jobs(QUESTION_JOBS, limit=3)
+            if not ids:
+                return
+            with lock:
+                claimed.extend(ids)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == list(range(1, 21))
+
+
+def test_expired_lease_is_reclaimed_and_stale_worker_cannot_finish(sqlite_db, monkeypatch):
+    old_token, ids = claim_jobs(QUESTION_JOBS, limit=1)
+    assert ids == [1]
+
+    # 模拟旧进程卡死，租约过期后被其他进程重新领取
+    execute('UPDATE interviews SET lease_expires_at = 0 WHERE id = 1')
+    new_token, ids = claim_jobs(QUESTION_JOBS, limit=1)
+    assert ids == [1]
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    assert not finish_job(cursor, QUESTION_JOBS, 1, old_token)
+    assert finish_job(cursor, QUESTION_JOBS, 1, new_token)
+    conn.commit()
+    row = cursor.execute('SELECT status, claimed_by, attempts FROM interviews WHERE id = 1').fetchone()
+    conn.close()
+    assert (row['status'], row['claimed_by'], row['attempts']) == (1, None, 0)
+
+
+def test_failed_job_is_retried_until_max_attempts(sqlite_db, monkeypatch):
+    monkeypatch.setattr(Config, 'JOB_MAX_ATTEMPTS', 2)
+    monkeypatch.setattr(Config, 'JOB_RETRY_DELAY_SECONDS', 0)
+    execute('UPDATE interviews SET status = 1 WHERE id > 1')
+
+    for _ in range(2):
+        token, ids = claim_jobs(QUESTION_JOBS)
+        assert ids == [1]
+        release_job(QUESTION_JOBS, 1, token, 'boom')
+        execute('UPDATE interviews SET lease_expires_at = 0 WHERE id = 1')
+
+    assert claim_jobs(QUESTION_JOBS)[1] == []
@@ -0,0 +1,52 @@
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import Config
+from app.services.job_claims import QUESTION_JOBS, REPORT_JOBS
+from app.services.job_notify import JobListener, notify_jobs
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix sockets not available')
+
+
+@pytest.fixture
+def local_notify(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'DB_TYPE', 'sqlite')
+    monkeypatch.setattr(Config, 'JOB_NOTIFY_DIR', str(tmp_path))
+    return tmp_path
+
+
+def test_listener_wakes_up_on_notification(local_notify):
+    listener = JobListener(QUESTION_JOBS)
+    assert listener.wait(0) is False
+
+    threading.Timer(0.1, notify_jobs, args=(QUESTION_JOBS,)).start()
+    started = time.monotonic()
+    assert listener.wait(5) is True
+    assert time.monotonic() - started < 2
+
+    # 其他任务类型的通知不会唤醒该监听器；多个积压的通知只触发一次
+    notify_jobs(REPORT_JOBS)
+    assert listener.wait(0.1) is False
+    notify_jobs(QUESTION_JOBS)
+    notify_jobs(QUESTION_JOBS)
+    assert listener.wait(1) is True
+    assert listener.wait(0.1) is False
+    listener.close()
+
+
+def test_stale_sockets_are_removed(local_notify):
+    stale = local_notify / 'questions-999999.sock'
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(str(stale))
+    sock.close()
+
+    notify_jobs(QUESTION_JOBS)
+    assert not stale.exists()
@@ -0,0 +1,159 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import Config
+from app.core.database import get_db_connection
+from app.services import llm_client
+from app.services.llm_client import chat_completion, evict_cache, get_cache_stats
+
+
+class FakeClient:
+    """记录请求次数，按顺序返回预设的回复"""
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        content = self.replies.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def sqlite_db(sqlite_db, monkeypatch):
+    monkeypatch.setattr(Config, 'LLM_CACHE_ENABLED', True)
+    monkeypatch.setattr(Config, 'LLM_RATE_LIMIT_RPM', 0)
+    monkeypatch.setattr(llm_client, 'cache_stats', llm_client.CacheStats())
+
+
+def use_client(monkeypatch, replies):
+    client = FakeClient(replies)
+    monkeypatch.setattr(llm_client, '_client', client)
+    return client
+
+
+def ask(text, **kwargs):
+    return chat_completion([{"role": "user", "content": text}], response_format={"type": "json_object"}, **kwargs)
+
+
+def test_identical_requests_hit_the_cache(sqlite_db, monkeypatch):
+    client = use_client(monkeypatch, ['{"score": 1}', '{"score": 2}', '{"score": 3}'])
+    assert ask('无法识别语音') == '{"score": 1}'
+    assert ask('无法识别语音') == '{"score": 1}'
+    assert ask('另一个回答') == '{"score": 2}'
+    assert client.calls == 2
+
+    # 跳过缓存读取时重新请求，并用新结果覆盖缓存
+    assert ask('无法识别语音', use_cache=False) == '{"score": 3}'
+    assert ask('无法识别语音') == '{"score": 3}'
+
+    stats = get_cache_stats()
+    assert (stats['hits'], stats['misses']) == (2, 2)
+    assert stats['hit_rate'] == 0.5
+
+
+def test_invalid_json_is_not_cached(sqlite_db, monkeypatch):
+    client = use_client(monkeypatch, ['{"score": ', '{"score": 5}'])
+    assert ask('Q') == '{"score": '
+    assert ask('Q') == '{"score": 5}'
+    assert client.calls == 2
+
+
+def test_expired_and_oversized_entries_are_evicted(sqlite_db, monkeypatch):
+    use_client(monkeypatch, [f'{{"n": {i}}}' for i in range(10)])
+    for i in range(10):
+        ask(f'Q{i}')
+    conn = get_db_connection()
+    conn.execute("UPDATE llm_cache SET created_at = 0, last_used_at = 0 WHERE response = '{\"n\": 0}'")
+    conn.execute("UPDATE llm_cache SET last_used_at = 1 WHERE response != '{\"n\": 0}' AND response < '{\"n\": 5}'")
+    conn.commit()
+    conn.close()
+
+    # 每条 8 字节，上限 50 字节：删除 1 条过期条目后再淘汰最久未使用的 4 条
+    monkeypatch.setattr(Config, 'LLM_CACHE_MAX_BYTES', 50)
+    assert evict_cache() == 5
+    conn = get_db_connection()
+    left = sorted(row['response'] for row in conn.execute('SELECT response FROM llm_cache').fetchall())
+    conn.close()
+    assert left == [f'{{"n": {i}}}' for i in range(5, 10)]
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+class ScriptedClient:
+    """按模型返回预设的结果序列，异常实例会被抛出"""
+    def __init__(self, script):
+        self.script = {model: list(results) for model, results in script.items()}
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, timeout, **kwargs):
+        self.calls.append(model)
+        result = self.script[model].pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=result))])
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    monkeypatch.setattr(Config, 'LLM_CACHE_ENABLED', False)
+    monkeypatch.setattr(Config, 'LLM_RATE_LIMIT_RPM', 0)
+    monkeypatch.setattr(Config, 'LLM_MODEL', 'primary')
+    monkeypatch.setattr(Config, 'LLM_FALLBACK_MODELS', ['backup'])
+    monkeypatch.setattr(Config, 'LLM_MAX_RETRIES', 2)
+    monkeypatch.setattr(Config, 'LLM_RETRY_BASE_SECONDS', 0)
+    monkeypatch.setattr(Config, 'LLM_CIRCUIT_FAILURES', 2)
+    monkeypatch.setattr(llm_client, '_breakers', {})
+
+    def install(script):
+        client = ScriptedClient(script)
+        monkeypatch.setattr(llm_client, '_client', client)
+        return client
+    return install
+
+
+def test_transient_errors_are_retried_then_fall_back(gateway):
+    client = gateway({'primary': [ServerError(), TimeoutError(), 'ok'], 'backup': []})
+    assert chat_completion([{"role": "user", "content": "Q"}]) == 'ok'
+    assert client.calls == ['primary'] * 3
+
+    # 不可重试的错误直接改用备选模型
+    client = gateway({'primary': [BadRequest()], 'backup': ['from backup']})
+    assert chat_completion([{"role": "user", "content": "Q"}]) == 'from backup'
+    assert client.calls == ['primary', 'backup']
+
+
+def test_circuit_opens_after_repeated_failures(gateway):
+    client = gateway({'primary': [ServerError()] * 6, 'backup': ['a', 'b', 'c']})
+    for expected in ['a', 'b', 'c']:
+        assert chat_completion([{"role": "user", "content": "Q"}]) == expected
+    # 连续失败两次（每次重试耗尽）后熔断，第三次调用直接使用备选模型
+    assert client.calls == ['primary'] * 3 + ['backup'] + ['primary'] * 3 + ['backup', 'backup']
+    assert llm_client.get_breaker('primary').state == 'open'
+
+    gateway({'primary': [], 'backup': [ServerError()] * 3})
+    with pytest.raises(llm_client.LLMUnavailableError):
+        chat_completion([{"role": "user", "content": "Q"}])
+
+
+def test_client_errors_do_not_open_the_circuit(gateway):
+    client = gateway({'primary': [BadRequest(), BadRequest(), BadRequest()], 'backup': ['a', 'b', 'c']})
+    for expected in ['a', 'b', 'c']:
+        assert chat_completion([{"role": "user", "content": "Q"}]) == expected
+    # 4xx 说明请求有问题而不是模型不可用，每次仍然先尝试首选模型
+    assert client.calls == ['primary', 'backup'] * 3
+    assert llm_client.get_breaker('primary').state == 'closed'
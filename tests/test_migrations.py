@@ -0,0 +1,94 @@
+import os
+import sys
+import sqlite3
+
+import pytest
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import migrations
+from app.core.config import Config
+from app.core.database import get_db_connection, init_db
+from app.services.report_service import QUESTION_COLUMNS
+
+
+def query_plan(sql, params):
+    conn = get_db_connection()
+    plan = ' / '.join(row['detail'] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall())
+    conn.close()
+    return plan
+
+
+def test_fresh_database_is_migrated_once(sqlite_db):
+    assert init_db() == migrations.LATEST_VERSION
+    assert init_db() == migrations.LATEST_VERSION
+
+    conn = get_db_connection()
+    versions = [row['version'] for row in conn.execute("SELECT version FROM schema_migrations ORDER BY version")]
+    conn.execute("INSERT INTO interviews (candidate_id, interviewer, start_time, token) VALUES (1, 'hr', 0, 't')")
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO interviews (candidate_id, interviewer, start_time, token) VALUES (1, 'hr', 0, 't')")
+    conn.close()
+    assert versions == [m.version for m in migrations.MIGRATIONS]
+
+
+def test_upgrades_database_created_by_old_scripts(empty_db):
+    # 旧版 init_sqlite.py 建的表，并且已经由旧的运行时检查加过部分列
+    conn = sqlite3.connect(Config.DB_PATH)
+    conn.execute("CREATE TABLE interviews (id INTEGER PRIMARY KEY AUTOINCREMENT, candidate_id INTEGER NOT NULL, "
+                 "interviewer TEXT NOT NULL, start_time INTEGER NOT NULL, status INTEGER NOT NULL DEFAULT 0, "
+                 "is_passed INTEGER NOT NULL DEFAULT 0, token TEXT, report_content BLOB, "
+                 "question_count INTEGER DEFAULT 0, voice_reading INTEGER DEFAULT 0, claimed_by TEXT)")
+    conn.execute("INSERT INTO interviews (candidate_id, interviewer, start_time, token) VALUES (1, 'hr', 0, 'abc')")
+    conn.commit()
+    conn.close()
+
+    assert init_db() == migrations.LATEST_VERSION
+    conn = get_db_connection()
+    row = conn.execute("SELECT token, claimed_by, attempts, report_sha256 FROM interviews").fetchone()
+    conn.close()
+    assert tuple(row) == ('abc', None, 0, None)
+
+
+@pytest.mark.parametrize('sql, params, index', [
+    # 候选人的每个请求
+    ("SELECT id FROM interviews WHERE token = ?", ('abc',), 'idx_interviews_token'),
+    # 按面试读取题目
+    (f"SELECT {QUESTION_COLUMNS} FROM interview_questions WHERE interview_id = ? ORDER BY id", (1,),
+     'idx_interview_questions_interview_id_id'),
+    ("SELECT id, question FROM interview_questions WHERE interview_id = ? AND id > ? ORDER BY id LIMIT 1", (1, 5),
+     'idx_interview_questions_interview_id_id'),
+    # 调度器领取任务 (job_claims.claim_jobs)
+    ("SELECT id FROM interviews WHERE status = 3 AND (claimed_by IS NULL OR lease_expires_at < ?) AND attempts < ? "
+     "ORDER BY id LIMIT ?", (0, 3, 1), 'idx_interviews_pending'),
+    # 按职位筛选候选人
+    ("SELECT id, name FROM candidates WHERE position_id = ? ORDER BY id LIMIT ?", (1, 100),
+     'idx_candidates_position_id_id'),
+])
+def test_hot_queries_use_indexes(sqlite_db, sql, params, index):
+    init_db()
+    plan = query_plan(sql, params)
+    assert f"INDEX {index} " in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_duplicate_tokens_are_reassigned_before_the_unique_index(empty_db):
+    # 旧数据库中两场面试共用同一个 token
+    conn = sqlite3.connect(Config.DB_PATH)
+    conn.execute("CREATE TABLE interviews (id INTEGER PRIMARY KEY AUTOINCREMENT, candidate_id INTEGER NOT NULL, "
+                 "interviewer TEXT NOT NULL, start_time INTEGER NOT NULL, status INTEGER NOT NULL DEFAULT 0, "
+                 "is_passed INTEGER NOT NULL DEFAULT 0, token TEXT, report_content BLOB, "
+                 "question_count INTEGER DEFAULT 0, voice_reading INTEGER DEFAULT 0)")
+    for token in ['dup', 'unique', 'dup', None, None]:
+        conn.execute("INSERT INTO interviews (candidate_id, interviewer, start_time, token) VALUES (1, 'hr', 0, ?)",
+                     (token,))
+    conn.commit()
+    conn.close()
+
+    assert init_db() == migrations.LATEST_VERSION
+    conn = get_db_connection()
+    tokens = [row['token'] for row in conn.execute("SELECT token FROM interviews ORDER BY id")]
+    conn.close()
+    assert tokens[:2] == ['dup', 'unique'] and tokens[3:] == [None, None]
+    assert tokens[2] not in ('dup', 'unique', None) and len(tokens[2]) == 32
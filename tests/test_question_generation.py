@@ -0,0 +1,117 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import Config
+from app.core.database import get_db_connection
+from app.services import resume_text
+from app.utils.rate_limit import RateLimiter
+from scripts import generate_interview_questions as generator
+
+
+def add_pending_interviews(count):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO positions (name, requirements, responsibilities, quantity, status, created_at, recruiter) "
+                   "VALUES ('Python开发', 'Flask', '后端开发', 1, 'open', 0, 'hr')")
+    position_id = cursor.lastrowid
+    for i in range(count):
+        cursor.execute('INSERT INTO candidates (position_id, name, email) VALUES (?, ?, ?)',
+                       (position_id, f'候选人{i}', f'c{i}@example.com'))
+        cursor.execute('INSERT INTO interviews (candidate_id, interviewer, start_time) VALUES (?, ?, 0)',
+                       (cursor.lastrowid, 'hr'))
+    conn.commit()
+    conn.close()
+
+
+def test_pending_interviews_are_generated_concurrently(sqlite_db, monkeypatch):
+    add_pending_interviews(6)
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def fake_generate(resume_content, position_name, requirements, responsibilities):
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        time.sleep(0.2)
+        with lock:
+            in_flight.pop()
+        return [{'question': f'{position_name} 问题', 'score_standard': '10分'}]
+
+    monkeypatch.setattr(Config, 'LLM_MAX_CONCURRENCY', 3)
+    monkeypatch.setattr(generator, 'generate_questions', fake_generate)
+
+    started = time.monotonic()
+    generator.process_pending_interviews()
+    assert time.monotonic() - started < 1.0
+    assert max(peak) == 3
+
+    conn = get_db_connection()
+    rows = conn.execute('SELECT status, question_count FROM interviews').fetchall()
+    conn.close()
+    assert [(row['status'], row['question_count']) for row in rows] == [(1, 1)] * 6
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(rate_per_minute=600, burst=1)
+    started = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    # 首个请求消耗初始令牌，其余 3 个各等待约 0.1 秒
+    assert time.monotonic() - started >= 0.28
+    assert RateLimiter(rate_per_minute=0).acquire() == 0.0
+
+
+def test_resume_text_is_extracted_once_and_read_from_cache(sqlite_db, monkeypatch):
+    add_pending_interviews(2)
+    content = '简历: 五年 Python 经验'.encode('utf-8')
+    conn = get_db_connection()
+    conn.execute('UPDATE candidates SET resume_content = ?', (content,))
+    conn.commit()
+    conn.close()
+
+    extracted = []
+    extract = resume_text.extract_text_from_pdf
+    monkeypatch.setattr(resume_text, 'extract_text_from_pdf', lambda data: extracted.append(1) or extract(data))
+    prompts = []
+    monkeypatch.setattr(generator, 'generate_questions',
+                        lambda text, *args: prompts.append(text) or [{'question': 'Q', 'score_standard': '10分'}])
+
+    # 旧数据没有 resume_sha256：首次出题时解析并补齐缓存，相同内容的简历只解析一次
+    generator.process_interview(1)
+    generator.process_interview(2)
+    assert extracted == [1]
+    assert prompts == ['简历: 五年 Python 经验'] * 2
+
+    context = generator.get_interview_context(1)
+    assert context['resume_text'] == '简历: 五年 Python 经验'
+    assert context['resume_sha256'] == resume_text.resume_sha256(content)
+    assert 'resume_content' not in context.keys()
+
+
+def test_llm_failure_releases_the_job(sqlite_db, monkeypatch):
+    add_pending_interviews(1)
+
+    def unavailable(**kwargs):
+        raise RuntimeError("all models failed")
+
+    monkeypatch.setattr(generator, 'chat_completion', unavailable)
+    generator.process_pending_interviews()
+
+    conn = get_db_connection()
+    interview = conn.execute('SELECT status, attempts, lease_expires_at FROM interviews').fetchone()
+    questions = conn.execute('SELECT COUNT(*) FROM interview_questions').fetchone()[0]
+    conn.close()
+    # 不写入占位问题，任务释放后按退避时间重新领取
+    assert (interview['status'], interview['attempts'], questions) == (0, 1, 0)
+    assert interview['lease_expires_at'] > time.time()
+
+    monkeypatch.setattr(Config, 'LLM_MOCK_QUESTIONS', True)
+    assert '（Mock）' in generator.generate_questions('简历', 'Python开发', '', '')[0]['question']
@@ -0,0 +1,63 @@
+import hashlib
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import Config
+from app.core.database import get_db_connection
+from app.services import blob_store, report_service
+
+PDF_BYTES = b'%PDF-1.4 fake report'
+
+
+@pytest.fixture
+def sqlite_db(sqlite_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(report_service, 'REPORT_BASE_DIR', str(tmp_path / 'reports'))
+    monkeypatch.setattr(report_service, 'call_ai_model', lambda *args: {'total_score': 80})
+    monkeypatch.setattr(report_service, 'generate_pdf_report', lambda model_output: PDF_BYTES)
+    conn = get_db_connection()
+    conn.execute("INSERT INTO positions (name, requirements, responsibilities, quantity, status, created_at, recruiter) "
+                 "VALUES ('Backend', '', '', 1, 'open', 0, 'hr')")
+    conn.execute("INSERT INTO candidates (position_id, name, email, resume_content) "
+                 "VALUES (1, 'Alice', 'alice@example.com', ?)", (b'resume' * 1000,))
+    conn.execute("INSERT INTO interviews (candidate_id, interviewer, start_time, status) VALUES (1, 'hr', 0, 3)")
+    conn.execute("INSERT INTO interview_questions (interview_id, question, answer_text) VALUES (1, 'Q', 'A')")
+    conn.commit()
+    conn.close()
+
+
+def fetch_interview():
+    conn = get_db_connection()
+    row = conn.execute("SELECT status, report_content, report_path, report_size, report_sha256 "
+                       "FROM interviews WHERE id = 1").fetchone()
+    conn.close()
+    return row
+
+
+def test_report_is_stored_on_disk_only(sqlite_db):
+    assert report_service.generate_report_for_interview(1)
+
+    row = fetch_interview()
+    assert row['status'] == 4
+    assert row['report_content'] is None
+    assert (row['report_size'], row['report_sha256']) == (len(PDF_BYTES), hashlib.sha256(PDF_BYTES).hexdigest())
+    with open(row['report_path'], 'rb') as f:
+        assert f.read() == PDF_BYTES
+
+
+def test_blob_storage_keeps_only_the_reference(sqlite_db, monkeypatch):
+    monkeypatch.setattr(Config, 'REPORT_STORAGE', 'blob')
+    assert report_service.generate_report_for_interview(1)
+    row = fetch_interview()
+    assert (row['report_content'], row['report_path']) == (None, None)
+    assert blob_store.get_blob_store().get(row['report_sha256']) == PDF_BYTES
+
+
+def test_fetches_do_not_read_blob_columns(sqlite_db):
+    assert 'report_content' not in report_service.fetch_interview_by_id(1)
+    assert 'resume_content' not in report_service.fetch_candidate_info(1)
+    assert 'answer_audio' not in report_service.fetch_interview_questions(1)[0]
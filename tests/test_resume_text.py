@@ -0,0 +1,104 @@
+import io
+import os
+import sys
+from concurrent.futures import Future
+
+import pytest
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import Config
+from app.services import resume_text
+
+PyPDF2 = pytest.importorskip('PyPDF2')
+
+RESUME_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'resumes')
+
+
+def sample_pdf(pages, password=None):
+    with open(os.path.join(RESUME_DIR, sorted(os.listdir(RESUME_DIR))[0]), 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        writer = PyPDF2.PdfWriter()
+        for _ in range(pages):
+            writer.add_page(reader.pages[0])
+    if password:
+        writer.encrypt(password)
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def test_parallel_extraction_matches_serial(monkeypatch):
+    content = sample_pdf(6)
+    monkeypatch.setattr(Config, 'RESUME_MAX_TOKENS', 0)
+    monkeypatch.setattr(Config, 'RESUME_PARALLEL_MIN_PAGES', 100)
+    serial = resume_text.extract_text_from_pdf(content)
+
+    monkeypatch.setattr(Config, 'RESUME_PARALLEL_MIN_PAGES', 2)
+    monkeypatch.setattr(Config, 'RESUME_EXTRACT_PROCESSES', 2)
+    parallel = resume_text.extract_text_from_pdf(content)
+    assert parallel == serial
+    assert serial.count(serial.split('\n')[0]) == 6
+
+
+def test_pages_and_tokens_are_capped(monkeypatch):
+    content = sample_pdf(5)
+    monkeypatch.setattr(Config, 'RESUME_PARALLEL_MIN_PAGES', 100)
+    monkeypatch.setattr(Config, 'RESUME_MAX_TOKENS', 0)
+    monkeypatch.setattr(Config, 'RESUME_MAX_PAGES', 2)
+    two_pages = resume_text.extract_text_from_pdf(content)
+    monkeypatch.setattr(Config, 'RESUME_MAX_PAGES', 0)
+    assert len(resume_text.extract_text_from_pdf(content)) > len(two_pages) * 2
+
+    monkeypatch.setattr(Config, 'RESUME_MAX_TOKENS', 50)
+    text = resume_text.extract_text_from_pdf(content)
+    assert resume_text.estimate_tokens(text) <= 50
+    assert two_pages.startswith(text)
+
+
+class LazyFuture(Future):
+    """在取结果时才执行的任务，未取结果的任务可以被取消"""
+    def __init__(self, fn, args):
+        super().__init__()
+        self.fn, self.args = fn, args
+
+    def result(self, timeout=None):
+        if not self.done():
+            self.set_result(self.fn(*self.args))
+        return super().result(timeout)
+
+
+class LazyPool:
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args):
+        self.futures.append(LazyFuture(fn, args))
+        return self.futures[-1]
+
+
+def test_parallel_extraction_stops_at_the_token_budget(monkeypatch):
+    content = sample_pdf(6)
+    monkeypatch.setattr(Config, 'RESUME_MAX_PAGES', 0)
+    monkeypatch.setattr(Config, 'RESUME_PARALLEL_MIN_PAGES', 100)
+    monkeypatch.setattr(Config, 'RESUME_MAX_TOKENS', 0)
+    page_tokens = resume_text.estimate_tokens(resume_text.extract_text_from_pdf(sample_pdf(1)))
+    monkeypatch.setattr(Config, 'RESUME_MAX_TOKENS', page_tokens + 1)
+    serial = resume_text.extract_text_from_pdf(content)
+
+    pool = LazyPool()
+    monkeypatch.setattr(resume_text, '_get_process_pool', lambda: pool)
+    monkeypatch.setattr(Config, 'RESUME_PARALLEL_MIN_PAGES', 2)
+    monkeypatch.setattr(Config, 'RESUME_EXTRACT_PROCESSES', 2)
+    assert resume_text.extract_text_from_pdf(content) == serial
+
+    # 6 页分成 4 个页段：第 2 个页段超出预算后，后面的页段被取消
+    assert len(pool.futures) == 4
+    assert [future.cancelled() for future in pool.futures] == [False, False, True, True]
+
+
+def test_encrypted_pdf_falls_back_to_message():
+    assert resume_text.extract_text_from_pdf(sample_pdf(1, password='secret')) == "简历PDF已加密，无法提取文本内容"
+    # 空密码加密的 PDF 可以直接读取
+    assert resume_text.extract_text_from_pdf(sample_pdf(1, password='')).strip()
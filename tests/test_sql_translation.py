@@ -0,0 +1,65 @@
+import os
+import sys
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import PGCursorAdapter, translate_placeholders
+
+
+def test_question_marks_become_pyformat_and_numeric():
+    t = translate_placeholders('SELECT id FROM interview_questions WHERE interview_id = ? AND id > ?')
+    assert t.pyformat == 'SELECT id FROM interview_questions WHERE interview_id = %s AND id > %s'
+    assert t.numeric == 'SELECT id FROM interview_questions WHERE interview_id = $1 AND id > $2'
+    assert t.param_count == 2
+
+
+def test_literals_are_not_rewritten_and_percent_is_escaped():
+    t = translate_placeholders("SELECT * FROM positions WHERE name LIKE '%Python?%' AND id = ?")
+    assert t.pyformat == "SELECT * FROM positions WHERE name LIKE '%%Python?%%' AND id = %s"
+    assert t.numeric == "SELECT * FROM positions WHERE name LIKE '%Python?%' AND id = $1"
+    assert t.param_count == 1
+
+
+def test_escaped_quotes_identifiers_and_comments():
+    sql = 'SELECT "a?b", \'it\'\'s ?\' FROM t -- why?\nWHERE x = ? /* y? */'
+    t = translate_placeholders(sql)
+    assert t.pyformat == 'SELECT "a?b", \'it\'\'s ?\' FROM t -- why?\nWHERE x = %s /* y? */'
+    assert t.param_count == 1
+
+
+def test_existing_pyformat_placeholders_and_modulo():
+    t = translate_placeholders('UPDATE interviews SET status = 4 WHERE id = %s AND id % 2 = 0')
+    assert t.pyformat == 'UPDATE interviews SET status = 4 WHERE id = %s AND id %% 2 = 0'
+    assert t.numeric == 'UPDATE interviews SET status = 4 WHERE id = $1 AND id % 2 = 0'
+    assert t.param_count == 1
+
+
+def test_dollar_quoted_body_is_untouched():
+    t = translate_placeholders("SELECT $tag$ what? 100% $tag$, ?")
+    assert t.pyformat == "SELECT $tag$ what? 100%% $tag$, %s"
+    assert t.param_count == 1
+
+
+def test_translation_is_memoized():
+    sql = 'SELECT id FROM interviews WHERE token = ?'
+    assert translate_placeholders(sql) is translate_placeholders(sql)
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+
+def test_named_parameters_are_passed_through():
+    cursor = RecordingCursor()
+    sql = "SELECT id FROM positions WHERE name LIKE %(pattern)s AND id %% 2 = 0"
+    PGCursorAdapter(cursor).execute(sql, {'pattern': '%Python%'})
+    PGCursorAdapter(cursor).execute("SELECT id FROM positions WHERE name LIKE '%Py%' AND id = ?", (1,))
+    assert cursor.executed == [
+        (sql, {'pattern': '%Python%'}),
+        ("SELECT id FROM positions WHERE name LIKE '%%Py%%' AND id = %s", (1,)),
+    ]
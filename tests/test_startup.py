@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['torch', 'whisper', 'weasyprint', 'openai', 'PyPDF2']
+
+
+@pytest.mark.parametrize('code', [
+    'from app.api import create_app; create_app()',
+    'import scripts.generate_interview_questions',
+    'import scripts.generate_interview_reports',
+])
+def test_heavy_dependencies_are_not_imported_at_startup(code):
+    # 在全新的解释器中导入入口，重量级依赖只应在首次使用时加载
+    check = f"{code}; import sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT, ASR_WARMUP='false')
+    result = subprocess.run([sys.executable, '-c', check], cwd=PROJECT_ROOT, env=env,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ''
@@ -0,0 +1,200 @@
+import io
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+from flask import Flask
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api import interview as interview_api
+from app.core.config import Config
+from app.core.database import get_db_connection
+from app.services import streaming_transcription
+from app.services.streaming_transcription import StreamingSession, merge_overlap
+from app.services.transcription_service import NO_SPEECH_TEXT
+from app.utils.audio import SAMPLE_RATE, encode_wav
+
+
+def tone(seconds):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+class FakeTranscriber:
+    """按调用顺序返回预设文本，记录每个窗口的时长（秒）"""
+    def __init__(self, *texts):
+        self.texts = list(texts)
+        self.windows = []
+
+    def __call__(self, audio):
+        self.windows.append(round(len(audio) / SAMPLE_RATE, 2))
+        return self.texts[len(self.windows) - 1]
+
+
+@pytest.fixture
+def stream_config(sqlite_db, monkeypatch):
+    monkeypatch.setattr(Config, 'TRANSCRIBE_ASYNC', False)
+    monkeypatch.setattr(Config, 'STREAM_WINDOW_SECONDS', 2)
+    monkeypatch.setattr(Config, 'STREAM_MIN_WINDOW_SECONDS', 1)
+    monkeypatch.setattr(Config, 'STREAM_OVERLAP_SECONDS', 0.5)
+    monkeypatch.setattr(streaming_transcription, '_sessions', {})
+
+
+def use_transcriber(monkeypatch, *texts):
+    transcriber = FakeTranscriber(*texts)
+    monkeypatch.setattr(streaming_transcription, 'transcribe_audio', transcriber)
+    return transcriber
+
+
+def test_merge_overlap_drops_repeated_text():
+    assert merge_overlap("今天天气", "天气很好") == "今天天气很好"
+    assert merge_overlap("你好", "世界") == "你好世界"
+    # 只在 max_chars 范围内查找重复
+    assert merge_overlap("abcabc", "abcabcX", max_chars=3) == "abcabcabcX"
+
+
+def test_window_is_cut_at_a_pause(stream_config, monkeypatch):
+    transcriber = use_transcriber(monkeypatch, "第一句", "第二句")
+    session = StreamingSession(1, 1)
+
+    session.add_chunk(0, encode_wav(np.concatenate([tone(1.5), silence(0.4), tone(1.0)])))
+    # 在 1.5s ~ 1.9s 的停顿中点切分，不需要重叠
+    assert len(transcriber.windows) == 1 and 1.6 <= transcriber.windows[0] <= 1.8
+    assert session.overlapped == set()
+
+    recording, text = session.finish()
+    assert text == "第一句第二句"
+    assert len(transcriber.windows) == 2
+    assert len(recording) == int(2.9 * SAMPLE_RATE)
+
+
+def test_hard_cut_overlaps_and_finish_flushes_tail(stream_config, monkeypatch):
+    transcriber = use_transcriber(monkeypatch, "今天天气", "天气很好")
+    session = StreamingSession(1, 1)
+
+    session.add_chunk(0, encode_wav(tone(1.2)))
+    assert transcriber.windows == []
+    session.add_chunk(1, encode_wav(tone(1.3)))
+    # 没有停顿：在 2 秒处硬切，下一个窗口从 1.5 秒开始
+    assert transcriber.windows == [2.0]
+    assert session.overlapped == {0}
+
+    _, text = session.finish()
+    assert transcriber.windows == [2.0, 1.0]
+    assert text == "今天天气很好"
+
+
+def test_silent_answer_is_not_transcribed(stream_config, monkeypatch):
+    transcriber = use_transcriber(monkeypatch)
+    session = StreamingSession(1, 1)
+    session.add_chunk(0, encode_wav(silence(2.5)))
+
+    assert session.finish()[1] == NO_SPEECH_TEXT
+    assert transcriber.windows == []
+
+
+@pytest.fixture
+def sqlite_db(sqlite_db):
+    conn = get_db_connection()
+    conn.execute("INSERT INTO interviews (candidate_id, interviewer, start_time, token) VALUES (1, 'hr', 0, 'tok')")
+    conn.execute("INSERT INTO interview_questions (interview_id, question) VALUES (1, 'Q1')")
+    conn.execute("INSERT INTO interview_questions (interview_id, question) VALUES (1, 'Q2')")
+    conn.commit()
+    conn.close()
+    return sqlite_db
+
+
+@pytest.fixture
+def client(sqlite_db, stream_config, monkeypatch):
+    monkeypatch.setattr(interview_api, 'start_evaluation', lambda question_id: None)
+    app = Flask(__name__)
+    app.register_blueprint(interview_api.interview_bp, url_prefix='/api/interview')
+    return app.test_client()
+
+
+def upload(client, seq, audio):
+    return client.post('/api/interview/tok/answer_stream/1/chunk', data={
+        'seq': str(seq), 'audio_chunk': (io.BytesIO(encode_wav(audio)), 'chunk.wav')})
+
+
+def test_chunks_and_finish_can_land_on_different_processes(client, monkeypatch):
+    use_transcriber(monkeypatch, "第一句", "第二句")
+    assert upload(client, 0, np.concatenate([tone(1.5), silence(0.4)])).json['next_seq'] == 1
+    # 客户端重试：重复分段被忽略；跳号返回期望的序号
+    assert upload(client, 0, tone(1.0)).json['next_seq'] == 1
+    response = upload(client, 2, tone(1.0))
+    assert response.status_code == 409 and response.json['expected_seq'] == 1
+
+    # 模拟请求落到另一个 Web 进程：内存中没有会话，从数据库补齐分段
+    streaming_transcription._sessions.clear()
+    use_transcriber(monkeypatch, "第一句", "第二句")
+    assert upload(client, 1, tone(1.0)).json['next_seq'] == 2
+    streaming_transcription._sessions.clear()
+    transcriber = use_transcriber(monkeypatch, "第二句")
+
+    response = client.post('/api/interview/tok/answer_stream/1/finish')
+    assert response.status_code == 200
+    assert response.json['next_question']['id'] == 2
+    # 第一个窗口已由上一个进程转写并保存，这里只转写最后一个窗口
+    assert len(transcriber.windows) == 1
+
+    conn = get_db_connection()
+    row = conn.execute("SELECT answer_text, answer_audio_sha256 FROM interview_questions WHERE id = 1").fetchone()
+    chunks = conn.execute("SELECT COUNT(*) FROM stream_chunks").fetchone()[0]
+    windows = conn.execute("SELECT COUNT(*) FROM stream_windows").fetchone()[0]
+    conn.close()
+    assert row['answer_text'] == "第一句第二句" and row['answer_audio_sha256']
+    assert chunks == 0 and windows == 0
+
+
+class HeldPool:
+    """转写进程池替身：保留回调，由测试决定窗口何时转写完成"""
+    def __init__(self):
+        self.callbacks = []
+
+    def submit(self, job_id, audio, callback=None):
+        self.callbacks.append(callback)
+
+
+def test_finish_timeout_saves_the_answer_and_returns_202(client, monkeypatch):
+    pool = HeldPool()
+    monkeypatch.setattr(Config, 'TRANSCRIBE_ASYNC', True)
+    monkeypatch.setattr(Config, 'STREAM_FINISH_WAIT_SECONDS', 0.05)
+    monkeypatch.setattr(streaming_transcription, 'get_transcription_pool', lambda: pool)
+    saved = threading.Event()
+    results = []
+    monkeypatch.setattr(streaming_transcription, 'on_transcription_complete',
+                        lambda question_id, status, text: (results.append((question_id, status, text)), saved.set()))
+
+    upload(client, 0, tone(1.0))
+    response = client.post('/api/interview/tok/answer_stream/1/finish')
+    assert response.status_code == 202
+    assert response.json['next_question']['id'] == 2
+    assert response.json['transcription']['status_url'] == '/api/interview/tok/transcription/1'
+
+    conn = get_db_connection()
+    row = conn.execute("SELECT answer_text, answer_audio_sha256 FROM interview_questions WHERE id = 1").fetchone()
+    conn.close()
+    assert row['answer_text'] is None and row['answer_audio_sha256']
+    # 会话已移除：重复调用 finish 不会再保存一次
+    assert client.post('/api/interview/tok/answer_stream/1/finish').status_code == 404
+
+    # 剩余窗口完成后在后台回写文本；回答已保存，窗口不再持久化
+    pool.callbacks[0](None, 'completed', "迟到的文本")
+    assert saved.wait(5)
+    assert results == [(1, 'completed', "迟到的文本")]
+    conn = get_db_connection()
+    assert conn.execute("SELECT COUNT(*) FROM stream_windows").fetchone()[0] == 0
+    conn.close()
+
+
+def test_finish_without_chunks_is_404(client):
+    assert client.post('/api/interview/tok/answer_stream/1/finish').status_code == 404
@@ -0,0 +1,304 @@
+import io
+import os
+import sys
+import time
+import queue
+import threading
+
+import pytest
+from flask import Flask
+
+# 添加项目根目录到 path 以便导入模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api import interview as interview_api
+from app.core.config import Config
+from app.core.database import get_db_connection
+from app.services import transcription_service
+from app.services.blob_store import blob_key, get_blob_store
+from app.services.transcription_service import (
+    TranscriptionPool, TranscriptionQueueFull, TRANSCRIPTION_FAILED_TEXT, recover_transcriptions,
+)
+
+
+class Results:
+    """记录 on_complete 回调"""
+    def __init__(self):
+        self.calls = []
+        self.done = threading.Event()
+
+    def __call__(self, job_id, status, text):
+        self.calls.append((job_id, status, text))
+        self.done.set()
+
+
+class DeadProcess:
+    pid = 4242
+    exitcode = -9
+
+    def is_alive(self):
+        return False
+
+
+def test_submit_rejects_when_queue_is_full():
+    pool = TranscriptionPool(1, 3, Results())
+    pool.submit(1, b'a')
+    pool.reserve()
+    assert pool.free_slots() == 1
+    pool.submit(2, b'b', reserved=True)
+    pool.reserve()
+    pool.release_reservation()
+    assert pool.free_slots() == 1
+    pool.submit(3, b'c')
+    assert pool.free_slots() == 0
+    with pytest.raises(TranscriptionQueueFull):
+        pool.submit(4, b'd')
+    assert pool.job_ids() == {1, 2, 3}
+    assert pool.job_status(1) == 'queued'
+
+
+def test_collector_reports_results_and_frees_slots():
+    results = Results()
+    pool = TranscriptionPool(1, 1, results)
+    pool.submit(7, b'audio')
+    collector = threading.Thread(target=pool._collect_results)
+    collector.start()
+    try:
+        pool._result_queue.put((None, 'ready', 100, None))
+        pool._result_queue.put((1, 'running', 100, None))
+        pool._result_queue.put((1, 'completed', 100, '你好'))
+        assert results.done.wait(5)
+    finally:
+        pool._stopped = True
+        collector.join(5)
+
+    assert results.calls == [(7, 'completed', '你好')]
+    assert 100 in pool._ready_pids
+    assert pool.job_status(7) is None
+    # 名额已归还
+    pool.submit(8, b'audio')
+
+
+def test_dead_worker_jobs_fail_and_worker_is_replaced(monkeypatch):
+    results = Results()
+    pool = TranscriptionPool(1, 2, results)
+    spawned = []
+    monkeypatch.setattr(pool, '_spawn_worker', lambda: spawned.append(True))
+    pool._processes = [DeadProcess()]
+    pool.submit(1, b'a')
+    pool.submit(2, b'b')
+    pool._jobs[1].update(status='running', pid=DeadProcess.pid)
+
+    pool._reap_dead_workers()
+
+    assert results.calls == [(1, 'failed', TRANSCRIPTION_FAILED_TEXT)]
+    assert pool.job_status(2) == 'queued'
+    assert pool._processes == [] and spawned == [True]
+
+
+def test_worker_that_cannot_load_the_model_reports_and_exits(monkeypatch):
+    def broken_model():
+        raise RuntimeError("model file missing")
+    monkeypatch.setattr(transcription_service, 'warm_up_asr', broken_model)
+    job_queue, result_queue = queue.Queue(), queue.Queue()
+    job_queue.put((1, 'q1', b'audio'))
+
+    transcription_service._worker_main(job_queue, result_queue)
+
+    assert result_queue.get_nowait() == (None, 'failed', os.getpid(), "model file missing")
+    assert result_queue.empty()
+    # 任务留在队列中，由其他（或重启后的）工作进程处理
+    assert job_queue.qsize() == 1
+
+
+def test_load_failure_is_reported_and_respawn_backs_off(monkeypatch):
+    monkeypatch.setattr(transcription_service, 'REAP_INTERVAL_SECONDS', 0.01)
+    pool = TranscriptionPool(1, 2, Results())
+    spawned = []
+    monkeypatch.setattr(pool, '_spawn_worker', lambda: spawned.append(True))
+    monkeypatch.setattr(transcription_service, '_pool', pool)
+    monkeypatch.setattr(transcription_service, '_warmup_state', 'warming')
+    monkeypatch.setattr(Config, 'TRANSCRIBE_ASYNC', True)
+    collector = threading.Thread(target=pool._collect_results)
+    collector.start()
+    try:
+        pool._result_queue.put((None, 'failed', DeadProcess.pid, "model file missing"))
+        deadline = time.monotonic() + 5
+        while pool.load_error is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        pool._stopped = True
+        collector.join(5)
+
+    readiness = transcription_service.get_asr_readiness()
+    assert readiness['state'] == 'failed' and readiness['error'] == "model file missing"
+
+    # 退避期间不立即重启，到期后补足工作进程
+    pool._stopped = False
+    pool._processes = [DeadProcess()]
+    spawned.clear()
+    pool._reap_dead_workers()
+    assert pool._processes == [] and spawned == []
+    pool._next_spawn_at = 0
+    pool._reap_dead_workers()
+    assert spawned == [True]
+
+
+def test_dead_workers_are_reaped_while_results_keep_arriving(monkeypatch):
+    monkeypatch.setattr(transcription_service, 'REAP_INTERVAL_SECONDS', 0.01)
+    pool = TranscriptionPool(1, 1, Results())
+    reaped = []
+    monkeypatch.setattr(pool, '_reap_dead_workers', lambda: reaped.append(True))
+    collector = threading.Thread(target=pool._collect_results)
+    collector.start()
+    try:
+        deadline = time.monotonic() + 0.3
+        while time.monotonic() < deadline:
+            pool._result_queue.put((None, 'ready', 100, None))
+            time.sleep(0.001)
+    finally:
+        pool._stopped = True
+        collector.join(5)
+    assert len(reaped) >= 5
+
+
+class FullPool:
+    def reserve(self):
+        raise TranscriptionQueueFull("2 transcription jobs already pending")
+
+
+class CommitCheckingPool:
+    """提交任务时检查回答是否已经提交到数据库"""
+    def __init__(self):
+        self.reserved = 0
+        self.submitted = []
+
+    def reserve(self):
+        self.reserved += 1
+
+    def release_reservation(self):
+        self.reserved -= 1
+
+    def submit(self, job_id, audio_data, callback=None, reserved=False):
+        assert reserved
+        self.reserved -= 1
+        self.submitted.append((job_id, question_rows()[job_id]['answered_at'] is not None))
+
+
+class RecordingPool:
+    def __init__(self, free, in_flight=()):
+        self.free = free
+        self.in_flight = set(in_flight)
+        self.submitted = []
+
+    def free_slots(self):
+        return self.free
+
+    def job_ids(self):
+        return set(self.in_flight)
+
+    def submit(self, job_id, audio_data, callback=None):
+        self.submitted.append((job_id, audio_data))
+
+
+@pytest.fixture
+def sqlite_db(sqlite_db):
+    conn = get_db_connection()
+    conn.execute("INSERT INTO interviews (candidate_id, interviewer, start_time, token) VALUES (1, 'hr', 0, 'tok')")
+    for i in range(4):
+        conn.execute("INSERT INTO interview_questions (interview_id, question) VALUES (1, ?)", (f'Q{i}',))
+    conn.commit()
+    conn.close()
+    return sqlite_db
+
+
+def answer(question_id, audio, lease_expires_at, attempts):
+    conn = get_db_connection()
+    conn.execute("UPDATE interview_questions SET answer_audio_sha256 = ?, answered_at = 1, "
+                 "transcribe_lease_expires_at = ?, transcribe_attempts = ? WHERE id = ?",
+                 (get_blob_store().put(audio), lease_expires_at, attempts, question_id))
+    conn.commit()
+    conn.close()
+
+
+def question_rows():
+    conn = get_db_connection()
+    rows = conn.execute("SELECT id, answer_text, answered_at, transcribe_lease_expires_at, transcribe_attempts "
+                        "FROM interview_questions ORDER BY id").fetchall()
+    conn.close()
+    return {row['id']: dict(row) for row in rows}
+
+
+def test_submit_answer_returns_503_when_queue_is_full(sqlite_db, monkeypatch):
+    monkeypatch.setattr(Config, 'TRANSCRIBE_ASYNC', True)
+    monkeypatch.setattr(Config, 'VAD_ENABLED', False)
+    monkeypatch.setattr(interview_api, 'get_transcription_pool', lambda: FullPool())
+    app = Flask(__name__)
+    app.register_blueprint(interview_api.interview_bp, url_prefix='/api/interview')
+
+    response = app.test_client().post('/api/interview/tok/submit_answer', data={
+        'question_id': '1', 'audio_answer': (io.BytesIO(b'RIFF'), 'answer.wav')})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+    assert question_rows()[1]['answered_at'] is None
+    # 队列已满时不写入文件存储
+    assert not os.path.exists(Config.BLOB_DIR) or not any(files for _, _, files in os.walk(Config.BLOB_DIR))
+
+
+def test_answer_is_committed_before_transcription_is_submitted(sqlite_db, monkeypatch):
+    monkeypatch.setattr(Config, 'TRANSCRIBE_ASYNC', True)
+    monkeypatch.setattr(Config, 'VAD_ENABLED', False)
+    pool = CommitCheckingPool()
+    monkeypatch.setattr(interview_api, 'get_transcription_pool', lambda: pool)
+    app = Flask(__name__)
+    app.register_blueprint(interview_api.interview_bp, url_prefix='/api/interview')
+    client = app.test_client()
+
+    response = client.post('/api/interview/tok/submit_answer', data={
+        'question_id': '1', 'audio_answer': (io.BytesIO(b'RIFF answer'), 'answer.wav')})
+    assert response.status_code == 200
+    assert pool.submitted == [(1, True)] and pool.reserved == 0
+    row = question_rows()[1]
+    assert row['transcribe_attempts'] == 1 and row['transcribe_lease_expires_at'] > time.time()
+    assert get_blob_store().get(blob_key(b'RIFF answer')) == b'RIFF answer'
+
+    # 问题不存在：归还预留的名额，不写入录音
+    response = client.post('/api/interview/tok/submit_answer', data={
+        'question_id': '99', 'audio_answer': (io.BytesIO(b'RIFF orphan'), 'answer.wav')})
+    assert response.status_code == 404
+    assert pool.reserved == 0
+    assert not get_blob_store().exists(blob_key(b'RIFF orphan'))
+
+
+def test_recovery_resubmits_lost_transcriptions(sqlite_db, monkeypatch):
+    monkeypatch.setattr(Config, 'TRANSCRIBE_ASYNC', True)
+    monkeypatch.setattr(Config, 'TRANSCRIBE_MAX_ATTEMPTS', 3)
+    pool = RecordingPool(free=1, in_flight={2})
+    monkeypatch.setattr(transcription_service, 'get_transcription_pool', lambda: pool)
+    now = int(time.time())
+    answer(1, b'lost', now + 600, 1)   # 租约未过期，仍在转写
+    answer(2, b'local', now - 1, 1)    # 本进程正在转写
+    answer(3, b'crashed', now - 1, 1)
+    answer(4, b'waiting', None, 0)
+
+    assert recover_transcriptions() == 1
+    assert pool.submitted == [(3, b'crashed')]
+    rows = question_rows()
+    assert rows[3]['transcribe_attempts'] == 2 and rows[3]['transcribe_lease_expires_at'] > now
+    assert rows[4]['transcribe_attempts'] == 0
+
+
+def test_recovery_gives_up_after_max_attempts(sqlite_db, monkeypatch):
+    monkeypatch.setattr(Config, 'TRANSCRIBE_ASYNC', False)
+    monkeypatch.setattr(Config, 'TRANSCRIBE_MAX_ATTEMPTS', 2)
+    monkeypatch.setattr(transcription_service, 'transcribe_audio', lambda audio: audio.decode())
+    monkeypatch.setattr(transcription_service, 'start_evaluation', lambda question_id: None)
+    answer(1, b'recovered', None, 1)
+    answer(2, b'poison', None, 2)
+
+    assert recover_transcriptions() == 2
+    rows = question_rows()
+    assert rows[1]['answer_text'] == 'recovered'
+    assert rows[2]['answer_text'] == TRANSCRIPTION_FAILED_TEXT
+    assert rows[1]['transcribe_lease_expires_at'] is None